@@ -0,0 +1,88 @@
+"""Child reconciliation benchmark: legacy TemplateDiff vs keyed patch ops.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_reconcile [--rows 500] [--repeat 5]
+
+For each workload it reports the number of patch operations, the JSON payload
+size of both protocols and the time spent computing them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Callable
+
+from pyweber.core.element import Element
+from pyweber.core.template import Template
+from pyweber.models.template_diff import TemplateDiff
+from pyweber.models.template_patch import TemplatePatch
+
+def build(rows: int) -> Template:
+    items = ''.join(f'<li key="row-{i}"><span>Row {i}</span><b>{i * 7 % 13}</b></li>' for i in range(rows))
+    return Template(template=f'<body><ul id="list">{items}</ul></body>')
+
+def shuffle(childs: list[Element]) -> list[Element]:
+    random.Random(42).shuffle(childs)
+    return childs
+
+def sort(childs: list[Element]) -> list[Element]:
+    return sorted(childs, key=lambda child: (child.childs[1].content, child.get_attr('key')))
+
+def prepend(childs: list[Element]) -> list[Element]:
+    return [Element('li', attrs={'key': 'new'}, content='new')] + childs
+
+def append(childs: list[Element]) -> list[Element]:
+    return childs + [Element('li', attrs={'key': 'new'}, content='new')]
+
+WORKLOADS: dict[str, Callable[[list[Element]], list[Element]]] = {
+    'shuffle': shuffle,
+    'sort': sort,
+    'prepend': prepend,
+    'append': append,
+}
+
+def run(workload: Callable[[list[Element]], list[Element]], rows: int) -> dict[str, float]:
+    tpl = build(rows)
+    ul = tpl.querySelector('#list')
+    old = tpl.snapshot()
+    ul.childs = workload(list(ul.childs))
+
+    started = time.perf_counter()
+    diff = TemplateDiff()
+    diff.track_differences(tpl.body, old.body)
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    patch = TemplatePatch()
+    patch.track_patches(tpl.body, old.body)
+    patch_time = time.perf_counter() - started
+
+    return {
+        'ops': len(patch.operations),
+        'legacy_bytes': len(json.dumps(diff.differences, separators=(',', ':'))),
+        'patch_bytes': len(json.dumps(patch.operations, separators=(',', ':'))),
+        'legacy_ms': legacy_time * 1000,
+        'patch_ms': patch_time * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"workload":<10}{"ops":>6}{"legacy bytes":>15}{"patch bytes":>13}{"legacy ms":>12}{"patch ms":>10}')
+    for name, workload in WORKLOADS.items():
+        results = [run(workload, args.rows) for _ in range(args.repeat)]
+        best = {key: min(result[key] for result in results) for key in results[0]}
+        print(
+            f'{name:<10}{best["ops"]:>6.0f}{best["legacy_bytes"]:>15.0f}{best["patch_bytes"]:>13.0f}'
+            f'{best["legacy_ms"]:>12.2f}{best["patch_ms"]:>10.2f}'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""WebSocket frame unmasking benchmark: per-byte loop vs bulk integer XOR.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_unmask [--repeat 5]
+
+For 1 KB, 64 KB and 1 MB payloads it reports the best time of both strategies
+and the resulting throughput of ``pyweber.connection.websocket.unmask``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from pyweber.connection.websocket import unmask
+
+SIZES = {'1 KB': 1024, '64 KB': 64 * 1024, '1 MB': 1024 * 1024}
+
+def unmask_loop(payload: bytes, masking_key: bytes) -> bytes:
+    # The implementation receive_frame used before
+    unmasked = bytearray(len(payload))
+    for i in range(len(payload)):
+        unmasked[i] = payload[i] ^ masking_key[i % 4]
+    return bytes(unmasked)
+
+def best_ms(function, payload: bytes, masking_key: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(payload, masking_key)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    masking_key = os.urandom(4)
+    print(f'{"payload":<10}{"loop ms":>10}{"bulk ms":>10}{"speedup":>10}{"bulk MB/s":>12}')
+    for name, size in SIZES.items():
+        payload = os.urandom(size)
+        assert unmask(payload, masking_key) == unmask_loop(payload, masking_key)
+
+        loop_ms = best_ms(unmask_loop, payload, masking_key, args.repeat)
+        bulk_ms = best_ms(unmask, payload, masking_key, args.repeat)
+        throughput = size / (1024 * 1024) / (bulk_ms / 1000) if bulk_ms else float('inf')
+        print(f'{name:<10}{loop_ms:>10.3f}{bulk_ms:>10.3f}{loop_ms / bulk_ms:>9.0f}x{throughput:>12.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -62,6 +62,12 @@ from .core.events import (
     TemplateEvents,
     WindowEvents
 )
+from .models.event_policy import (
+    EventPolicy,
+    throttle,
+    debounce,
+    latest_wins
+)
 
 # pyweber utils
 from .utils.loads import LoadStaticFiles
@@ -2,6 +2,7 @@ from pyweber.core.element import Element
 from pyweber.components.input import Input, InputHidden
 from typing import Callable, Literal
 
+from pyweber.models.tracked import TrackedDict
 from pyweber.utils.security import (
     CSRF_FORM_FIELD,
     csrf_enabled,
@@ -96,7 +97,8 @@ class Form(Element):
         if value:
             raise AttributeError('Subscript not allowed to this attribute')
 
-        self.__attrs = {}
+        self.__attrs = TrackedDict(owner=self, field='attrs')
+        self._field_changed('attrs')
         for key, value in self.__dict__.items():
             if key in ['method', 'name', 'action', 'autocomplete', 'spellcheck', 'autocapitalize', 'novalidate', 'target', 'enctype', 'accept_charset', 'rel', 'tabindex'] and value:
                 if key in ['autocomplete', 'spellcheck', 'autocapitalize', 'novalidate'] and value == True:
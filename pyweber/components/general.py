@@ -1,5 +1,6 @@
 from pyweber.core.element import Element
 from pyweber.utils.types import Icons
+from pyweber.models.tracked import TrackedDict
 from typing import Union, Literal, Callable
 
 class Icon(Element):
@@ -27,7 +28,8 @@ class Script(Element):
         if value:
             raise AttributeError('Cannot modify attrs attribute directly')
         
-        self.__attrs: dict[str, str] = {}
+        self.__attrs = TrackedDict(owner=self, field='attrs')
+        self._field_changed('attrs')
 
         for key, value in self.__dict__.items():
             if key in ['src', 'type'] and value:
@@ -59,7 +61,8 @@ class Label(Element):
         if value:
             raise AttributeError('Attributte not allowed to change default value')
         
-        self.__attrs = {}
+        self.__attrs = TrackedDict(owner=self, field='attrs')
+        self._field_changed('attrs')
         for key, value in self.__dict__.items():
             if key in ['to', 'form', 'tabindex'] and value:
                 if key == 'to':
@@ -189,7 +192,8 @@ class TextArea(Element):
         if value:
             raise AttributeError('Cannot modify attrs attribute directly')
         
-        self.__attrs: dict[str, str] = {}
+        self.__attrs = TrackedDict(owner=self, field='attrs')
+        self._field_changed('attrs')
 
         for key, value in self.__dict__.items():
             if key in ['name', 'rows', 'cols', 'form', 'maxlength', 'minlength', 
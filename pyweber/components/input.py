@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import Callable, Literal
 
 from pyweber.core.element import Element
+from pyweber.models.tracked import TrackedDict
 
 _COMMON_ATTR_KEYS = frozenset({
     'type', 'form', 'name', 'tabindex', 'autofocus', 'required', 'disabled',
@@ -129,7 +130,8 @@ class Input(Element):
         if value:
             raise AttributeError('Cannot modify attrs attribute directly')
 
-        self.__attrs: dict[str, str] = {}
+        self.__attrs = TrackedDict(owner=self, field='attrs')
+        self._field_changed('attrs')
 
         for key, val in self.__dict__.items():
             if key in _COMMON_ATTR_KEYS and val:
@@ -0,0 +1,150 @@
+"""RFC 7692 ``permessage-deflate`` for the built-in WebSocket server.
+
+The extension is negotiated from the client's ``Sec-WebSocket-Extensions``
+offer during the upgrade. With context takeover (the default) each direction
+keeps one zlib stream per connection, so later messages are compressed against
+everything sent before instead of starting from an empty dictionary.
+
+Settings live in the ``[websocket]`` config section (env overrides in
+parentheses):
+
+- ``deflate`` (``PYWEBER_WS_DEFLATE``) — enable the extension, default on
+- ``deflate_window_bits`` — server LZ77 window, 9–15, default 15
+- ``deflate_min_bytes`` — smaller messages are sent uncompressed, default 256
+- ``deflate_context_takeover`` — keep the server dictionary between messages
+"""
+
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Optional
+
+from pyweber.utils.security import get_max_body_size
+
+EXTENSION_NAME = 'permessage-deflate'
+_TAIL = b'\x00\x00\xff\xff'
+_KNOWN_PARAMS = frozenset({
+    'server_no_context_takeover',
+    'client_no_context_takeover',
+    'server_max_window_bits',
+    'client_max_window_bits',
+})
+
+def _config():
+    from pyweber.config.config import config
+    return config
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in {'1', 'true', 'yes', 'on'}
+    return bool(value)
+
+def deflate_enabled() -> bool:
+    env = os.environ.get('PYWEBER_WS_DEFLATE')
+    if env is not None:
+        return _as_bool(env)
+    return _as_bool(_config().get('websocket', 'deflate', default=True))
+
+def _int_setting(key: str, default: int) -> int:
+    try:
+        return int(_config().get('websocket', key, default=default))
+    except (TypeError, ValueError):
+        return default
+
+def parse_offers(header: Optional[str]) -> list[dict[str, Optional[str]]]:
+    """``permessage-deflate`` offers from a ``Sec-WebSocket-Extensions`` value, in order."""
+    offers = []
+    for extension in (header or '').split(','):
+        name, *params = [part.strip() for part in extension.split(';')]
+        if name.lower() != EXTENSION_NAME:
+            continue
+
+        offer: dict[str, Optional[str]] = {}
+        for param in params:
+            if not param:
+                continue
+            key, _, value = param.partition('=')
+            key, value = key.strip().lower(), value.strip().strip('"') or None
+            if key not in _KNOWN_PARAMS or key in offer:
+                offer = None
+                break
+            offer[key] = value
+        if offer is not None:
+            offers.append(offer)
+    return offers
+
+class PerMessageDeflate:
+    """Compressor/decompressor pair for one connection."""
+
+    def __init__(
+        self,
+        window_bits: int = 15,
+        context_takeover: bool = True,
+        min_bytes: int = 256,
+        level: int = zlib.Z_DEFAULT_COMPRESSION,
+        max_size: Optional[int] = None,
+    ):
+        if not 9 <= window_bits <= 15:
+            raise ValueError('permessage-deflate window bits must be between 9 and 15')
+
+        self.window_bits = window_bits
+        self.context_takeover = context_takeover
+        self.min_bytes = min_bytes
+        self.level = level
+        self.max_size = max_size or get_max_body_size()
+        self.__compressor = None
+        self.__decompressor = zlib.decompressobj(-15)
+
+    @classmethod
+    def negotiate(cls, header: Optional[str]) -> Optional['PerMessageDeflate']:
+        """Accept the first acceptable client offer, or ``None`` to run uncompressed."""
+        if not deflate_enabled():
+            return None
+
+        window_bits = min(max(_int_setting('deflate_window_bits', 15), 9), 15)
+        context_takeover = _as_bool(_config().get('websocket', 'deflate_context_takeover', default=True))
+        min_bytes = _int_setting('deflate_min_bytes', 256)
+
+        for offer in parse_offers(header):
+            bits = window_bits
+            if 'server_max_window_bits' in offer:
+                try:
+                    bits = min(bits, int(offer['server_max_window_bits']))
+                except (TypeError, ValueError):
+                    continue
+                if bits < 9:
+                    continue    # zlib cannot produce raw deflate with an 8-bit window
+
+            return cls(
+                window_bits=bits,
+                context_takeover=context_takeover and 'server_no_context_takeover' not in offer,
+                min_bytes=min_bytes,
+            )
+        return None
+
+    @property
+    def response_header(self) -> str:
+        """``Sec-WebSocket-Extensions`` value for the 101 response."""
+        params = [EXTENSION_NAME]
+        if not self.context_takeover:
+            params.append('server_no_context_takeover')
+        if self.window_bits < 15:
+            params.append(f'server_max_window_bits={self.window_bits}')
+        return '; '.join(params)
+
+    def should_compress(self, payload: bytes) -> bool:
+        return len(payload) >= self.min_bytes
+
+    def compress(self, payload: bytes) -> bytes:
+        if self.__compressor is None or not self.context_takeover:
+            self.__compressor = zlib.compressobj(self.level, zlib.DEFLATED, -self.window_bits)
+
+        data = self.__compressor.compress(payload) + self.__compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data[:-4] if data.endswith(_TAIL) else data
+
+    def decompress(self, payload: bytes) -> bytes:
+        data = self.__decompressor.decompress(payload + _TAIL, self.max_size)
+        if self.__decompressor.unconsumed_tail:
+            raise ValueError('Decompressed WebSocket message exceeds max_body_size')
+        return data
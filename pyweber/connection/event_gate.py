@@ -0,0 +1,130 @@
+"""Server-side enforcement of event delivery policies.
+
+Events whose element declares a policy (or whose type has a default one, see
+``pyweber.models.event_policy``) go through ``EventGate`` instead of straight to
+the ``TaskManager``. There is one slot per session and handler; it holds at
+most one pending run — a newer event replaces it — so a burst never queues
+more than one extra handler call:
+
+- ``latest`` runs the pending event as soon as the handler is free
+- ``throttle`` additionally waits until ``wait`` seconds passed since the
+  previous run started
+- ``debounce`` runs once no event arrived for ``wait`` seconds
+
+Runs happen in background tasks, so the socket keeps reading (and
+coalescing) while a handler is busy, and the last event is always delivered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from pyweber.models.event_policy import EventPolicy
+from pyweber.utils.utils import PrintLine
+
+Run = Callable[[], Awaitable[Any]]
+
+@dataclass
+class _Slot:
+    policy: EventPolicy
+    pending: Optional[Run] = None
+    handle: Optional[asyncio.TimerHandle] = None
+    running: Optional[asyncio.Task] = None
+    started: float = field(default=float('-inf'))
+
+    @property
+    def busy(self) -> bool:
+        return self.running is not None and not self.running.done()
+
+@dataclass
+class GateStats:
+    received: int = 0
+    ran: int = 0
+    coalesced: int = 0
+
+class EventGate:
+    def __init__(self):
+        self.__slots: dict[tuple[str, str], _Slot] = {}
+        self.stats = GateStats()
+
+    def pending(self, session_id: str, event_id: str) -> bool:
+        slot = self.__slots.get((session_id, event_id))
+        return slot is not None and slot.pending is not None
+
+    def submit(self, session_id: str, event_id: str, policy: EventPolicy, run: Run):
+        """Schedule ``run`` under ``policy``, replacing a run that has not started yet."""
+        self.stats.received += 1
+        key = (session_id, event_id)
+        slot = self.__slots.get(key)
+        if slot is None:
+            slot = self.__slots[key] = _Slot(policy=policy)
+        slot.policy = policy
+
+        if slot.pending is not None:
+            self.stats.coalesced += 1
+        slot.pending = run
+
+        if policy.kind == 'debounce':
+            if slot.handle is not None:
+                slot.handle.cancel()
+            slot.handle = asyncio.get_running_loop().call_later(policy.wait, self.__pump, key)
+        elif slot.handle is None:
+            self.__pump(key)
+
+    def cancel(self, session_id: str):
+        """Drop pending runs and stop running ones of a closed session."""
+        for key in [key for key in self.__slots if key[0] == session_id]:
+            slot = self.__slots.pop(key)
+            if slot.handle is not None:
+                slot.handle.cancel()
+            if slot.busy:
+                slot.running.cancel()
+
+    async def join(self):
+        """Wait until every pending run has finished (tests, shutdown)."""
+        while self.__slots:
+            tasks = [slot.running for slot in self.__slots.values() if slot.busy]
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            else:
+                await asyncio.sleep(0.001)
+
+    def __pump(self, key: tuple[str, str]):
+        slot = self.__slots.get(key)
+        if slot is None:
+            return
+        slot.handle = None
+        if slot.busy:
+            return    # ``__finished`` pumps again
+
+        loop = asyncio.get_running_loop()
+        delay = slot.started + slot.policy.wait - loop.time() if slot.policy.kind == 'throttle' else 0
+        if delay > 0:
+            # Throttled: run (or, with nothing pending, retire the slot) when the interval ends
+            slot.handle = loop.call_later(delay, self.__pump, key)
+            return
+
+        if slot.pending is None:
+            del self.__slots[key]
+            return
+
+        run, slot.pending = slot.pending, None
+        slot.started = loop.time()
+        self.stats.ran += 1
+        slot.running = loop.create_task(self.__run(key, run))
+
+    async def __run(self, key: tuple[str, str], run: Run):
+        try:
+            await run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            PrintLine(text=f'Event handler {key[1]} failed: {e}', level='WARNING')
+        finally:
+            slot = self.__slots.get(key)
+            if slot is not None and slot.running is asyncio.current_task():
+                slot.running = None
+                if slot.handle is None:
+                    asyncio.get_running_loop().call_soon(self.__pump, key)
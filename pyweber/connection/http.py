@@ -29,6 +29,8 @@ class HttpServer:
         self.ssl_context: ssl.SSLContext = None
         self.__app: Pyweber = None
         self._pool = ThreadPoolExecutor(max_workers=100)  # só para HTTP
+        self._ws_loop: asyncio.AbstractEventLoop | None = None
+        self._ws_loop_lock = threading.Lock()
 
     @property
     def app(self): return self.__app
@@ -37,6 +39,19 @@ class HttpServer:
     def app(self, value):
         self.__app = value
 
+    def websocket_loop(self) -> asyncio.AbstractEventLoop:
+        """The single event loop shared by every WebSocket connection (started lazily)."""
+        with self._ws_loop_lock:
+            if self._ws_loop is None or self._ws_loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name='pyweber-websockets',
+                    daemon=True
+                ).start()
+                self._ws_loop = loop
+            return self._ws_loop
+
     async def send_data(self, client: Union[socket.socket, ssl.SSLSocket], data: bytes):
         client.sendall(data)
 
@@ -151,7 +166,7 @@ class HttpServer:
             client.close()
 
     async def handle_websocket(self, client: Union[socket.socket, ssl.SSLSocket]):
-        """WebSocket — longa duração, corre em thread dedicada fora do pool."""
+        """WebSocket — longa duração, corre no event loop partilhado das ligações WS."""
         try:
             headers, body = await self.process_request(client)
 
@@ -165,9 +180,8 @@ class HttpServer:
             )
 
             upgrade = WebsocketUpgrade(headers=headers)
-            await self.send_data(client, upgrade.upgrade_response.encode('utf-8'))
-
-            ws_connection = WebsocketServer(client, cookies=dict(request.cookies))
+            ws_connection = WebsocketServer(client, cookies=dict(request.cookies), deflate=upgrade.deflate)
+            await ws_connection.write_all(upgrade.upgrade_response.encode('utf-8'))
             await self.app.ws_server.connect_wsgi(ws_connection=ws_connection)
 
         except TypeError:
@@ -201,12 +215,11 @@ class HttpServer:
             is_ws, raw = self._peek_is_websocket(client)
 
             if is_ws:
-                # Thread dedicada para WS — longa duração
-                threading.Thread(
-                    target=asyncio.run,
-                    args=(self._handle_websocket_raw(client, raw),),
-                    daemon=True
-                ).start()
+                # Todas as ligações WS partilham um único event loop
+                asyncio.run_coroutine_threadsafe(
+                    self._handle_websocket_raw(client, raw),
+                    self.websocket_loop()
+                )
             else:
                 # Só submete ao pool DEPOIS do peek — pool livre para processar
                 self._pool.submit(asyncio.run, self._handle_http_raw(client, raw))
@@ -275,9 +288,8 @@ class HttpServer:
             cookies = self._parse_cookies(header_text)
 
             upgrade = WebsocketUpgrade(headers=header_bytes)
-            client.sendall(upgrade.upgrade_response.encode('utf-8'))
-
-            ws_connection = WebsocketServer(client, cookies=cookies)
+            ws_connection = WebsocketServer(client, cookies=cookies, deflate=upgrade.deflate)
+            await ws_connection.write_all(upgrade.upgrade_response.encode('utf-8'))
             await self.app.ws_server.connect_wsgi(ws_connection=ws_connection)
 
         except TypeError:
@@ -360,6 +372,8 @@ class HttpServer:
                 finally:
                     selector.close()
                     self._pool.shutdown(wait=False)
+                    if self._ws_loop is not None:
+                        self._ws_loop.call_soon_threadsafe(self._ws_loop.stop)
 
             except OSError as e:
                 PrintLine(text=f'Error to running server: {e}', level='ERROR')
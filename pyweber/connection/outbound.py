@@ -0,0 +1,203 @@
+"""Bounded per-connection send queues.
+
+``send_message`` no longer writes to a connection itself: every session's
+connection gets an ``OutboundQueue`` whose writer task sends one frame at a
+time, so a slow client only ever delays its own frames.
+
+When the client falls behind (frames are still queued), template updates are
+not rendered right away. They are queued as a deferred update that is
+rendered when the writer reaches it, and further updates are merged into it,
+so the client receives one patch covering all intermediate changes instead of
+each of them. A connection is dropped when its queue holds ``max_queue``
+frames or its oldest frame waited longer than ``max_lag`` seconds.
+
+Limits come from ``[websocket] max_queue`` / ``max_lag`` (env
+``PYWEBER_WS_MAX_QUEUE`` / ``PYWEBER_WS_MAX_LAG``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from pyweber.utils.utils import PrintLine
+
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_MAX_LAG = 10.0
+
+Message = Union[str, bytes]
+
+def _limit(env: str, key: str, default: float) -> float:
+    from pyweber.config.config import config
+
+    value = os.environ.get(env)
+    if value is None:
+        value = config.get('websocket', key, default=default)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+def max_queue() -> int:
+    """Frames a connection may have waiting before it is dropped."""
+    return int(_limit('PYWEBER_WS_MAX_QUEUE', 'max_queue', DEFAULT_MAX_QUEUE))
+
+def max_lag() -> float:
+    """Seconds the oldest waiting frame may wait before the connection is dropped."""
+    return _limit('PYWEBER_WS_MAX_LAG', 'max_lag', DEFAULT_MAX_LAG)
+
+@dataclass
+class _Frame:
+    enqueued: float
+    message: Optional[Message] = None
+    opcode: int = 1
+    # Deferred template update, rendered by the writer
+    data: Optional[dict[str, Any]] = None
+    futures: list[asyncio.Future] = field(default_factory=list)
+
+@dataclass
+class QueueStats:
+    enqueued: int = 0
+    written: int = 0
+    collapsed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    max_depth: int = 0
+
+class OutboundQueue:
+    def __init__(
+        self,
+        write: Callable[[Message, int], Awaitable[bool]],
+        render: Callable[[dict[str, Any]], Awaitable[Optional[tuple[Message, int]]]],
+        on_overflow: Callable[[str], None],
+        size_limit: Optional[int] = None,
+        lag_limit: Optional[float] = None,
+        stats: Optional[QueueStats] = None,
+    ):
+        self.__write = write
+        self.__render = render
+        self.__on_overflow = on_overflow
+        self.size_limit = size_limit or max_queue()
+        self.lag_limit = lag_limit or max_lag()
+        self.__frames: deque[_Frame] = deque()
+        self.__writing = False
+        self.__task: Optional[asyncio.Task] = None
+        self.closed = False
+        # May be shared by every queue of a server for totals
+        self.stats = stats or QueueStats()
+
+    @property
+    def depth(self) -> int:
+        """Frames waiting or being written."""
+        return len(self.__frames) + self.__writing
+
+    @property
+    def behind(self) -> bool:
+        return self.depth > 0
+
+    @property
+    def holds_update(self) -> bool:
+        """A deferred template update waits to be rendered."""
+        return any(frame.data is not None for frame in self.__frames)
+
+    @property
+    def lag(self) -> float:
+        """Seconds the oldest waiting frame has waited."""
+        if not self.__frames:
+            return 0.0
+        return asyncio.get_running_loop().time() - self.__frames[0].enqueued
+
+    def put(self, message: Message, opcode: int = 1) -> asyncio.Future:
+        """Queue a rendered frame; the future resolves to whether it was written."""
+        return self.__enqueue(_Frame(enqueued=self.__now(), message=message, opcode=opcode))
+
+    def put_update(self, data: dict[str, Any]) -> asyncio.Future:
+        """Queue a template update, merged into a deferred one at the tail if there is one."""
+        tail = self.__frames[-1] if self.__frames else None
+        if tail is not None and tail.data is not None and not self.closed:
+            tail.data.update(data)
+            self.stats.collapsed += 1
+            future = asyncio.get_running_loop().create_future()
+            tail.futures.append(future)
+            return future
+        return self.__enqueue(_Frame(enqueued=self.__now(), data=dict(data)))
+
+    def close(self):
+        """Discard waiting frames and stop the writer."""
+        self.closed = True
+        while self.__frames:
+            self.__resolve(self.__frames.popleft(), False)
+        if self.__task is not None and self.__task is not asyncio.current_task():
+            self.__task.cancel()
+
+    async def join(self):
+        if self.__task is not None:
+            await asyncio.gather(self.__task, return_exceptions=True)
+
+    @staticmethod
+    def __now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def __enqueue(self, frame: _Frame) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        frame.futures.append(future)
+        if self.closed:
+            self.__resolve(frame, False)
+            return future
+
+        self.__frames.append(frame)
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.depth)
+
+        if self.depth > self.size_limit:
+            self.__overflow(f'{self.depth} frames queued')
+        elif self.lag > self.lag_limit:
+            self.__overflow(f'{self.lag:.1f}s behind')
+        elif self.__task is None or self.__task.done():
+            self.__task = asyncio.get_running_loop().create_task(self.__run())
+        return future
+
+    def __overflow(self, reason: str):
+        self.stats.dropped += 1
+        self.close()
+        self.__on_overflow(reason)
+
+    @staticmethod
+    def __resolve(frame: _Frame, written: bool):
+        for future in frame.futures:
+            if not future.done():
+                future.set_result(written)
+
+    async def __run(self):
+        while self.__frames and not self.closed:
+            if self.lag > self.lag_limit:
+                self.__overflow(f'{self.lag:.1f}s behind')
+                return
+
+            frame = self.__frames.popleft()
+            self.__writing = True
+            written = False
+            try:
+                if frame.data is not None:
+                    rendered = await self.__render(frame.data)
+                    if rendered is None:
+                        continue
+                    frame.message, frame.opcode = rendered
+                written = await self.__write(frame.message, frame.opcode)
+            except Exception as e:
+                PrintLine(text=f'Failed to write queued frame: {e}', level='WARNING')
+            finally:
+                self.__writing = False
+                self.__resolve(frame, written)
+                if written:
+                    self.stats.written += 1
+                else:
+                    self.stats.failed += 1
+
+            if not written:
+                self.close()
+                return
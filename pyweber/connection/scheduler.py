@@ -0,0 +1,170 @@
+"""Per-session coalescing of outbound updates.
+
+``e.update()`` inside a loop used to compute one diff and send one frame per
+call. ``UpdateScheduler`` instead keeps at most one pending update per session
+(or per route for broadcasts): the first request arms a timer of
+``update_window`` seconds, later requests in the window are merged into it and
+a single ``send_message`` goes out when it fires. ``flush`` delivers the pending
+update right away. Updates whose template is inside ``Template.batch()`` are
+held until the batch closes.
+
+The window comes from ``[websocket] update_window_ms`` (env
+``PYWEBER_WS_UPDATE_WINDOW_MS``), default 16 ms — one animation frame. ``0``
+sends every update immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from pyweber.utils.utils import PrintLine
+
+DEFAULT_UPDATE_WINDOW_MS = 16
+
+def update_window() -> float:
+    """Coalescing window in seconds."""
+    from pyweber.config.config import config
+
+    value = os.environ.get('PYWEBER_WS_UPDATE_WINDOW_MS')
+    if value is None:
+        value = config.get('websocket', 'update_window_ms', default=DEFAULT_UPDATE_WINDOW_MS)
+    try:
+        return max(float(value), 0.0) / 1000
+    except (TypeError, ValueError):
+        return DEFAULT_UPDATE_WINDOW_MS / 1000
+
+@dataclass
+class _Pending:
+    data: dict[str, Any]
+    session_id: Optional[str]
+    route: Optional[str]
+    handle: Optional[asyncio.TimerHandle] = None
+
+@dataclass
+class SchedulerStats:
+    requested: int = 0
+    sent: int = 0
+    coalesced: int = 0
+    flushed: int = 0
+    held: int = 0
+
+class UpdateScheduler:
+    def __init__(
+        self,
+        send: Callable[..., Awaitable[Any]],
+        window: Optional[float] = None,
+    ):
+        self.__send = send
+        self.__window = window
+        self.__pending: dict[tuple, _Pending] = {}
+        self.__tasks: set[asyncio.Task] = set()
+        self.stats = SchedulerStats()
+
+    @property
+    def window(self) -> float:
+        return update_window() if self.__window is None else self.__window
+
+    @window.setter
+    def window(self, value: Optional[float]):
+        self.__window = value
+
+    @staticmethod
+    def _key(session_id: Optional[str], route: Optional[str]) -> tuple:
+        return (session_id, None) if session_id else (None, route)
+
+    def pending(self, session_id: Optional[str] = None, route: Optional[str] = None) -> bool:
+        return self._key(session_id, route) in self.__pending
+
+    async def request(self, data: dict[str, Any], session_id: Optional[str], route: Optional[str] = None):
+        """Queue ``data`` for ``session_id`` (or every session on ``route``)."""
+        self.stats.requested += 1
+        window = self.window
+
+        key = self._key(session_id, route)
+        pending = self.__pending.get(key)
+        if pending is not None:
+            pending.data.update(data)
+            self.stats.coalesced += 1
+            return
+
+        if window <= 0:
+            await self.__deliver(_Pending(data=dict(data), session_id=session_id, route=route))
+            return
+
+        pending = _Pending(data=dict(data), session_id=session_id, route=route)
+        pending.handle = asyncio.get_running_loop().call_later(window, self.__fire, key)
+        self.__pending[key] = pending
+
+    async def flush(
+        self,
+        session_id: Optional[str],
+        route: Optional[str] = None,
+        data: Optional[dict[str, Any]] = None,
+    ):
+        """Send the pending update (merged with ``data``) now instead of at the end of the window."""
+        pending = self.__pending.pop(self._key(session_id, route), None)
+        if pending is not None and pending.handle is not None:
+            pending.handle.cancel()
+
+        if pending is None:
+            if not data:
+                return
+            pending = _Pending(data={}, session_id=session_id, route=route)
+        pending.data.update(data or {})
+
+        self.stats.flushed += 1
+        await self.__deliver(pending)
+
+    async def flush_all(self):
+        for session_id, route in list(self.__pending):
+            await self.flush(session_id, route)
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+
+    def cancel(self, session_id: str):
+        """Drop the pending update of a closed session."""
+        pending = self.__pending.pop(self._key(session_id, None), None)
+        if pending is not None and pending.handle is not None:
+            pending.handle.cancel()
+
+    def __fire(self, key: tuple):
+        pending = self.__pending.pop(key, None)
+        if pending is None:
+            return
+        task = asyncio.get_running_loop().create_task(self.__deliver(pending))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    def __hold_for_batch(self, pending: _Pending) -> bool:
+        after_batch = getattr(pending.data.get('template'), 'after_batch', None)
+        if not callable(after_batch):
+            return False
+
+        key = self._key(pending.session_id, pending.route)
+        loop = asyncio.get_running_loop()
+
+        def release():
+            try:
+                loop.call_soon_threadsafe(self.__fire, key)
+            except RuntimeError:
+                pass    # loop already closed
+
+        if not after_batch(release):
+            return False
+        held = self.__pending.setdefault(key, pending)
+        if held is not pending:
+            held.data.update(pending.data)
+        self.stats.held += 1
+        return True
+
+    async def __deliver(self, pending: _Pending):
+        if self.__hold_for_batch(pending):
+            return
+        self.stats.sent += 1
+        try:
+            await self.__send(data=pending.data, session_id=pending.session_id, route=pending.route)
+        except Exception as e:
+            PrintLine(text=f'Failed to deliver update to {pending.session_id or pending.route}: {e}', level='WARNING')
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections import OrderedDict
+from functools import partial
 from time import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Optional
 
 if TYPE_CHECKING:
     from pyweber.core.template import Template
@@ -20,18 +22,47 @@ class Session:
         self.window = window
         self.session_id = session_id
         self.create_at = time()
+        # Last client activity; idle sessions are evicted by the SessionSweeper
+        self.last_active = self.create_at
+        # Set by SessionManager.add_session to keep its route index current
+        self._route_listener: Optional[Callable[[Session, Optional[str]], None]] = None
         self.current_route = current_route
+        # Protocol features announced by the client (e.g. ``patch``)
+        self.features: frozenset[str] = frozenset()
         # Must be a distinct snapshot for TemplateDiff; aliasing template makes
         # every e.update() produce an empty diff (mutations visible on both sides).
         try:
-            self.old_template = template.clone()
+            self.old_template = template.snapshot()
         except Exception:
             self.old_template = None
 
+    def touch(self):
+        self.last_active = time()
+
+    @property
+    def current_route(self) -> str:
+        return self.__current_route
+
+    @current_route.setter
+    def current_route(self, route: str):
+        previous = getattr(self, '_Session__current_route', None)
+        self.__current_route = route
+        listener = getattr(self, '_route_listener', None)
+        if listener is not None and previous != route:
+            listener(self, previous)
+
+
+# Evicted ids remembered to count resurrections
+EVICTED_MEMORY = 10_000
 
 class SessionManager:
     def __init__(self):
         self.__sessions: dict[str, Session] = {}
+        # route -> ids of the sessions currently on it
+        self.__routes: dict[str, set[str]] = {}
+        self.__evicted: OrderedDict[str, None] = OrderedDict()
+        self.evicted = 0
+        self.resurrected = 0
         self._store_configured = False
 
     def _ensure_store(self):
@@ -58,19 +89,77 @@ class SessionManager:
 
     def add_session(self, session_id: str, session: Session):
         assert isinstance(session, Session)
-        self.sessions[session_id] = session
+        self.__track(session_id, session)
         self._schedule_persist(session)
 
+    def session_ids_on_route(self, route: str) -> list[str]:
+        """Ids of the sessions whose ``current_route`` is ``route``, without scanning all sessions."""
+        return [
+            session_id for session_id in list(self.__routes.get(route, ()))
+            if (session := self.sessions.get(session_id)) is not None and session.current_route == route
+        ]
+
+    def __track(self, session_id: str, session: Session):
+        previous = self.sessions.get(session_id)
+        if previous is not None and previous is not session:
+            self.__untrack_route(session_id, previous.current_route)
+        self.sessions[session_id] = session
+        self.__routes.setdefault(session.current_route, set()).add(session_id)
+        session._route_listener = partial(self.__route_changed, session_id)
+        if session_id in self.__evicted:
+            del self.__evicted[session_id]
+            self.resurrected += 1
+
+    def __route_changed(self, session_id: str, session: Session, previous: Optional[str]):
+        if self.sessions.get(session_id) is not session:
+            return
+        self.__untrack_route(session_id, previous)
+        self.__routes.setdefault(session.current_route, set()).add(session_id)
+
+    def __untrack_route(self, session_id: str, route: Optional[str]):
+        ids = self.__routes.get(route)
+        if ids is not None:
+            ids.discard(session_id)
+            if not ids:
+                del self.__routes[route]
+
     def remove_session(self, session_id: str):
+        self.__release(session_id)
+        # An evicted session keeps its stored snapshot until it comes back or expires
+        if session_id not in self.__evicted:
+            self._schedule_delete(session_id)
+
+    def evict(self, session_id: str) -> bool:
+        """Drop an idle session from memory, keeping its stored snapshot."""
+        if not self.__release(session_id):
+            return False
+        self.evicted += 1
+        self.__evicted[session_id] = None
+        self.__evicted.move_to_end(session_id)
+        while len(self.__evicted) > EVICTED_MEMORY:
+            self.__evicted.popitem(last=False)
+        return True
+
+    def was_evicted(self, session_id: str) -> bool:
+        return session_id in self.__evicted
+
+    def __release(self, session_id: str) -> bool:
         session = self.sessions.pop(session_id, None)
-        if session is not None:
-            try:
-                from pyweber.core.events import cleanup_template_events
-                cleanup_template_events(getattr(session, 'template', None))
-                cleanup_template_events(getattr(session, 'old_template', None))
-            except Exception as exc:
-                logger.debug('EventBook cleanup skipped: %s', exc)
-        self._schedule_delete(session_id)
+        if session is None:
+            return False
+        session._route_listener = None
+        self.__untrack_route(session_id, session.current_route)
+        try:
+            from pyweber.core.events import collect_element_uuids, unregister_events_for_uuids
+            # ``old_template`` mostly shares uuids with ``template``; clean each once
+            uuids = set()
+            for template in (getattr(session, 'template', None), getattr(session, 'old_template', None)):
+                if template is not None:
+                    uuids |= collect_element_uuids(getattr(template, 'root', template))
+            unregister_events_for_uuids(uuids)
+        except Exception as exc:
+            logger.debug('EventBook cleanup skipped: %s', exc)
+        return True
 
     def get_session(self, session_id: str):
         return self.sessions.get(session_id, None)
@@ -88,7 +177,7 @@ class SessionManager:
         if snapshot is None:
             return None
         session = snapshot.to_session()
-        self.sessions[session_id] = session
+        self.__track(session_id, session)
         return session
 
     async def apersist(self, session: Session) -> None:
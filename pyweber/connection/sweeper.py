@@ -0,0 +1,173 @@
+"""Background eviction of idle reactive sessions and stale handoffs.
+
+Sessions used to leave memory only when their socket closed cleanly, and
+every served page parked its ``Template`` in the handoff registry for
+``handoff_ttl`` seconds even if no WebSocket ever came (bots, prefetches).
+``SessionSweeper`` runs every ``sweep_interval`` seconds and
+
+- drops expired handoff entries
+- evicts sessions without client activity for ``idle_ttl`` seconds; every
+  inbound frame counts as activity (pongs included), and sessions that still
+  have a live connection are kept unless ``idle_evict_connected`` is on
+- evicts the least recently active sessions while the estimated memory of
+  all sessions exceeds ``memory_budget_mb``
+
+Eviction closes the session's connection and keeps its stored snapshot. The
+bundled client reconnects with its DOM hashes, which recreates the session;
+``sessions.resurrected`` counts those. Settings live in ``[session]`` (env
+``PYWEBER_SESSION_IDLE_TTL``, ``PYWEBER_SESSION_MEMORY_BUDGET_MB``,
+``PYWEBER_SESSION_SWEEP_INTERVAL``, ``PYWEBER_SESSION_IDLE_EVICT_CONNECTED``);
+``0`` disables a limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from time import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from pyweber.connection.session import Session, sessions
+from pyweber.utils.utils import PrintLine
+
+if TYPE_CHECKING:
+    from pyweber.connection.session import SessionManager
+
+DEFAULT_IDLE_TTL = 1800.0
+DEFAULT_MEMORY_BUDGET_MB = 0.0
+DEFAULT_SWEEP_INTERVAL = 30.0
+# Rough cost of one element: the live node plus its share of the diff snapshot
+ELEMENT_BYTES = 2048
+
+def _setting(env: str, key: str, default: float) -> float:
+    from pyweber.config.config import config
+
+    value = os.environ.get(env)
+    if value is None:
+        value = config.get('session', key, default=default)
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+def idle_ttl() -> float:
+    return _setting('PYWEBER_SESSION_IDLE_TTL', 'idle_ttl', DEFAULT_IDLE_TTL)
+
+def idle_evict_connected() -> bool:
+    """Whether idle eviction also closes sessions that still have a connection."""
+    from pyweber.config.config import config
+
+    value = os.environ.get('PYWEBER_SESSION_IDLE_EVICT_CONNECTED')
+    if value is None:
+        value = config.get('session', 'idle_evict_connected', default=False)
+    if isinstance(value, str):
+        return value.strip().lower() in {'1', 'true', 'yes', 'on'}
+    return bool(value)
+
+def memory_budget() -> int:
+    """Budget for all sessions in bytes (``0`` = unlimited)."""
+    return int(_setting('PYWEBER_SESSION_MEMORY_BUDGET_MB', 'memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024)
+
+def sweep_interval() -> float:
+    return _setting('PYWEBER_SESSION_SWEEP_INTERVAL', 'sweep_interval', DEFAULT_SWEEP_INTERVAL)
+
+def session_cost(session: Session) -> int:
+    """Estimated bytes held by ``session`` (element count × ``ELEMENT_BYTES``)."""
+    template = getattr(session, 'template', None)
+    try:
+        return max(len(template.index), 1) * ELEMENT_BYTES
+    except Exception:
+        return ELEMENT_BYTES
+
+@dataclass
+class SweepStats:
+    sweeps: int = 0
+    idle_evicted: int = 0
+    budget_evicted: int = 0
+    handoffs_expired: int = 0
+
+class SessionSweeper:
+    def __init__(
+        self,
+        evict: Callable[[str], Awaitable[object]],
+        manager: Optional['SessionManager'] = None,
+        interval: Optional[float] = None,
+        connected: Optional[Callable[[str], bool]] = None,
+    ):
+        self.__evict = evict
+        self.__connected = connected or (lambda session_id: False)
+        self.__manager = manager or sessions
+        self.__interval = interval
+        self.__task: Optional[asyncio.Task] = None
+        self.stats = SweepStats()
+
+    @property
+    def running(self) -> bool:
+        return self.__task is not None and not self.__task.done()
+
+    def start(self):
+        """Start sweeping on the running loop (no-op if already running or disabled)."""
+        interval = self.__interval if self.__interval is not None else sweep_interval()
+        loop = asyncio.get_running_loop()
+        if interval <= 0 or (self.running and self.__task.get_loop() is loop):
+            return
+        self.__task = loop.create_task(self.__run(interval))
+
+    def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    async def sweep(self, now: Optional[float] = None) -> list[str]:
+        """One pass; returns the evicted session ids."""
+        from pyweber.models.handoff import handoff_registry
+
+        now = time() if now is None else now
+        self.stats.sweeps += 1
+        self.stats.handoffs_expired += handoff_registry.sweep()
+
+        evicted = []
+        ttl = idle_ttl()
+        by_activity = sorted(self.__manager.sessions.items(), key=lambda item: item[1].last_active)
+
+        if ttl > 0:
+            # A page that only receives pushes sends nothing but pongs, so a
+            # live connection is kept by default
+            keep_connected = not idle_evict_connected()
+            idle = [
+                session_id for session_id, session in by_activity
+                if now - session.last_active > ttl
+                and not (keep_connected and self.__connected(session_id))
+            ]
+            evicted.extend(idle)
+            self.stats.idle_evicted += len(idle)
+            idle_ids = set(idle)
+            by_activity = [item for item in by_activity if item[0] not in idle_ids]
+
+        budget = memory_budget()
+        if budget > 0:
+            costs = [session_cost(session) for _, session in by_activity]
+            total = sum(costs)
+            index = 0
+            # Keep the most recently active session even if it alone exceeds the budget
+            while total > budget and index < len(by_activity) - 1:
+                evicted.append(by_activity[index][0])
+                total -= costs[index]
+                index += 1
+                self.stats.budget_evicted += 1
+
+        for session_id in evicted:
+            try:
+                await self.__evict(session_id)
+            except Exception as e:
+                PrintLine(text=f'Failed to evict session {session_id}: {e}', level='WARNING')
+        return evicted
+
+    async def __run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                PrintLine(text=f'Session sweep failed: {e}', level='WARNING')
@@ -1,4 +1,6 @@
+import os
 import gzip
+import zlib
 import json
 import inspect
 import asyncio
@@ -7,8 +9,9 @@ import base64
 import socket
 import ssl
 from uuid import uuid4
+from collections import deque
+from functools import partial
 from typing import Callable, TYPE_CHECKING, Any, Literal, Union
-from time import time
 
 from pyweber.models.ws_message import wsMessage
 from pyweber.utils.utils import PrintLine
@@ -19,6 +22,17 @@ from pyweber.utils.security import (
 )
 from pyweber.connection.session import sessions, Session
 from pyweber.models.template_diff import TemplateDiff
+from pyweber.models.template_patch import TemplatePatch
+from pyweber.models.snapshot import TemplateSnapshot, content_digest, template_digest
+from pyweber.models.wire import encode_message, negotiate
+from pyweber.models.client_state import ClientState
+from pyweber.models.file_stream import FILE_FRAME_CHUNK, decode_file_frame, encode_file_frame, file_chunk_manager
+from pyweber.models.event_policy import event_policy, latest_wins
+from pyweber.connection.deflate import PerMessageDeflate
+from pyweber.connection.event_gate import EventGate
+from pyweber.connection.outbound import OutboundQueue, QueueStats
+from pyweber.connection.scheduler import UpdateScheduler
+from pyweber.connection.sweeper import SessionSweeper
 from pyweber.models.task_manager import TaskManager
 from pyweber.core.events import EventConstrutor
 from pyweber.models.context import set_current_window, reset_current_window
@@ -55,7 +69,7 @@ def _ws_message_is_actionable(message: dict) -> bool:
     was unknown — that dropped clicks, window responses, and handshakes that
     omit outerHTML (``includeTemplate: false``).
     """
-    if message.get('template'):
+    if message.get('template') or message.get('template_parts') or message.get('dom_hash'):
         return True
     if message.get('handoffToken'):
         return True
@@ -78,6 +92,10 @@ def event_is_running(message: wsMessage, task_manager: TaskManager) -> bool:
         if not callable(handler):
             return False
 
+        # Events with a policy are coalesced by the EventGate instead of dropped
+        if event_policy(element, message.type) is not None:
+            return False
+
         event_id = f'event_{id(handler)}'
 
         if event_id in task_manager.active_handlers_async[message.session_id]:
@@ -85,9 +103,35 @@ def event_is_running(message: wsMessage, task_manager: TaskManager) -> bool:
 
     return False
 
+DEFAULT_SEND_TIMEOUT = 5.0
+# Asks the browser to send its full form/window state with the next message
+STATE_RESET = json.dumps({'stateReset': True}).encode('utf-8')
+
+def send_timeout() -> float:
+    """Seconds one connection may take to accept a message before it is dropped."""
+    from pyweber.config.config import config
+
+    value = os.environ.get('PYWEBER_WS_SEND_TIMEOUT')
+    if value is None:
+        value = config.get('websocket', 'send_timeout', default=DEFAULT_SEND_TIMEOUT)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_SEND_TIMEOUT
+    return value if value > 0 else DEFAULT_SEND_TIMEOUT
+
 class WebsocketUpgrade:
     def __init__(self, headers: bytes):
         self.headers = headers.decode('iso-8859-1')
+        self.deflate = PerMessageDeflate.negotiate(self.header('sec-websocket-extensions'))
+
+    def header(self, name: str) -> str | None:
+        """Comma-joined value of every ``name`` header line (case-insensitive)."""
+        values = [
+            value.strip() for key, sep, value in (line.partition(':') for line in self.headers.splitlines())
+            if sep and key.strip().lower() == name
+        ]
+        return ', '.join(values) or None
 
     @property
     def websocket_guid(self) -> str: return '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
@@ -113,40 +157,88 @@ class WebsocketUpgrade:
             'HTTP/1.1 101 Switching Protocols\r\n'
             'Upgrade: websocket\r\n'
             'Connection: Upgrade\r\n'
-            f'Sec-WebSocket-Accept: {self.server_accept_key}\r\n\r\n'
+            f'Sec-WebSocket-Accept: {self.server_accept_key}\r\n'
+            + (f'Sec-WebSocket-Extensions: {self.deflate.response_header}\r\n' if self.deflate else '')
+            + '\r\n'
         )
 
+_CLOSED = object()
+
+def unmask(payload: bytes, masking_key: bytes) -> bytes:
+    """XOR ``payload`` with the repeating 4-byte client mask as one big integer."""
+    length = len(payload)
+    if not length:
+        return b''
+    key = memoryview(masking_key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')).to_bytes(length, 'little')
+
 class WebsocketServer:
+    """One WebSocket connection served on the shared event loop.
+
+    Reads wait for readability with ``loop.add_reader`` / ``add_writer``
+    instead of polling, and reassembled messages go through an
+    ``asyncio.Queue`` that ``async for message in server`` awaits directly.
+    """
+
+    ping_interval: float = 30.0
+    idle_timeout: float = 60 * 60
 
-    def __init__(self, client: Union[socket.socket, ssl.SSLSocket], cookies: dict[str, str] | None = None):
+    def __init__(
+        self,
+        client: Union[socket.socket, ssl.SSLSocket],
+        cookies: dict[str, str] | None = None,
+        deflate: PerMessageDeflate | None = None,
+    ):
         self.id = None
         self.client = client
         self.cookies = cookies or {}
+        self.deflate = deflate
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.__rsv1 = False
         self.__all_message: bytes = b''
-        self.__messages: list[bytes] = []
+        self.__messages: asyncio.Queue = asyncio.Queue()
+        self.__send_lock = asyncio.Lock()
+        self.__nonblocking = False
 
     def __iter__(self):
         return self
 
-    async def __aiter__(self):
-        while True:
-            while not self.__messages:
-                await asyncio.sleep(0.01)
-            yield self.__messages.pop(0)
+    def __aiter__(self):
+        return self
 
     def __next__(self):
         try:
-            return self.__messages.pop(0)
-        except IndexError:
+            message = self.__messages.get_nowait()
+        except asyncio.QueueEmpty:
             raise StopIteration
+        if message is _CLOSED:
+            self.__messages.put_nowait(_CLOSED)
+            raise StopIteration
+        return message
 
     async def __anext__(self):
-        return self.__next__()
-
-    async def send(self, message: bytes, opcode: int = 1):
-        assert isinstance(message, bytes)
-        frame = await self.frame_to_send(message, opcode)
-        self.client.sendall(frame)
+        message = await self.__messages.get()
+        if message is _CLOSED:
+            self.__messages.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+        return message
+
+    def feed(self, message: Union[str, bytes]):
+        """Queue one reassembled inbound message for the consumer."""
+        self.__messages.put_nowait(message)
+
+    async def send(self, message: Union[str, bytes], opcode: int = 1):
+        assert isinstance(message, (str, bytes))
+        # Compression shares one deflate context, so a frame must be built and
+        # written under the same lock or a cancelled sender desyncs the client
+        async with self.__send_lock:
+            await self.write_all(await self.frame_to_send(message, opcode))
+
+    def touch(self):
+        """Mark the bound session active; called for every inbound frame, pongs included."""
+        session = sessions.get_session(session_id=self.id) if self.id else None
+        if session is not None:
+            session.touch()
 
     async def close(self):
         try:
@@ -154,12 +246,30 @@ class WebsocketServer:
         except Exception:
             pass
 
+    def __set_nonblocking(self):
+        if not self.__nonblocking:
+            self.client.setblocking(False)
+            self.__nonblocking = True
+
+    async def __wait_for(self, writable: bool = False):
+        """Suspend until the socket is readable (or writable) — no polling."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        fileno = self.client.fileno()
+        add, remove = (loop.add_writer, loop.remove_writer) if writable else (loop.add_reader, loop.remove_reader)
+
+        add(fileno, lambda: future.done() or future.set_result(None))
+        try:
+            await future
+        finally:
+            remove(fileno)
+
     async def read_exact(self, length: int) -> bytes:
         if length == 0:
             return b''
 
-        data = b''
-        self.client.setblocking(False)
+        data = bytearray()
+        self.__set_nonblocking()
         while len(data) < length:
             try:
                 chunk = self.client.recv(length - len(data))
@@ -167,42 +277,79 @@ class WebsocketServer:
                     raise ConnectionError(f'Connection {self.id} closed')
                 data += chunk
             except (ssl.SSLWantReadError, BlockingIOError):
-                await asyncio.sleep(0.01)
+                await self.__wait_for()
+            except ssl.SSLWantWriteError:
+                await self.__wait_for(writable=True)
+            except OSError as e:
+                raise ConnectionError(f'Connection {self.id} closed: {e}')
+        return bytes(data)
+
+    async def write_all(self, data: bytes):
+        """``sendall`` for a non-blocking socket, yielding to the loop on backpressure."""
+        self.__set_nonblocking()
+        view = memoryview(data)
+        while view:
+            try:
+                sent = self.client.send(view)
+                view = view[sent:]
+            except (ssl.SSLWantWriteError, BlockingIOError):
+                await self.__wait_for(writable=True)
+            except ssl.SSLWantReadError:
+                await self.__wait_for()
             except OSError as e:
                 raise ConnectionError(f'Connection {self.id} closed: {e}')
-        return data
+
+    async def __keepalive(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await self.send(b'', opcode=9)
 
     async def manage_connection(self, message_handler: Callable):
-        last_ping = time()
-        ping_interval = 30.0
         current_opcode = None
+        compressed = False
         is_coro = inspect.iscoroutinefunction(message_handler)
-        timeout = 60 * 60
         consumer_task: asyncio.Task | None = None
+        self.loop = asyncio.get_running_loop()
+        keepalive_task = asyncio.create_task(self.__keepalive())
 
         try:
             while True:
                 try:
                     opcode, message, fin = await asyncio.wait_for(
-                        self.receive_frame(), timeout=timeout
+                        self.receive_frame(), timeout=self.idle_timeout
                     )
 
                     if opcode is None:
                         break
+                    self.touch()
+
+                    # Control frames may arrive between fragments of a message
+                    if opcode == 8:
+                        break
+                    if opcode == 9:
+                        await self.send(message, opcode=10)
+                        continue
+                    if opcode == 10:
+                        continue
 
                     if opcode != 0:
                         current_opcode = opcode
+                        if opcode in [1, 2]:
+                            compressed = self.__rsv1
 
                     self.__all_message += message
 
                     if fin:
                         if current_opcode in [1, 2]:
+                            if compressed and self.deflate is not None:
+                                self.__all_message = self.deflate.decompress(self.__all_message)
+                                compressed = False
                             decoded = (
                                 self.__all_message.decode('utf-8')
                                 if current_opcode == 1
                                 else self.__all_message
                             )
-                            self.__messages.append(decoded)
+                            self.feed(decoded)
                             self.__all_message = b''
 
                             # One long-lived consumer (async for). Spawning a
@@ -215,21 +362,8 @@ class WebsocketServer:
                                     )
                                 else:
                                     message_handler(self)
-
-                        elif current_opcode == 8:
-                            break
-
-                        elif current_opcode == 9:
-                            await self.send(b'', opcode=9)
-
-                        elif current_opcode == 10:
-                            pass
-
-                    if time() - last_ping >= ping_interval:
-                        await self.send(b'', opcode=9)
-                        last_ping = time()
-
-                    await asyncio.sleep(0.01)
+                        else:
+                            self.__all_message = b''
 
                 except asyncio.TimeoutError:
                     PrintLine(f'Connection {self.id} timed out', level='WARNING')
@@ -238,17 +372,23 @@ class WebsocketServer:
                 except (ConnectionError, ConnectionResetError):
                     break
 
+                except (ValueError, zlib.error) as e:
+                    PrintLine(f'Connection {self.id} sent an invalid compressed message: {e}', level='WARNING')
+                    break
+
         except Exception as e:
             PrintLine(f'Unknown websocket error: {e}', level='ERROR')
             raise e
 
         finally:
-            if consumer_task is not None and not consumer_task.done():
-                consumer_task.cancel()
-                try:
-                    await consumer_task
-                except (asyncio.CancelledError, Exception):
-                    pass
+            self.feed(_CLOSED)
+            for task in (consumer_task, keepalive_task):
+                if task is not None and not task.done():
+                    task.cancel()
+                    try:
+                        await task
+                    except (asyncio.CancelledError, Exception):
+                        pass
             await self.close()
             PrintLine(text=f'Connection {self.id} closed.')
 
@@ -257,6 +397,7 @@ class WebsocketServer:
         header = await self.read_exact(2)
 
         fin = (header[0] & 0x80) >> 7
+        self.__rsv1 = bool(header[0] & 0x40)
         opcode = header[0] & 0x0F
         mask = (header[1] & 0x80) >> 7
         payload_len = header[1] & 0x7F
@@ -275,26 +416,30 @@ class WebsocketServer:
         masking_key = await self.read_exact(4)
         payload = await self.read_exact(payload_len)
 
-        unmasked_payload = bytearray(payload_len)
-
-        for i in range(payload_len):
-            unmasked_payload[i] = payload[i] ^ masking_key[i % 4]
-
-        return opcode, bytes(unmasked_payload), fin
-
-    async def frame_to_send(self, message: bytes, opcode: int = 1):
+        return opcode, unmask(payload, masking_key), fin
 
-        assert isinstance(message, bytes)
+    async def frame_to_send(self, message: Union[str, bytes], opcode: int = 1):
+        """Text is sent as given; binary payloads should pass ``opcode=2``.
 
-        if opcode == 1:
+        ``bytes`` with the default text opcode are still checked and sent as
+        binary when they are not UTF-8.
+        """
+        if isinstance(message, str):
+            message, opcode = message.encode('utf-8'), 1
+        elif opcode == 1:
             try:
                 message.decode('utf-8')
             except UnicodeDecodeError:
                 opcode = 2
 
+        rsv1 = 0
+        if self.deflate is not None and opcode in (1, 2) and self.deflate.should_compress(message):
+            message = self.deflate.compress(message)
+            rsv1 = 0x40
+
         payload_len = len(message)
         frame = bytearray()
-        frame.append(0x80 | opcode)
+        frame.append(0x80 | rsv1 | opcode)
 
         if payload_len <= 125:
             frame.append(payload_len)
@@ -311,15 +456,75 @@ class WebsocketServer:
 
         return bytes(frame)
 
+class ConnectionMap(dict):
+    """``session_id -> connection`` that also indexes connections by identity.
+
+    Used by ASGI disconnect cleanup to find the session of a ``send`` callable
+    without scanning every connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.__owners: dict[int, set[str]] = {}
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, session_id: str, connection: Any):
+        previous = self.get(session_id)
+        if previous is not None and previous is not connection:
+            self.__forget(session_id, previous)
+        super().__setitem__(session_id, connection)
+        if connection is not None:
+            self.__owners.setdefault(id(connection), set()).add(session_id)
+
+    def __delitem__(self, session_id: str):
+        connection = self[session_id]
+        super().__delitem__(session_id)
+        self.__forget(session_id, connection)
+
+    def pop(self, session_id: str, *default):
+        if session_id not in self:
+            return super().pop(session_id, *default)
+        connection = super().pop(session_id)
+        self.__forget(session_id, connection)
+        return connection
+
+    def update(self, *args, **kwargs):
+        for session_id, connection in dict(*args, **kwargs).items():
+            self[session_id] = connection
+
+    def clear(self):
+        super().clear()
+        self.__owners.clear()
+
+    def session_for(self, connection: Any) -> str | None:
+        """Session id currently bound to ``connection`` (by identity)."""
+        for session_id in self.__owners.get(id(connection), ()):
+            if self.get(session_id) is connection:
+                return session_id
+        return None
+
+    def __forget(self, session_id: str, connection: Any):
+        owners = self.__owners.get(id(connection))
+        if owners is not None:
+            owners.discard(session_id)
+            if not owners:
+                del self.__owners[id(connection)]
+
 class BaseWebsockets:
     def __init__(self, app: 'Pyweber', protocol: Literal['pyweber', 'uvicorn'] = 'pyweber'):
         self.protocol: Literal['pyweber', 'uvicorn'] = protocol
         self.task_manager = TaskManager()
-        self.ws_connections: dict[str, Union[WebsocketServer, Callable[..., Any]]] = {}
+        self.ws_connections: ConnectionMap = ConnectionMap()
         self._window_response_future: dict[str, asyncio.Future] = {}
         self._file_content_future: dict[str, asyncio.Future] = {}
         self.old_template: 'Template' = None
         self.app = app
+        # Late-bound so a replaced ``send_message`` is still the one used
+        self.updates = UpdateScheduler(send=lambda **kwargs: self.send_message(**kwargs))
+        self.event_gate = EventGate()
+        self.outbound_stats = QueueStats()
+        self.__outbound: dict[str, tuple[Any, OutboundQueue]] = {}
+        self.__closing: set[asyncio.Task] = set()
 
     @property
     def window_response(self): return self.__window_response
@@ -366,7 +571,18 @@ class BaseWebsockets:
                             handler = entry['event']
                             event_id = raw
 
-                    if handler and event_id:
+                    policy = event_policy(event_handler.current_target, message.type)
+                    if policy is not None and message.gated:
+                        # The client already waited; waiting again here would double the delay
+                        policy = latest_wins()
+                    if handler and event_id and policy is not None:
+                        self.event_gate.submit(
+                            session_id=message.session_id,
+                            event_id=event_id,
+                            policy=policy,
+                            run=partial(self._run_gated_handler, message, handler, event_id),
+                        )
+                    elif handler and event_id:
                         if inspect.iscoroutinefunction(handler):
                             if event_id not in self.task_manager.active_handlers_async.get(message.session_id, {}):
                                 await self.task_manager.create_task_async(
@@ -405,49 +621,268 @@ class BaseWebsockets:
         finally:
             reset_current_window(token)
 
+    async def _run_gated_handler(self, message: wsMessage, handler: Callable[..., Any], event_id: str):
+        """Run ``handler`` for ``message`` to completion; called by the ``EventGate``."""
+        if sessions.get_session(session_id=message.session_id) is None:
+            return
+
+        token = set_current_window(message.window)
+        try:
+            event_handler = self.event_handler(message)
+            if inspect.iscoroutinefunction(handler):
+                await self.task_manager.create_task_async(
+                    session_id=message.session_id,
+                    event_id=event_id,
+                    handler=handler,
+                    event_handler=event_handler
+                )
+            elif self.task_manager.create_task(
+                session_id=message.session_id,
+                event_id=event_id,
+                handler=handler,
+                event_handler=event_handler
+            ):
+                future = self.task_manager.active_handlers.get(message.session_id, {}).get(event_id)
+                if future is not None:
+                    await asyncio.wait([asyncio.wrap_future(future)])
+        except Exception:
+            pass    # already logged by the TaskManager
+        finally:
+            reset_current_window(token)
+
     async def data_to_json(self, data: Any, session_id: str, last_target: bool = False):
         if isinstance(data, dict):
             session = sessions.get_session(session_id=session_id)
             current_template: 'Template' = data.get('template', None)
 
             if current_template and session is not None:
-                data['template'] = await self.get_template_diff(
-                    session=session
-                )
+                if self.supports_patch(session):
+                    del data['template']
+                    data['patch'] = await self.get_template_patch(session=session)
+                else:
+                    data['template'] = await self.get_template_diff(
+                        session=session
+                    )
+
+            return encode_message(data, wire_format=self.wire_format(session))
 
         return json.dumps(data, ensure_ascii=False, indent=4)
 
     async def __send(self, data: Any, handler: Callable):
         await handler(data)
 
+    def target_connections(self, session_id: str | None, route: str | None = None) -> dict[str, Any]:
+        if session_id:
+            return {session_id: self.ws_connections.get(session_id)}
+        if route:
+            return {i: self.ws_connections.get(i) for i in sessions.session_ids_on_route(route)}
+        return dict(self.ws_connections)
+
+    def render_key(self, data: Any, session_id: str) -> tuple:
+        """Sessions with equal keys receive byte-identical messages for ``data``.
+
+        Template updates depend on the content of the session's template and
+        of its diff baseline, everything else only on the wire format. Clones
+        of a route template keep their uuids, so sessions on separate clones in
+        the same state share a key.
+        """
+        session = sessions.get_session(session_id=session_id)
+        wire_format = self.wire_format(session)
+        if session is None or not isinstance(data, dict) or data.get('template') is None:
+            return ('static', wire_format)
+
+        baseline = session.old_template
+        try:
+            current = template_digest(session.template.snapshot())
+        except Exception:
+            current = None
+        if current is None or not (baseline is None or isinstance(baseline, TemplateSnapshot)):
+            # Queued element methods or a legacy baseline: render on its own
+            return ('template', 'session', session_id, wire_format)
+        return (
+            'template', current, baseline and content_digest(baseline.root),
+            self.supports_patch(session), wire_format,
+        )
+
     async def send_message(self, data, session_id, route=None):
-        target_connections = {}
+        """Send ``data`` to one session, or broadcast it to a route / every session.
 
-        if session_id:
-            target_connections = {session_id: self.ws_connections.get(session_id)}
-        else:
-            if route:
-                target_connections = {
-                    i: conn for i, conn in self.ws_connections.items()
-                    if sessions.get_session(i) and sessions.get_session(i).current_route == route
-                }
+        A broadcast renders and encodes once per group of sessions sharing a
+        ``render_key`` and writes to all connections concurrently, each bounded
+        by ``send_timeout()``, so a slow client cannot hold up the others.
+        Template updates sent while the template is inside ``batch()`` are held
+        by the scheduler and go out when the batch closes.
+        """
+        if isinstance(data, dict) and getattr(data.get('template'), 'batching', False):
+            await self.updates.flush(session_id=session_id, route=route, data=data)
+            return
+
+        groups: dict[tuple, list[str]] = {}
+        deferred: list[str] = []
+        targets = {s_id: conn for s_id, conn in self.target_connections(session_id, route).items() if conn is not None}
+        for s_id, conn in targets.items():
+            if isinstance(data, dict) and data.get('template') is not None and self.outbound_queue(s_id, conn).behind:
+                # Rendered by the writer, together with later updates
+                deferred.append(s_id)
             else:
-                target_connections = dict(self.ws_connections)
+                groups.setdefault(self.render_key(data, s_id), []).append(s_id)
 
-        for s_id, handler in target_connections.items():
-            if handler is None:
-                continue
+        deliveries = [self.outbound_queue(s_id, targets[s_id]).put_update(data) for s_id in deferred]
+        for group_key, group in groups.items():
+            leader = group[0]
             try:
-                json_data = await self.data_to_json(
+                message = await self.data_to_json(
                     data={key: value for key, value in data.items()},
-                    session_id=s_id,
+                    session_id=leader,
                 )
-                if self.protocol == 'uvicorn':
-                    await self.__send({'type': 'websocket.send', 'text': json_data}, handler=handler)
-                else:
-                    await self.__send(json_data.encode('utf-8'), handler=handler.send)
             except Exception as e:
-                PrintLine(text=f"Failed to send to session {s_id}: {e}", level='WARNING')
+                PrintLine(text=f"Failed to send to session {leader}: {e}", level='WARNING')
+                continue
+
+            if group_key[0] == 'template':
+                self.share_baseline(leader, group[1:])
+            message, opcode = self.__frame(message)
+            deliveries.extend(self.outbound_queue(s_id, targets[s_id]).put(message, opcode) for s_id in group)
+
+        if deliveries:
+            await asyncio.gather(*deliveries)
+
+    async def send_file(
+        self,
+        data: bytes,
+        filename: str,
+        session_id: str,
+        content_type: str = 'application/octet-stream',
+        chunk_size: int = FILE_FRAME_CHUNK,
+        window: int = 4,
+    ) -> bool:
+        """Send ``data`` to the browser as a download, in binary file frames.
+
+        A ``download`` message announces the file, then the bytes follow as
+        raw frames (no JSON, no base64). At most ``window`` frames wait in the
+        session's send queue at a time. Returns whether every frame was written.
+        """
+        connection = self.ws_connections.get(session_id)
+        if connection is None:
+            return False
+
+        file_id = str(uuid4())
+        data = memoryview(bytes(data))
+        await self.send_message(
+            data={'download': {'file_id': file_id, 'name': filename, 'size': len(data), 'type': content_type}},
+            session_id=session_id,
+        )
+
+        queue = self.outbound_queue(session_id, connection)
+        pending: deque[asyncio.Future] = deque()
+        for offset in range(0, len(data), max(chunk_size, 1)):
+            if len(pending) >= window and not await pending.popleft():
+                return False
+            pending.append(queue.put(encode_file_frame(file_id, offset, data[offset:offset + chunk_size]), 2))
+        return all(await asyncio.gather(*pending))
+
+    async def send_state_reset(self, session_id: str | None, connection: Any) -> bool:
+        """Ask the client for a full state message, behind its queued frames.
+
+        Before the first message names a session nothing can be queued for
+        ``connection``, so the reply is written directly.
+        """
+        message, opcode = self.__frame(STATE_RESET.decode('utf-8'))
+        if session_id is None:
+            return await self.__write(connection, message, opcode, session_id=session_id)
+        return await self.outbound_queue(session_id, connection).put(message, opcode)
+
+    def outbound_queue(self, session_id: str, connection: Any) -> OutboundQueue:
+        """The send queue of ``session_id``'s current connection."""
+        current = self.__outbound.get(session_id)
+        if current is not None and current[0] is connection and not current[1].closed:
+            return current[1]
+        if current is not None:
+            current[1].close()
+
+        queue = OutboundQueue(
+            write=partial(self.__write, connection, session_id=session_id),
+            render=partial(self.__render_update, session_id),
+            on_overflow=partial(self.__drop_lagging, session_id, connection),
+            stats=self.outbound_stats,
+        )
+        self.__outbound[session_id] = (connection, queue)
+        return queue
+
+    def discard_outbound(self, session_id: str):
+        outbound = self.__outbound.pop(session_id, None)
+        if outbound is not None:
+            outbound[1].close()
+
+    def queue_depths(self) -> dict[str, int]:
+        """Frames waiting per session; totals are in ``outbound_stats``."""
+        return {session_id: queue.depth for session_id, (_, queue) in self.__outbound.items()}
+
+    def __frame(self, message: Union[str, bytes]) -> tuple[Union[str, bytes], int]:
+        opcode = 2 if isinstance(message, bytes) else 1
+        if self.protocol != 'uvicorn' and opcode == 1:
+            message = message.encode('utf-8')
+        return message, opcode
+
+    async def __render_update(self, session_id: str, data: dict[str, Any]):
+        try:
+            return self.__frame(await self.data_to_json(data=dict(data), session_id=session_id))
+        except Exception as e:
+            PrintLine(text=f"Failed to send to session {session_id}: {e}", level='WARNING')
+            return None
+
+    def __drop_lagging(self, session_id: str, connection: Any, reason: str):
+        PrintLine(text=f"Session {session_id} fell behind ({reason}); closing it", level='WARNING')
+        task = asyncio.get_running_loop().create_task(self.close_connection(connection))
+        self.__closing.add(task)
+        task.add_done_callback(self.__closing.discard)
+
+    async def close_connection(self, connection: Any):
+        """Close a built-in server connection or an ASGI ``send``."""
+        try:
+            if self.protocol == 'uvicorn':
+                await connection({'type': 'websocket.close', 'code': 1013})
+            else:
+                await connection.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def share_baseline(leader: str, followers: list[str]):
+        """Followers got the leader's patch, so their current tree becomes their baseline.
+
+        Sessions on the leader's own template take its snapshot; clones take
+        their own, since diffing relies on versions of the live nodes.
+        """
+        if not followers:
+            return
+        leader_session = sessions.get_session(session_id=leader)
+        for s_id in followers:
+            session = sessions.get_session(session_id=s_id)
+            if session.template is leader_session.template:
+                session.old_template = leader_session.old_template
+            else:
+                session.old_template = session.template.snapshot()
+
+    async def __write(self, handler: Any, message: Union[str, bytes], opcode: int, session_id: str) -> bool:
+        try:
+            if self.protocol == 'uvicorn':
+                key = 'bytes' if opcode == 2 else 'text'
+                send = self.__send({'type': 'websocket.send', key: message}, handler=handler)
+            elif opcode == 2:
+                send = handler.send(message, opcode=2)
+            else:
+                send = self.__send(message, handler=handler.send)
+            await asyncio.wait_for(send, timeout=send_timeout())
+            return True
+        except asyncio.TimeoutError:
+            PrintLine(text=f"Timed out sending to session {session_id}; closing it", level='WARNING')
+            # A frame may be half written, so the stream cannot be reused
+            if isinstance(handler, WebsocketServer):
+                await handler.close()
+        except Exception as e:
+            PrintLine(text=f"Failed to send to session {session_id}: {e}", level='WARNING')
+        return False
 
     # async def get_window_response(self, timeout: int):
     #     start_time = time.time()
@@ -547,37 +982,114 @@ class BaseWebsockets:
         if future and not future.done():
             future.set_result(response)
 
+    def receive_file_frame(self, message: Union[bytes, bytearray], session_id: str | None) -> bool:
+        """Hand a binary file chunk to the stream waiting for it; ``False`` if it is not one.
+
+        Chunks nobody waits for (a stream that stopped early) are dropped.
+        """
+        frame = decode_file_frame(message)
+        if frame is None:
+            return False
+        file_chunk_manager.deliver(frame, session_id=session_id)
+        return True
+
     async def get_template_diff(self, session: Session):
 
         diff = TemplateDiff()
 
         if session.old_template is None:
             try:
-                session.old_template = session.template.clone()
+                session.old_template = session.template.snapshot()
             except Exception:
                 # No baseline → empty diff rather than crashing the WS send path
                 return {}
 
+        old_template = session.old_template
         for tag in ['head', 'body']:
-            old_el = session.old_template.querySelector(tag)
+            if isinstance(old_template, TemplateSnapshot):
+                old_el = getattr(old_template, tag)
+            else:
+                old_el = old_template.querySelector(tag)
             new_el = session.template.querySelector(tag)
             if old_el is None or new_el is None:
                 continue
             diff.track_differences(
                 new_element=new_el,
                 old_element=old_el,
+                old_parent=new_el.parent.uuid if new_el.parent else None,
             )
 
         try:
-            session.old_template = session.template.clone()
+            session.old_template = session.template.snapshot()
         except Exception as exc:
-            PrintLine(text=f'template clone after diff failed: {exc}', level='ERROR')
+            PrintLine(text=f'template snapshot after diff failed: {exc}', level='ERROR')
 
         return diff.differences
 
+    def holds_baseline(self, session_id: str, template: 'Template') -> bool:
+        """Whether ``template`` has server changes the client has not received yet.
+
+        Inbound messages rebase the diff baseline onto the client's tree; doing
+        so now would drop those changes from the next diff. This is the case
+        while a ``batch()`` is open on it, while an update for the session
+        (or a broadcast to its route) waits in the scheduler's window and while
+        a deferred update waits in its send queue.
+        """
+        if getattr(template, 'batching', False):
+            return True
+        outbound = self.__outbound.get(session_id)
+        if outbound is not None and outbound[1].holds_update:
+            return True
+        session = sessions.get_session(session_id=session_id)
+        route = getattr(session, 'current_route', None)
+        return (
+            self.updates.pending(session_id=session_id)
+            or self.updates.pending(route=route)
+            or self.updates.pending()
+        )
+
+    @staticmethod
+    def supports_patch(session: Session) -> bool:
+        """Patch ops need a client that announced them and a snapshot baseline."""
+        old_template = session.old_template
+        return 'patch' in getattr(session, 'features', ()) and (
+            old_template is None or isinstance(old_template, TemplateSnapshot)
+        )
+
+    @staticmethod
+    def wire_format(session: Session | None) -> str:
+        """Encoding for messages to ``session`` (legacy JSON until it announces more)."""
+        return negotiate(getattr(session, 'features', ()))
+
+    async def get_template_patch(self, session: Session) -> list[dict[str, Any]]:
+        if session.old_template is None:
+            try:
+                session.old_template = session.template.snapshot()
+            except Exception:
+                return []
+
+        patch = TemplatePatch()
+        for tag in ['head', 'body']:
+            old_el = getattr(session.old_template, tag)
+            new_el = session.template.querySelector(tag)
+            if old_el is None or new_el is None:
+                continue
+            patch.track_patches(new_element=new_el, old_element=old_el)
+
+        try:
+            session.old_template = session.template.snapshot()
+        except Exception as exc:
+            PrintLine(text=f'template snapshot after patch failed: {exc}', level='ERROR')
+
+        return patch.operations
+
 class WebsocketManager(BaseWebsockets):
     def __init__(self, app: 'Pyweber', protocol: Literal['uvicorn', 'pyweber'] = 'pyweber'):
         super().__init__(app=app, protocol=protocol)
+        self.sweeper = SessionSweeper(
+            evict=self.evict_session,
+            connected=lambda session_id: self.ws_connections.get(session_id) is not None,
+        )
 
     def add_connection(self, connection: WebsocketServer):
         assert isinstance(connection, WebsocketServer)
@@ -603,6 +1115,11 @@ class WebsocketManager(BaseWebsockets):
 
     def send_all(self, message: bytes):
         for conn in list(self.ws_connections.values()):
+            conn_loop = getattr(conn, 'loop', None)
+            if isinstance(conn_loop, asyncio.AbstractEventLoop) and conn_loop.is_running():
+                # Connections live on the shared WS loop; never start a second one
+                asyncio.run_coroutine_threadsafe(conn.send(message=message), conn_loop)
+                continue
             try:
                 loop = asyncio.get_running_loop()
                 loop.create_task(conn.send(message=message))
@@ -682,6 +1199,7 @@ class WebsocketManager(BaseWebsockets):
         message.session_id = session_id
 
         sync_template = await self.get_sync_template(message=message)
+        features = message.get_value(key='features')
 
         if is_new:
             self.add_session(
@@ -700,7 +1218,7 @@ class WebsocketManager(BaseWebsockets):
             )
         else:
             self.ws_connections[session_id] = send_target
-            if message.get_value(key='template'):
+            if message.get_value(key='template') or message.get_value(key='template_parts'):
                 self.update_session(
                     session_id=session_id,
                     template=sync_template,
@@ -708,28 +1226,35 @@ class WebsocketManager(BaseWebsockets):
                     route=message.route,
                 )
                 session = sessions.get_session(session_id=session_id)
-                if session:
+                if session and not self.holds_baseline(session_id, sync_template):
                     try:
-                        session.old_template = sync_template.clone()
+                        session.old_template = sync_template.snapshot()
                     except Exception as exc:
                         PrintLine(
-                            text=f'template clone for diff failed: {exc}',
+                            text=f'template snapshot for diff failed: {exc}',
                             level='ERROR',
                         )
 
+        if isinstance(features, list):
+            session = sessions.get_session(session_id=session_id)
+            if session is not None:
+                session.features = frozenset(str(feature) for feature in features)
+
+        if message.dom_sync:
+            await self.send_message(data={'domSync': message.dom_sync}, session_id=session_id)
+
         return session_id, sync_template, is_new
 
     async def get_sync_template(self, message: wsMessage):
         assert isinstance(message, wsMessage)
         sync_template = await message.template
         session = sessions.get_session(session_id=message.session_id)
-        if session:
+        if session and not self.holds_baseline(message.session_id, sync_template):
             try:
-                session.old_template = sync_template.clone()
+                session.old_template = sync_template.snapshot()
             except Exception as exc:
-                # Never drop the WS event path because old_template clone failed
-                # (historically Form/Input attrs setters broke Element.clone).
-                PrintLine(text=f'template clone for diff failed: {exc}', level='ERROR')
+                # Never drop the WS event path because the old_template snapshot failed
+                PrintLine(text=f'template snapshot for diff failed: {exc}', level='ERROR')
                 # Do not alias template (that yields empty diffs after mutations).
                 if session.old_template is sync_template:
                     session.old_template = None
@@ -751,9 +1276,22 @@ class WebsocketManager(BaseWebsockets):
         session.template = template
         session.window = window
         session.current_route = route
+        session.touch()
+
+    async def evict_session(self, session_id: str):
+        """Free an idle session; the client reconnects and recreates it."""
+        if not sessions.evict(session_id):
+            return
+        connection = self.ws_connections.pop(session_id, None)
+        if connection is not None:
+            await self.close_connection(connection)
+        await self.clear_session(session_id)
 
     async def clear_session(self, session_id: str):
         sessions.remove_session(session_id=session_id)
+        self.updates.cancel(session_id)
+        self.event_gate.cancel(session_id)
+        self.discard_outbound(session_id)
 
         if session_id in self.ws_connections:
             conn = self.ws_connections.pop(session_id)
@@ -771,7 +1309,7 @@ class WebsocketManager(BaseWebsockets):
         except TypeError:
             pass
 
-    def process_ws_message_handler(self, message: Union[str, bytes]):
+    def process_ws_message_handler(self, message: Union[str, bytes], state: ClientState | None = None):
         try:
             if isinstance(message, bytes):
                 message = gzip.decompress(message).decode('utf-8')
@@ -781,6 +1319,10 @@ class WebsocketManager(BaseWebsockets):
             if not isinstance(message, dict):
                 return {}
 
+            # Merge before any filtering: every delta builds on the previous message
+            if state is not None and not state.apply(message):
+                message['stateReset'] = True
+
             # Require the JS contract keys (values may be null). Extra keys are
             # ignored — do not invert this into an allowlist over message.keys()
             # (that rejects nothing useful and confuses debugging).
@@ -800,59 +1342,86 @@ class WebsocketManager(BaseWebsockets):
             return message
         except Exception as e:
             PrintLine(text=f'Error to decode websocket message handler {e}', level='ERROR')
+            if state is not None:
+                state.synced = False    # the lost message may have carried a delta
             return {}
 
     async def ws_handler_wsgi(self, ws_server: WebsocketServer):
+        client_state = ClientState()
         async for message in ws_server:
-            raw_message = self.process_ws_message_handler(message=message)
+            if isinstance(message, bytes) and self.receive_file_frame(message, ws_server.id):
+                continue
 
-            if not raw_message:
+            raw_message = self.process_ws_message_handler(message=message, state=client_state)
+
+            if raw_message.pop('stateReset', False) or not client_state.synced:
+                client_state.hold(raw_message)
+                await self.send_state_reset(ws_server.id, ws_server)
                 continue
 
-            message = wsMessage(raw_message=raw_message, app=self.app, ws=self)
+            for raw_message in [*client_state.release(), raw_message]:
+                if not raw_message:
+                    continue
 
-            if message.file_content:
-                await self.set_file_content(message.file_content, message.file_content.get('file_id'))
+                message = wsMessage(raw_message=raw_message, app=self.app, ws=self)
 
-            if message.window_response:
-                await self.set_window_response(message.window_response, message.session_id)
+                if message.file_content:
+                    await self.set_file_content(message.file_content, message.file_content.get('file_id'))
 
-            session_id, sync_template, _is_new = await self._ensure_session_and_template(
-                message,
-                connection_id=ws_server.id,
-                cookies=getattr(ws_server, 'cookies', {}) or {},
-                send_target=ws_server,
-            )
-            ws_server.id = session_id
+                if message.window_response:
+                    await self.set_window_response(message.window_response, message.session_id)
 
-            if message.type and message.event_ref and not event_is_running(
-                message=message, task_manager=self.task_manager
-            ):
-                self.update_session(
-                    session_id=session_id,
-                    template=sync_template,
-                    window=message.window,
-                    route=message.route
+                session_id, sync_template, _is_new = await self._ensure_session_and_template(
+                    message,
+                    connection_id=ws_server.id,
+                    cookies=getattr(ws_server, 'cookies', {}) or {},
+                    send_target=ws_server,
                 )
-                await self.message_handler(message=message)
+                ws_server.id = session_id
+
+                if message.type and message.event_ref and not event_is_running(
+                    message=message, task_manager=self.task_manager
+                ):
+                    self.update_session(
+                        session_id=session_id,
+                        template=sync_template,
+                        window=message.window,
+                        route=message.route
+                    )
+                    await self.message_handler(message=message)
 
     async def ws_handler_asgi(self, receive: Callable, send: Callable, cookies: dict[str, str] | None = None):
         ws_connection: str = None
         handshake_cookies = cookies or {}
+        client_state = ClientState()
 
         try:
             while True:
                 raw_message = await receive()
+                session = sessions.get_session(session_id=ws_connection) if ws_connection else None
+                if session is not None:
+                    session.touch()
 
                 if raw_message.get('type') == 'websocket.connect':
                     await send({'type': 'websocket.accept'})
                 elif raw_message.get('type') == 'websocket.receive':
                     text = raw_message.get('text', raw_message.get('bytes', None))
 
+                    if isinstance(raw_message.get('bytes'), bytes) and self.receive_file_frame(raw_message['bytes'], ws_connection):
+                        continue
+
                     if text:
-                        raw_message = self.process_ws_message_handler(message=text)
+                        raw_message = self.process_ws_message_handler(message=text, state=client_state)
+
+                        if raw_message.pop('stateReset', False) or not client_state.synced:
+                            client_state.hold(raw_message)
+                            await self.send_state_reset(ws_connection, send)
+                            continue
+
+                        for raw_message in [*client_state.release(), raw_message]:
+                            if not raw_message:
+                                continue
 
-                        if raw_message:
                             message = wsMessage(raw_message=raw_message, app=self.app, ws=self)
 
                             if message.window_response:
@@ -890,6 +1459,7 @@ class WebsocketManager(BaseWebsockets):
             await self.clear_session(session_id=ws_connection)
 
     async def connect_wsgi(self, ws_connection: WebsocketServer):
+        self.sweeper.start()
         await ws_connection.manage_connection(self.ws_handler_wsgi)
         await self.clear_session(session_id=ws_connection.id)
 
@@ -905,10 +1475,10 @@ class WebsocketManager(BaseWebsockets):
             part.split('=', 1)[0].strip(): part.split('=', 1)[-1].strip()
             for part in cookie_header.split(';') if part.strip() and '=' in part
         }
+        self.sweeper.start()
         await self.ws_handler_asgi(receive=receive, send=send, cookies=cookies)
 
-        for id, handler in self.ws_connections.items():
-            if handler == send:
-                sessions.remove_session(session_id=id)
-                del self.ws_connections[id]
-                break
+        session_id = self.ws_connections.session_for(send)
+        if session_id is not None:
+            sessions.remove_session(session_id=session_id)
+            del self.ws_connections[session_id]
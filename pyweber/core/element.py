@@ -1,15 +1,25 @@
 import os
 import re
-from uuid import uuid4
-from typing import Union, Any, Literal
+from typing import Iterator, Union, Any, Literal
 from pyweber.utils.loads import LoadStaticFiles
 from pyweber.utils.types import HTMLTag, GetBy
+from pyweber.utils.ids import new_element_id
 from pyweber.models.file import File
+from pyweber.models.snapshot import mark_changed
+from pyweber.models.tracked import TrackedDict
 from pyweber.models.element import (
     ElementConstrutor,
     TemplateEvents,
     ChildElements
 )
+from pyweber.core.selector import (
+    SelectorSyntaxError,
+    compile_legacy_selector,
+    compile_query,
+    compile_selector,
+    query_seed,
+    select
+)
 from pyweber.core.html_parser import ParsedNode, parse_html
 
 SEARCH_MODE = Literal['exact', 'regex', 'contains', 'startswith', 'endswith']
@@ -47,7 +57,7 @@ class Element(ElementConstrutor):
             include_uuid=include_uuid,
             **kwargs
         )
-        self.uuid = getattr(self, 'uuid', None) or str(uuid4())
+        self.uuid = self.assigned_uuid() or new_element_id()
         self.data = data
         self.__element_methods: dict[str, dict[str, Any]] = {}
 
@@ -75,9 +85,36 @@ class Element(ElementConstrutor):
         if not isinstance(value, (list, ChildElements)):
             raise TypeError(f"Children must be a ChildElements instances, but got {type(value).__name__}")
 
+        previous = self.__dict__.get('_Element__childs')
         value = self.__render_dynamic_elements(childs=value)
 
+        if previous:
+            kept = {id(child) for child in value}
+            for child in previous:
+                if id(child) not in kept:
+                    previous._unregister_child(child)
+
         self.__childs = value
+        self.__sync_child_order(previous)
+        self._field_changed('childs')
+
+    def __sync_child_order(self, previous: ChildElements):
+        """Reassigning ``childs`` reorders placeholder-only content to match the new list."""
+        content = self.content
+        if not content or not previous:
+            return
+
+        order = [child.uuid for child in self.__childs]
+        known = set(order) | {child.uuid for child in previous}
+        keys = [key.strip() for key in re.findall(r'\{\{(.*?)\}\}', content)]
+
+        if keys == order or not all(key in known for key in keys):
+            return
+
+        if re.sub(r'\{\{(.*?)\}\}', '', content).strip():
+            return
+
+        self.content = ''.join('{{' + uuid + '}}' for uuid in order)
 
     @property
     def index(self) -> Union[int, None]:
@@ -144,9 +181,7 @@ class Element(ElementConstrutor):
         self.__set_element_methods(method='setSelectionRange', start=start, end=end)
 
     def getElement(self, by: GetBy, value: str, element: 'Element' = None, search_mode: SEARCH_MODE = 'exact') -> 'Element':
-        results = self.getElements(by=by, value=value, element=element, search_mode=search_mode)
-
-        return results[0] if results else None
+        return next(self.__iter_elements(by=by, value=value, element=element, search_mode=search_mode), None)
 
     def getElements(
         self,
@@ -155,109 +190,35 @@ class Element(ElementConstrutor):
         element: 'Element' = None,
         search_mode: SEARCH_MODE = 'exact'
     ) -> list['Element']:
-
-        def matches(target, val) -> bool:
-            if target is None: return False
-
-            # Lista (classes)
-            if isinstance(target, list):
-                search_classes = val.split()  # classes que o utilizador passou
-                match search_mode:
-                    case 'exact':      return set(search_classes) <= set(target)
-                    case 'regex':      return all(any(re.search(cls, t) for t in target) for cls in search_classes)
-                    case 'contains':   return all(any(cls in t for t in target) for cls in search_classes)
-                    case 'startswith': return all(any(t.startswith(cls) for t in target) for cls in search_classes)
-                    case 'endswith':   return all(any(t.endswith(cls) for t in target) for cls in search_classes)
-
-            # Dict (attrs, style)
-            if isinstance(target, dict):
-                conditions = [pair.strip() for pair in val.split(';') if pair.strip()]
-
-                match search_mode:
-                    case 'exact':
-                        for condition in conditions:
-                            key, _, v = condition.partition(':')
-                            if not v: key, _, v = condition.partition('=')
-                            if not v:
-                                if key.strip() not in target: return False
-                            elif target.get(key.strip()) != v.strip():
-                                return False
-                        return True
-
-                    case 'regex':
-                        return all(
-                            any(re.search(cond, k) or re.search(cond, str(v)) for k, v in target.items())
-                            for cond in conditions
-                        )
-                    case 'contains':
-                        return all(
-                            any(cond in k or cond in str(v) for k, v in target.items())
-                            for cond in conditions
-                        )
-                    case 'startswith':
-                        return all(
-                            any(k.startswith(cond) or str(v).startswith(cond) for k, v in target.items())
-                            for cond in conditions
-                        )
-                    case 'endswith':
-                        return all(
-                            any(k.endswith(cond) or str(v).endswith(cond) for k, v in target.items())
-                            for cond in conditions
-                        )
-
-            # String (id, tag, content, etc)
-            target = str(target)
-            match search_mode:
-                case 'exact':      return target == val
-                case 'regex':      return bool(re.search(val, target))
-                case 'contains':   return val in target
-                case 'startswith': return target.startswith(val)
-                case 'endswith':   return target.endswith(val)
-
-            return False
-
-        element = element or self
-        results: list['Element'] = []
-
-        if isinstance(by, GetBy):
-            by: str = by.value
-
-        if by == 'classes':
-            if matches(element.classes, value):
-                results.append(element)
-
-        elif by in ['attrs', 'style']:
-            if matches(getattr(element, by, {}), value):
-                results.append(element)
-
-        elif matches(getattr(element, by, None), value):
-            results.append(element)
-
-        if element.childs:
-            for child in element.childs:
-                results.extend(self.getElements(by=by, value=value, element=child, search_mode=search_mode))
-
-        return results
+        return list(self.__iter_elements(by=by, value=value, element=element, search_mode=search_mode))
 
     def querySelector(self, selector: str, element: 'Element' = None, search_mode: SEARCH_MODE = 'exact') -> 'Element':
-        results = self.querySelectorAll(selector=selector, element=element, search_mode=search_mode)
-        return results[0] if results else None
+        return next(self.__iter_selector(selector=selector, element=element, search_mode=search_mode), None)
 
     def querySelectorAll(self, selector: str, element: 'Element' = None, search_mode: SEARCH_MODE = 'exact') -> list['Element']:
-        element = element or self
+        return list(self.__iter_selector(selector=selector, element=element, search_mode=search_mode))
 
-        if selector.startswith('.'):
-            classes = ' '.join(selector.split('.')).strip()
-            return self.getElements(by=GetBy.classes, value=classes, element=element, search_mode=search_mode)
+    def __iter_elements(self, by: GetBy, value: str, element: 'Element', search_mode: SEARCH_MODE) -> Iterator['Element']:
+        if isinstance(by, GetBy):
+            by: str = by.value
 
-        elif selector.startswith('#'):
-            return self.getElements(by='id', value=selector[1:].strip(), element=element, search_mode=search_mode)
+        return select(
+            scope=element or self,
+            predicate=compile_query(by, value, search_mode),
+            seed=query_seed(by, value, search_mode)
+        )
 
-        elif selector.startswith('['):
-            sel = selector.removeprefix('[').removesuffix(']')
-            return self.getElements(by='attrs', value=sel, element=element, search_mode=search_mode)
+    def __iter_selector(self, selector: str, element: 'Element', search_mode: SEARCH_MODE) -> Iterator['Element']:
+        scope = element or self
 
-        return self.getElements(by='tag', value=selector.strip(), element=element, search_mode=search_mode)
+        if search_mode == 'exact':
+            try:
+                return compile_selector(selector.strip()).select(scope)
+            except SelectorSyntaxError:
+                # Legacy forms such as ``[a=1; b=2]`` / ``[key:value]``
+                pass
+
+        return select(scope=scope, predicate=compile_legacy_selector(selector, search_mode))
 
     @property
     def clone(self):
@@ -339,13 +300,18 @@ class Element(ElementConstrutor):
 
     def __set_element_methods(self, method: str, **kwargs):
         self.__element_methods[method] = kwargs
+        self._field_changed('methods')
 
     def remove_element_methods(self, method: Any = None):
-        if not method:
-            self.__element_methods.clear()
+        if not self.__element_methods:
             return
 
-        self.__element_methods.pop(method, None)
+        if not method:
+            self.__element_methods.clear()
+        else:
+            self.__element_methods.pop(method, None)
+        # Refresh the snapshot's ``calls`` flag, the own fields are unchanged
+        mark_changed(self, own=False)
 
     def __render_dynamic_elements(self, childs: ChildElements | list):
         new_childs: ChildElements = ChildElements(self)
@@ -483,7 +449,7 @@ class Element(ElementConstrutor):
     @staticmethod
     def _restore_cloned_attrs(cln: 'Element', attrs_data: dict) -> None:
         """Write attrs onto subclass private storage (``_Form__attrs``, etc.)."""
-        attrs_data = dict(attrs_data or {})
+        attrs_data = TrackedDict(attrs_data or {}, owner=cln, field='attrs')
         for klass in type(cln).__mro__:
             if klass is ElementConstrutor:
                 object.__setattr__(cln, '_ElementConstrutor__attrs', attrs_data)
@@ -1,5 +1,9 @@
+from enum import Enum
 from typing import TYPE_CHECKING, Callable, Any, Union
 import asyncio
+import weakref
+
+from pyweber.models.element_index import get_element_index, iter_subtree
 
 if TYPE_CHECKING:
     from pyweber.connection.websocket import WebsocketManager
@@ -7,6 +11,7 @@ if TYPE_CHECKING:
     from pyweber.pyweber.pyweber import Pyweber
     from pyweber.core.template import Template, Element
     from pyweber.core.window import Window
+    from pyweber.models.event_policy import EventPolicy
 
 class EventData:
     def __init__(self, event_data: dict[str, Union[int, str]]):
@@ -96,10 +101,19 @@ class EventHandler:
             self.__loop = None
 
     def update_all(self):
-        self.__send__(data=self.__data_to_send__(), session_id=None)
+        self.__schedule__(data=self.__data_to_send__(), session_id=None)
 
     def update(self):
-        self.__send__(data=self.__data_to_send__(), session_id=self.session.session_id)
+        """Send the template changes; calls within one update window are coalesced."""
+        self.__schedule__(data=self.__data_to_send__(), session_id=self.session.session_id)
+
+    def flush(self):
+        """Send the template changes now, including any update still waiting in the window."""
+        self.__run__(self.__ws.updates.flush(
+            session_id=self.session.session_id,
+            route=self.route,
+            data=self.__data_to_send__()
+        ))
 
     def reload(self):
         self.__send__(data={'reload': True}, session_id=self.session.session_id)
@@ -117,7 +131,23 @@ class EventHandler:
         }
 
     def __send__(self, data: dict[str, Any], session_id: str):
-        coro = self.__ws.send_message(data=data, session_id=session_id, route=self.route)
+        self.__run__(self.__ws.send_message(data=data, session_id=session_id, route=self.route))
+
+    def __schedule__(self, data: dict[str, Any], session_id: str):
+        if not self.__has_loop__():
+            # A one-shot asyncio.run would close before the window elapses
+            self.__send__(data=data, session_id=session_id)
+            return
+        self.__run__(self.__ws.updates.request(data=data, session_id=session_id, route=self.route))
+
+    def __has_loop__(self) -> bool:
+        try:
+            asyncio.get_running_loop()
+            return True
+        except RuntimeError:
+            return self.__loop is not None and self.__loop.is_running()
+
+    def __run__(self, coro):
         try:
             running = asyncio.get_running_loop()
             running.create_task(coro)
@@ -193,45 +223,42 @@ class EventConstrutor:
         )
 
 EventBook: dict[str, dict[str, Union[Callable, dict[str, list[str]]]]] = {}
+# Reverse of ``EventBook[event_id]['elements']``: element uuid → its event ids
+ElementEvents: dict[str, set[str]] = {}
 WindowBookEvents: dict[str, dict[str, Callable]] = {}
 
 
 def collect_element_uuids(root) -> set[str]:
     """Collect all element uuids under ``root`` (Template.root or Element)."""
-    out: set[str] = set()
     if root is None:
-        return out
+        return set()
 
-    def walk(el) -> None:
-        uid = getattr(el, 'uuid', None)
-        if uid:
-            out.add(str(uid))
-        for child in getattr(el, 'childs', None) or []:
-            walk(child)
+    index = get_element_index(root)
+    if index is not None and index.root is root:
+        return set(index.uuids)
 
-    walk(root)
-    return out
+    return {str(el.uuid) for el in iter_subtree(root) if getattr(el, 'uuid', None)}
 
 
 def unregister_events_for_uuids(uuids: set[str] | None) -> int:
     """Drop EventBook element refs; remove handlers with no remaining elements.
 
+    Only the handlers of ``uuids`` are visited (through ``ElementEvents``).
     Returns the number of event_id entries fully removed.
     """
     if not uuids:
         return 0
     removed = 0
-    dead: list[str] = []
-    for event_id, entry in list(EventBook.items()):
-        elements = entry.get('elements') or {}
-        for uid in list(elements.keys()):
-            if uid in uuids:
-                del elements[uid]
-        if not elements:
-            dead.append(event_id)
-    for event_id in dead:
-        EventBook.pop(event_id, None)
-        removed += 1
+    for uid in uuids:
+        for event_id in ElementEvents.pop(uid, ()):
+            entry = EventBook.get(event_id)
+            if entry is None:
+                continue
+            elements = entry.get('elements') or {}
+            elements.pop(uid, None)
+            if not elements:
+                del EventBook[event_id]
+                removed += 1
     return removed
 
 
@@ -246,9 +273,13 @@ def cleanup_template_events(template) -> int:
 def clear_event_book() -> None:
     """Clear the process-wide EventBook (tests / shutdown)."""
     EventBook.clear()
+    ElementEvents.clear()
 
 
 class TemplateEvents:
+    # Owners and policies live in slots so ``__dict__`` keeps holding only the handlers.
+    __slots__ = ('__owners', '__policies', '__dict__', '__weakref__')
+
     def __init__(
         self,
         # Eventos de Mouse
@@ -309,6 +340,9 @@ class TemplateEvents:
         ontouchmove: Callable = None,
         ontouchend: Callable = None,
         ontouchcancel: Callable = None,
+
+        # Políticas de entrega, ex.: {'input': debounce(150)}
+        policies: dict[str, Union['EventPolicy', str]] = None,
     ):
         # Eventos de Mouse
         self.onclick = onclick
@@ -369,6 +403,55 @@ class TemplateEvents:
         self.ontouchend = ontouchend
         self.ontouchcancel = ontouchcancel
 
+        for event_type, policy in (policies or {}).items():
+            self.set_policy(event_type, policy)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        for owner in list(getattr(self, '_TemplateEvents__owners', None) or ()):
+            owner._field_changed('events')
+
+    def __getstate__(self):
+        return dict(self.__dict__)
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state)
+
+    def _bind_owner(self, element: 'Element'):
+        """Notify ``element`` when a handler is (re)assigned on this instance."""
+        owners = getattr(self, '_TemplateEvents__owners', None)
+        if owners is None:
+            owners = weakref.WeakSet()
+            object.__setattr__(self, '_TemplateEvents__owners', owners)
+        owners.add(element)
+
+        if self.policies:
+            from pyweber.models.event_policy import apply_policies
+            apply_policies(element, self.policies)
+
+    @property
+    def policies(self) -> dict[str, 'EventPolicy']:
+        return dict(getattr(self, '_TemplateEvents__policies', None) or {})
+
+    def set_policy(self, event_type: Union[str, Enum], policy: Union['EventPolicy', str, None]):
+        """Throttle, debounce or latest-wins delivery of ``event_type`` on every owner (``None`` clears it)."""
+        from pyweber.models.event_policy import apply_policies, as_policy, event_name
+
+        name = event_name(event_type)
+        policy = as_policy(policy) if policy is not None else None
+        policies = getattr(self, '_TemplateEvents__policies', None)
+        if policies is None:
+            policies = {}
+            object.__setattr__(self, '_TemplateEvents__policies', policies)
+
+        if policy is None:
+            policies.pop(name, None)
+        else:
+            policies[name] = policy
+
+        for owner in list(getattr(self, '_TemplateEvents__owners', None) or ()):
+            apply_policies(owner, {name: policy})
+
     def events(self):
         return [name.replace('on', '') for name, event in self.__dict__.items() if event]
 
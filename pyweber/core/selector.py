@@ -0,0 +1,383 @@
+"""Compiled CSS selectors and lookup predicates for the Element tree.
+
+``compile_selector`` parses a selector list once (cached) into matchers that
+support compound selectors (``tag.class#id[attr]``), descendant (`` ``) and
+child (``>``) combinators, ``*`` and the CSS attribute operators
+(``=``, ``~=``, ``|=``, ``^=``, ``$=``, ``*=``, optional ``i`` flag).
+
+``compile_query`` builds the predicate behind ``getElements(by=..., value=...,
+search_mode=...)`` with regex patterns compiled once.
+
+Both are evaluated by ``select`` — an iterative generator, so single-result
+queries stop at the first match. Trees registered in a Template index seed
+candidates from the uuid/id/class/tag tables instead of walking.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from pyweber.models.element_index import ElementIndex, get_element_index, iter_subtree
+
+if TYPE_CHECKING:
+    from pyweber.core.element import Element
+
+Predicate = Callable[['Element'], bool]
+
+class SelectorSyntaxError(ValueError):
+    """Raised for selectors the CSS parser does not understand."""
+
+@dataclass(frozen=True)
+class AttributeSelector:
+    name: str
+    operator: Optional[str] = None
+    value: Optional[str] = None
+    ignore_case: bool = False
+
+    def matches(self, element: 'Element') -> bool:
+        actual = attribute_value(element, self.name)
+        if actual is None:
+            return False
+        if self.operator is None:
+            return True
+
+        expected = self.value
+        if self.ignore_case:
+            actual, expected = actual.lower(), expected.lower()
+
+        match self.operator:
+            case '=':  return actual == expected
+            case '~=': return expected in actual.split()
+            case '|=': return actual == expected or actual.startswith(expected + '-')
+            case '^=': return bool(expected) and actual.startswith(expected)
+            case '$=': return bool(expected) and actual.endswith(expected)
+            case '*=': return bool(expected) and expected in actual
+
+        return False
+
+@dataclass(frozen=True)
+class CompoundSelector:
+    tag: Optional[str] = None
+    id: Optional[str] = None
+    classes: tuple[str, ...] = ()
+    attributes: tuple[AttributeSelector, ...] = ()
+
+    def matches(self, element: 'Element') -> bool:
+        if self.tag is not None and str(element.tag).lower() != self.tag:
+            return False
+        if self.id is not None and element.id != self.id:
+            return False
+        if self.classes:
+            classes = element.classes
+            if not all(cls in classes for cls in self.classes):
+                return False
+        return all(attr.matches(element) for attr in self.attributes)
+
+@dataclass(frozen=True)
+class ComplexSelector:
+    compounds: tuple[CompoundSelector, ...]
+    combinators: tuple[str, ...]
+
+    @property
+    def subject(self) -> CompoundSelector:
+        return self.compounds[-1]
+
+    def matches(self, element: 'Element') -> bool:
+        return self.subject.matches(element) and self.__match_left(element, len(self.compounds) - 2)
+
+    def __match_left(self, element: 'Element', position: int) -> bool:
+        if position < 0:
+            return True
+
+        compound = self.compounds[position]
+        parent = element.parent
+
+        if self.combinators[position] == '>':
+            return parent is not None and compound.matches(parent) and self.__match_left(parent, position - 1)
+
+        while parent is not None:
+            if compound.matches(parent) and self.__match_left(parent, position - 1):
+                return True
+            parent = parent.parent
+
+        return False
+
+class CompiledSelector:
+    """A parsed selector list; ``matches`` tests one element, ``select`` walks a scope."""
+
+    def __init__(self, source: str, selectors: tuple[ComplexSelector, ...]):
+        self.source = source
+        self.selectors = selectors
+
+    def __repr__(self):
+        return f'CompiledSelector({self.source!r})'
+
+    def matches(self, element: 'Element') -> bool:
+        return any(selector.matches(element) for selector in self.selectors)
+
+    def candidates(self, index: ElementIndex) -> Optional[list['Element']]:
+        """Index-seeded candidates in document order, or ``None`` when a walk is needed."""
+        seeded: dict['Element', None] = {}
+
+        for selector in self.selectors:
+            subject = selector.subject
+            if subject.id is not None:
+                bucket = index.bucket('id', subject.id)
+            elif subject.classes:
+                name = min(subject.classes, key=lambda cls: index.count('class', cls))
+                bucket = index.bucket('class', name)
+            elif subject.tag is not None:
+                bucket = index.bucket('tag', subject.tag)
+            else:
+                return None
+
+            seeded.update(dict.fromkeys(bucket))
+
+        return index.document_order(seeded)
+
+    def select(self, scope: 'Element') -> Iterator['Element']:
+        return select(scope=scope, predicate=self.matches, seed=self.candidates)
+
+def attribute_value(element: 'Element', name: str) -> Optional[str]:
+    """Attribute as the browser would serialize it (``None`` when absent)."""
+    match name:
+        case 'id':
+            return element.id
+        case 'class':
+            return ' '.join(element.classes) if element.classes else None
+        case 'uuid':
+            return element.uuid
+        case 'value':
+            value = element.value
+            return str(value) if value is not None else None
+        case 'style':
+            return '; '.join(f'{k}: {v}' for k, v in element.style.items()) if element.style else None
+
+    value = element.attrs.get(name)
+    if value is None:
+        return None
+    if value is True:
+        return ''
+    return str(value)
+
+_IDENT = r'(?:[\w\-]|\\.)+'
+_TOKEN = re.compile(
+    rf'''
+    (?P<ws>\s+)
+    |(?P<comma>,)
+    |(?P<child>>)
+    |(?P<star>\*)
+    |(?P<id>\#{_IDENT})
+    |(?P<cls>\.{_IDENT})
+    |(?P<attr>\[\s*(?P<attr_name>{_IDENT})\s*
+        (?:(?P<attr_op>[~|^$*]?=)\s*
+           (?:"(?P<dq>(?:[^"\\]|\\.)*)"|'(?P<sq>(?:[^'\\]|\\.)*)'|(?P<bare>{_IDENT}))
+           \s*(?P<flag>[iIsS])?\s*)?
+    \])
+    |(?P<tag>{_IDENT})
+    ''',
+    re.VERBOSE,
+)
+_ESCAPE = re.compile(r'\\(.)')
+
+def _unescape(text: str) -> str:
+    return _ESCAPE.sub(r'\1', text)
+
+@lru_cache(maxsize=512)
+def compile_selector(selector: str) -> CompiledSelector:
+    """Parse a CSS selector list. Raises ``SelectorSyntaxError`` on unsupported syntax."""
+    if not isinstance(selector, str) or not selector.strip():
+        raise SelectorSyntaxError(f'Invalid selector: {selector!r}')
+
+    selectors: list[ComplexSelector] = []
+    compounds: list[CompoundSelector] = []
+    combinators: list[str] = []
+    current: Optional[dict] = None
+    pending: Optional[str] = None
+
+    def close_compound():
+        nonlocal current
+        if current is not None:
+            compounds.append(CompoundSelector(
+                tag=current['tag'],
+                id=current['id'],
+                classes=tuple(current['classes']),
+                attributes=tuple(current['attributes']),
+            ))
+            current = None
+
+    def open_compound() -> dict:
+        nonlocal current, pending
+        if current is None:
+            if compounds:
+                combinators.append(pending or ' ')
+            elif pending == '>':
+                raise SelectorSyntaxError(f'Selector cannot start with a combinator: {selector!r}')
+            pending = None
+            current = {'tag': None, 'id': None, 'classes': [], 'attributes': []}
+        return current
+
+    def close_complex():
+        nonlocal compounds, combinators, pending
+        close_compound()
+        if not compounds or pending == '>':
+            raise SelectorSyntaxError(f'Incomplete selector: {selector!r}')
+        selectors.append(ComplexSelector(tuple(compounds), tuple(combinators)))
+        compounds, combinators, pending = [], [], None
+
+    position = 0
+    text = selector.strip()
+    while position < len(text):
+        token = _TOKEN.match(text, position)
+        if token is None:
+            raise SelectorSyntaxError(f'Unsupported selector syntax at {position} in {selector!r}')
+        position = token.end()
+        kind = token.lastgroup if token.lastgroup in ('ws', 'comma', 'child', 'star', 'id', 'cls', 'tag') else 'attr'
+
+        if kind == 'ws':
+            close_compound()
+        elif kind == 'comma':
+            close_complex()
+        elif kind == 'child':
+            close_compound()
+            if not compounds or pending == '>':
+                raise SelectorSyntaxError(f'Misplaced combinator in {selector!r}')
+            pending = '>'
+        elif kind in ('star', 'tag'):
+            compound = open_compound()
+            if compound['tag'] is not None or compound['id'] or compound['classes'] or compound['attributes']:
+                raise SelectorSyntaxError(f'Type selector must come first in {selector!r}')
+            if kind == 'tag':
+                compound['tag'] = _unescape(token.group('tag')).lower()
+        elif kind == 'id':
+            open_compound()['id'] = _unescape(token.group('id')[1:])
+        elif kind == 'cls':
+            open_compound()['classes'].append(_unescape(token.group('cls')[1:]))
+        else:
+            raw = token.group('dq')
+            if raw is None: raw = token.group('sq')
+            if raw is None: raw = token.group('bare')
+            flag = (token.group('flag') or '').lower()
+            open_compound()['attributes'].append(AttributeSelector(
+                name=_unescape(token.group('attr_name')),
+                operator=token.group('attr_op'),
+                value=_unescape(raw) if raw is not None else None,
+                ignore_case=flag == 'i',
+            ))
+
+    close_complex()
+    return CompiledSelector(source=selector, selectors=tuple(selectors))
+
+def _string_matcher(value: str, search_mode: str) -> Callable[[str], bool]:
+    match search_mode:
+        case 'exact':      return lambda target: target == value
+        case 'regex':      return re.compile(value).search
+        case 'contains':   return lambda target: value in target
+        case 'startswith': return lambda target: target.startswith(value)
+        case 'endswith':   return lambda target: target.endswith(value)
+
+    return lambda target: False
+
+@lru_cache(maxsize=512)
+def compile_query(by: str, value: str, search_mode: str = 'exact') -> Predicate:
+    """Predicate for ``getElements(by, value, search_mode)`` (legacy semantics, compiled once)."""
+    search_classes = value.split() if isinstance(value, str) else []
+    conditions = [pair.strip() for pair in value.split(';') if pair.strip()] if isinstance(value, str) else []
+    class_matchers = [_string_matcher(cls, search_mode) for cls in search_classes]
+    condition_matchers = [_string_matcher(cond, search_mode) for cond in conditions]
+    exact_conditions = []
+    for condition in conditions:
+        key, _, v = condition.partition(':')
+        if not v: key, _, v = condition.partition('=')
+        exact_conditions.append((key.strip(), v.strip() if v else None))
+    string_matcher = _string_matcher(value, search_mode)
+
+    def matches(target) -> bool:
+        if target is None: return False
+
+        # Lista (classes)
+        if isinstance(target, list):
+            if search_mode == 'exact':
+                return set(search_classes) <= set(target)
+            return all(any(match(t) for t in target) for match in class_matchers)
+
+        # Dict (attrs, style)
+        if isinstance(target, dict):
+            if search_mode == 'exact':
+                for key, expected in exact_conditions:
+                    if expected is None:
+                        if key not in target: return False
+                    elif target.get(key) != expected:
+                        return False
+                return True
+
+            return all(
+                any(match(k) or match(str(v)) for k, v in target.items())
+                for match in condition_matchers
+            )
+
+        # String (id, tag, content, etc)
+        return bool(string_matcher(str(target)))
+
+    if by == 'classes':
+        return lambda element: matches(element.classes)
+    if by in ('attrs', 'style'):
+        return lambda element: matches(getattr(element, by, {}))
+    return lambda element: matches(getattr(element, by, None))
+
+def query_seed(by: str, value: str, search_mode: str = 'exact') -> Optional[Callable[[ElementIndex], list['Element']]]:
+    """Index lookup matching ``compile_query(by, value, 'exact')`` for uuid/id/tag/classes."""
+    if search_mode != 'exact' or not isinstance(value, str):
+        return None
+
+    if by == 'uuid':
+        return lambda index: [found] if (found := index.get_by_uuid(value)) is not None else []
+    if by == 'id':
+        return lambda index: index.get_by_id(value)
+    if by == 'tag':
+        return lambda index: index.get_by_tag(value)
+    if by == 'classes' and value.split():
+        return lambda index: index.get_by_class(*value.split())
+
+    return None
+
+def compile_legacy_selector(selector: str, search_mode: str = 'exact') -> Predicate:
+    """Prefix-dispatched selectors (``.a.b``, ``#id``, ``[k=v; k2]``, ``tag``) used by non-exact search modes."""
+    if selector.startswith('.'):
+        return compile_query('classes', ' '.join(selector.split('.')).strip(), search_mode)
+    if selector.startswith('#'):
+        return compile_query('id', selector[1:].strip(), search_mode)
+    if selector.startswith('['):
+        return compile_query('attrs', selector.removeprefix('[').removesuffix(']'), search_mode)
+    return compile_query('tag', selector.strip(), search_mode)
+
+def select(
+    scope: 'Element',
+    predicate: Predicate,
+    seed: Callable[[ElementIndex], Optional[list['Element']]] = None,
+) -> Iterator['Element']:
+    """Yield elements under ``scope`` (inclusive, document order) that satisfy ``predicate``."""
+    index = get_element_index(scope) if seed is not None else None
+    candidates = seed(index) if index is not None else None
+
+    if candidates is None:
+        for element in iter_subtree(scope):
+            if predicate(element):
+                yield element
+        return
+
+    whole_tree = scope is index.root
+    for element in candidates:
+        if (whole_tree or is_within(element, scope)) and predicate(element):
+            yield element
+
+def is_within(element: 'Element', ancestor: 'Element') -> bool:
+    node = element
+    while node is not None:
+        if node is ancestor:
+            return True
+        node = node.parent
+    return False
@@ -1,6 +1,11 @@
 import os
+from typing import Callable
 from uuid import uuid4
 from pyweber.core.element import Element, SEARCH_MODE
+from pyweber.models.element_index import ElementIndex, get_element_index, iter_subtree
+from pyweber.models.element import is_client_script
+from pyweber.models.snapshot import TemplateSnapshot, snapshot_template
+from pyweber.models.batch import BatchState, TemplateBatch
 from pyweber.config.config import config
 from pyweber.utils.types import HTTPStatusCode, GetBy
 
@@ -14,6 +19,7 @@ class Template:
         self.__icon: str = self.get_icon()
         self.title = title
         self.__root = self.parse_html()
+        self.__index = ElementIndex(self.__root)
 
     @property
     def include_uuid(self) -> bool:
@@ -33,7 +39,25 @@ class Template:
         if value.tag != 'html':
             raise ValueError('This Element is not valid to root. Please add the Html Element')
 
+        previous = self.__dict__.get('_Template__index')
+        if previous is not None:
+            previous.detach()
+
         self.__root = value
+        self.__index = ElementIndex(value)
+
+    @property
+    def index(self) -> ElementIndex:
+        """uuid/id/class/tag lookup tables for ``root``, built lazily and kept current by mutations."""
+        index = self.__dict__.get('_Template__index')
+        root = self.__dict__.get('_Template__root')
+
+        if index is None or index.root is not root:
+            if index is not None:
+                index.detach()
+            index = self.__index = ElementIndex(root)
+
+        return index
 
     @property
     def status_code(self):
@@ -80,8 +104,8 @@ class Template:
         if not html: html = self.__template
         return self.__inject_default_elements(root=self.__parse_html(html=html))
 
-    def build_html(self, include_doctype: bool = True):
-        html = self.root.to_html()
+    def build_html(self, include_doctype: bool = True, static: bool = False):
+        html = self.root.to_html(static=static)
 
         if include_doctype:
             html = f'<!DOCTYPE html>\n{html}'
@@ -95,7 +119,7 @@ class Template:
         element: Element = None,
         search_mode: SEARCH_MODE='exact'
     ):
-        if not element: element = self.root
+        if not element: element = self.index.root
         return element.getElement(by=by, value=value, search_mode=search_mode)
 
     def getElements(
@@ -105,8 +129,8 @@ class Template:
         element: Element = None,
         search_mode: SEARCH_MODE='exact'
     ):
-        if not element: element = self.root
-        return  element.getElements(by=by, value=value, search_mode=search_mode)
+        if not element: element = self.index.root
+        return element.getElements(by=by, value=value, search_mode=search_mode)
 
     def querySelector(
         self,
@@ -114,7 +138,7 @@ class Template:
         element: Element = None,
         search_mode: SEARCH_MODE='exact'
     ):
-        if element is None: element = self.__root
+        if element is None: element = self.index.root
         return element.querySelector(selector=selector, search_mode=search_mode)
 
     def querySelectorAll(
@@ -123,7 +147,7 @@ class Template:
         element: Element = None,
         search_mode: SEARCH_MODE='exact'
     ) -> list[Element]:
-        if element is None: element = self.__root
+        if element is None: element = self.index.root
         return element.querySelectorAll(selector=selector, search_mode=search_mode)
 
     def __parse_html(self, html: str) -> Element:
@@ -161,12 +185,7 @@ class Template:
 
     @staticmethod
     def _is_pyweber_ws_script(child: Element) -> bool:
-        src = child.get_attr('src', '') or ''
-        return (
-            child.tag == 'script'
-            and src.startswith('/_pyweber/static/')
-            and src.endswith('/.js')
-        )
+        return is_client_script(child)
 
     @staticmethod
     def _is_pyweber_stylesheet(link: Element) -> bool:
@@ -274,6 +293,37 @@ class Template:
 
         return root
 
+    def snapshot(self) -> TemplateSnapshot:
+        """Immutable copy-on-write view of the current tree.
+
+        Subtrees untouched since the previous snapshot are shared, so the cost
+        is proportional to what changed rather than to page size.
+        """
+        return snapshot_template(self)
+
+    def batch(self) -> TemplateBatch:
+        """Group mutations; updates requested inside are sent as one diff when it closes.
+
+        Works as ``with template.batch():`` and ``async with template.batch():``
+        and nests, also across concurrent handlers of the same session.
+        """
+        return TemplateBatch(self, self.__batch_state())
+
+    @property
+    def batching(self) -> bool:
+        return self.__batch_state().active
+
+    def after_batch(self, callback: Callable[[], None]) -> bool:
+        """Defer ``callback`` until the open batch closes; ``False`` when no batch is open."""
+        return self.__batch_state().defer(callback)
+
+    def __batch_state(self) -> BatchState:
+        # Lazily created: clones and subclasses skipping __init__ get their own
+        state = self.__dict__.get('_Template__batch')
+        if state is None:
+            state = self.__dict__.setdefault('_Template__batch', BatchState())
+        return state
+
     def clone(self):
         """Deep-copy the template tree, preserving subclass type when possible.
 
@@ -292,7 +342,7 @@ class Template:
         tpl._Template__title = self._Template__title
         tpl._Template__root = self.root.clone
 
-        uuid_map = self._index_elements_by_uuid(tpl.root)
+        uuid_map = tpl.index.uuids
 
         # Remap ``self.title_el``-style Element refs onto the cloned tree
         if isinstance(tpl._Template__title, Element):
@@ -304,7 +354,7 @@ class Template:
             'kwargs', 'data',
             '_Template__include_uuid', '_Template__template',
             '_Template__status_code', '_Template__icon',
-            '_Template__title', '_Template__root',
+            '_Template__title', '_Template__root', '_Template__batch',
         }
         for key, val in self.__dict__.items():
             if key in skip:
@@ -324,18 +374,14 @@ class Template:
 
     @staticmethod
     def _index_elements_by_uuid(root: Element) -> dict[str, Element]:
-        out: dict[str, Element] = {}
+        if root is None:
+            return {}
 
-        def walk(el: Element) -> None:
-            uid = getattr(el, 'uuid', None)
-            if uid:
-                out[str(uid)] = el
-            for child in getattr(el, 'childs', None) or []:
-                walk(child)
+        index = get_element_index(root)
+        if index is not None and index.root is root:
+            return dict(index.uuids)
 
-        if root is not None:
-            walk(root)
-        return out
+        return {el.uuid: el for el in iter_subtree(root) if getattr(el, 'uuid', None)}
 
     def _rebind_events_to_clone(self, cloned: 'Template') -> None:
         """Point bound methods that closed over ``self`` at ``cloned`` instead."""
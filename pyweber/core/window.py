@@ -263,6 +263,15 @@ class Window:
             prompt_id=response.get('prompt_id', None)
         )
 
+    async def download(self, data: bytes, filename: str, content_type: str = 'application/octet-stream') -> bool:
+        """Envia ``data`` ao navegador como ficheiro para descarregar (frames binários)."""
+        return await self.__ws.send_file(
+            data=data,
+            filename=filename,
+            session_id=self.session_id,
+            content_type=content_type,
+        )
+
     def open(self, url: str, new_page: bool = False) -> "Window":
         """Open a new window or redirect to a new url (relative or allowlisted host)."""
         from pyweber.utils.security import ensure_safe_redirect_url
@@ -0,0 +1,75 @@
+"""Grouped template mutations (``with template.batch():``).
+
+While at least one batch is open on a template, updates for it are held:
+the ``UpdateScheduler`` defers them, and ``send_message`` hands template
+updates to the scheduler instead of diffing a half-mutated tree. Inbound
+messages do not rebase the session's diff baseline meanwhile, so the changes
+made before them are still in the diff. When the last batch closes the held
+updates are released and go out as one consolidated diff/patch.
+
+Batches nest and may be opened by concurrent handlers of the same session
+(sync handlers run in worker threads), so the depth is guarded by a lock.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from pyweber.core.template import Template
+
+class BatchState:
+    """Per-template batch depth and release callbacks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.depth = 0
+        self.callbacks: list[Callable[[], None]] = []
+
+    @property
+    def active(self) -> bool:
+        return self.depth > 0
+
+    def enter(self):
+        with self.lock:
+            self.depth += 1
+
+    def exit(self):
+        with self.lock:
+            self.depth -= 1
+            if self.depth:
+                return
+            callbacks, self.callbacks = self.callbacks, []
+
+        for callback in callbacks:
+            callback()
+
+    def defer(self, callback: Callable[[], None]) -> bool:
+        """Run ``callback`` when the outermost batch closes; ``False`` if none is open."""
+        with self.lock:
+            if not self.depth:
+                return False
+            self.callbacks.append(callback)
+            return True
+
+class TemplateBatch:
+    """Context manager returned by ``Template.batch()``; usable with ``with`` and ``async with``."""
+
+    def __init__(self, template: 'Template', state: BatchState):
+        self.__template = template
+        self.__state = state
+
+    def __enter__(self) -> 'Template':
+        self.__state.enter()
+        return self.__template
+
+    def __exit__(self, *exc_info):
+        self.__state.exit()
+        return False
+
+    async def __aenter__(self) -> 'Template':
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        return self.__exit__(*exc_info)
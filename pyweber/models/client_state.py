@@ -0,0 +1,109 @@
+"""Last known browser state of one WebSocket connection.
+
+The client sends its form values and ``window_data`` in full with the first
+message on a socket (``state: 'full'``) and afterwards only what changed since
+the previous message (``state: 'delta'``):
+
+- ``values`` — ``{uuid: {...}}`` for changed fields, ``{uuid: null}`` for
+  fields that left the page
+- ``window_data`` — changed top-level keys; ``localStorage`` /
+  ``sessionStorage`` carry only changed keys, ``null`` for removed ones
+
+Frames on one socket arrive in order and every parsed message is merged, so
+the previous message is the acknowledged baseline. Messages without ``state``
+(older clients) are treated as full.
+
+A delta that arrives without a baseline is answered with a state reset. Its
+event is held and replayed with the full state the client resends in reply,
+so the click or keystroke that ran into the reset is not lost.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+STORAGE_KEYS = frozenset({'localStorage', 'sessionStorage'})
+
+class ClientState:
+    def __init__(self):
+        self.values: dict[str, dict[str, Any]] = {}
+        self.window: dict[str, Any] = {}
+        self.synced = False
+        self.held: list[dict[str, Any]] = []
+
+    def apply(self, message: dict[str, Any]) -> bool:
+        """Merge the state carried by ``message`` and rewrite it for ``wsMessage``.
+
+        Afterwards ``message['values']`` holds the changed fields,
+        ``message['all_values']`` every known field, ``message['window_data']``
+        the full window state and ``message['window_changed']`` the changed
+        window keys (``None`` when everything was sent). Returns ``False`` for
+        a delta without a baseline; the client must then resend in full.
+        """
+        mode = message.pop('state', None)
+        values = message.get('values') or {}
+        window = message.get('window_data') or {}
+
+        if mode != 'delta':
+            self.values = {uuid: value for uuid, value in values.items() if value is not None}
+            self.window = dict(window)
+            self.synced = True
+            message['all_values'] = self.values
+            message['window_changed'] = None
+            return True
+
+        if not self.synced:
+            message['all_values'] = {}
+            message['window_changed'] = []
+            message['window_data'] = {}
+            message['values'] = {}
+            return False
+
+        changed = self.__merge_values(values)
+        self.__merge_window(window)
+        message['values'] = changed
+        message['all_values'] = self.values
+        message['window_data'] = self.window
+        message['window_changed'] = list(window)
+        return True
+
+    def hold(self, message: dict[str, Any]):
+        """Keep an event rejected by :meth:`apply` until the full state arrives."""
+        if message:
+            self.held.append(message)
+
+    def release(self) -> list[dict[str, Any]]:
+        """Held events, carrying the full state once the baseline is back."""
+        if not self.synced or not self.held:
+            return []
+        held, self.held = self.held, []
+        for message in held:
+            message['values'] = dict(self.values)
+            message['all_values'] = self.values
+            message['window_data'] = self.window
+            message['window_changed'] = None
+        return held
+
+    def __merge_values(self, delta: dict[str, Optional[dict[str, Any]]]) -> dict[str, dict[str, Any]]:
+        changed = {}
+        for uuid, value in delta.items():
+            if value is None:
+                self.values.pop(uuid, None)
+            else:
+                self.values[uuid] = changed[uuid] = value
+        return changed
+
+    def __merge_window(self, delta: dict[str, Any]):
+        window = dict(self.window)
+        for key, value in delta.items():
+            if key in STORAGE_KEYS and isinstance(value, dict):
+                storage = dict(window.get(key) or {})
+                for name, item in value.items():
+                    if item is None:
+                        storage.pop(name, None)
+                    else:
+                        storage[name] = item
+                window[key] = storage
+            else:
+                window[key] = value
+        self.window = window
@@ -0,0 +1,89 @@
+"""Merkle hashes of the element structure for the reconnect handshake.
+
+Instead of uploading ``outerHTML`` on every (re)connect, the client sends the
+hash of ``<html>`` plus one hash per top-level subtree (each child of
+``<head>`` and ``<body>``). The server hashes its own tree the same way and
+asks only for the subtrees that differ (``divergent_subtrees``).
+
+A node hashes ``tag``, ``uuid`` and the hashes of its element children, so the
+hash covers which elements exist and where — what ``merge_client_dom`` can
+reconcile — but not text or attributes, which the server owns. The function
+is two 32-bit FNV-1a passes over UTF-16 code units, mirrored by ``domHash`` in
+``static/js.js``. Hashes are cached on the immutable ``ElementSnapshot`` nodes,
+so unchanged subtrees are never hashed twice.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional
+
+from pyweber.models.snapshot import ElementSnapshot, TemplateSnapshot
+
+FNV_PRIME = 16777619
+FNV_SEEDS = (0x811C9DC5, 0x811C9DC5 ^ 0x9E3779B9)
+SEPARATOR = '\x1f'
+
+# Parsed comments are elements on the server but not in ``Element.children``
+_SKIPPED_TAGS = frozenset({'comment'})
+
+def fnv_hash(text: str) -> str:
+    units = memoryview(text.encode('utf-16-le')).cast('H')
+    digest = []
+    for seed in FNV_SEEDS:
+        value = seed
+        for unit in units:
+            value = ((value ^ unit) * FNV_PRIME) & 0xFFFFFFFF
+        digest.append(f'{value:08x}')
+    return ''.join(digest)
+
+def node_hash(tag: str, uuid: Optional[str], child_hashes: Iterable[str]) -> str:
+    return fnv_hash(SEPARATOR.join([tag.lower(), uuid or '', *child_hashes]))
+
+def _element_childs(node: ElementSnapshot) -> list[ElementSnapshot]:
+    return [child for child in node.childs if child.tag not in _SKIPPED_TAGS]
+
+def subtree_hash(node: ElementSnapshot) -> str:
+    """Merkle hash of ``node`` (iterative, memoised on the snapshot)."""
+    stack: list[tuple[ElementSnapshot, bool]] = [(node, False)]
+    while stack:
+        current, ready = stack.pop()
+        if current.merkle is not None:
+            continue
+        childs = _element_childs(current)
+        if ready:
+            current.merkle = node_hash(current.tag, current.uuid, [child.merkle for child in childs])
+        else:
+            stack.append((current, True))
+            stack.extend((child, False) for child in childs if child.merkle is None)
+    return node.merkle
+
+def top_level_hashes(snapshot: TemplateSnapshot) -> tuple[dict[str, str], list[str]]:
+    """``({uuid: hash} of each head/body child, [head uuid, body uuid])``."""
+    parts: dict[str, str] = {}
+    sections: list[str] = []
+    for section in (snapshot.head, snapshot.body):
+        if section is None:
+            continue
+        sections.append(section.uuid)
+        for child in _element_childs(section):
+            parts[child.uuid] = subtree_hash(child)
+    return parts, sections
+
+def divergent_subtrees(snapshot: TemplateSnapshot, client: dict[str, Any]) -> Optional[list[str]]:
+    """Client subtrees to upload: ``[]`` when in sync, ``None`` when only a full upload helps.
+
+    ``client`` is ``{'root': hash, 'sections': [uuid, ...], 'parts': {uuid: hash}}``.
+    A full upload is needed when the client's ``<head>``/``<body>`` are unknown
+    here, because grafted subtrees need a known parent.
+    """
+    if client.get('root') == subtree_hash(snapshot.root):
+        return []
+
+    parts, sections = top_level_hashes(snapshot)
+    if any(uuid not in sections for uuid in client.get('sections') or ()):
+        return None
+
+    return [
+        uuid for uuid, digest in (client.get('parts') or {}).items()
+        if parts.get(uuid) != digest
+    ]
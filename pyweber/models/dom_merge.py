@@ -7,23 +7,23 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from pyweber.models.element_index import get_element_index, iter_subtree
+
 if TYPE_CHECKING:
     from pyweber.core.element import Element
 
 
 def index_elements_by_uuid(root: 'Element') -> dict[str, 'Element']:
-    """Walk ``root`` and map uuid → Element (skips missing/empty uuids)."""
-    out: dict[str, Element] = {}
+    """Map uuid → Element under ``root`` (skips missing/empty uuids).
 
-    def walk(el: 'Element') -> None:
-        uid = getattr(el, 'uuid', None)
-        if uid:
-            out[str(uid)] = el
-        for child in el.childs or []:
-            walk(child)
+    Template roots answer from their incremental index; detached trees
+    (e.g. freshly parsed client HTML) are walked once.
+    """
+    index = get_element_index(root)
+    if index is not None and index.root is root:
+        return dict(index.uuids)
 
-    walk(root)
-    return out
+    return {str(el.uuid): el for el in iter_subtree(root) if getattr(el, 'uuid', None)}
 
 
 def _sync_client_fields(server_el: 'Element', client_el: 'Element') -> None:
@@ -70,7 +70,12 @@ def merge_client_dom(
         return
 
     client_root = Element.from_html(client_html, include_uuid=include_uuid)
-    server_map = index_elements_by_uuid(server_root)
+    server_index = get_element_index(server_root)
+    if server_index is not None and server_index.root is server_root:
+        # Live view: grafts below register themselves through add_child.
+        server_map = server_index.uuids
+    else:
+        server_map = index_elements_by_uuid(server_root)
     client_map = index_elements_by_uuid(client_root)
 
     for uid, server_el in list(server_map.items()):
@@ -89,4 +94,39 @@ def merge_client_dom(
         grafted = client_el.clone
         grafted.parent = None
         server_parent.add_child(grafted)
-        server_map.update(index_elements_by_uuid(grafted))
+        if isinstance(server_map, dict):
+            server_map.update(index_elements_by_uuid(grafted))
+
+
+def merge_client_parts(
+    server_root: 'Element',
+    parts: dict[str, dict[str, str]],
+    *,
+    include_uuid: bool = True,
+) -> None:
+    """Merge the subtrees uploaded after a hash handshake (``pyweber.models.dom_hash``).
+
+    ``parts`` maps a subtree uuid to ``{'parent': uuid, 'html': outerHTML}``.
+    Known subtrees are merged like ``merge_client_dom``; unknown ones are
+    grafted under their parent when the server knows it.
+    """
+    from pyweber.core.element import Element
+
+    server_index = get_element_index(server_root)
+    if server_index is not None and server_index.root is server_root:
+        server_map = server_index.uuids
+    else:
+        server_map = index_elements_by_uuid(server_root)
+
+    for uid, part in (parts or {}).items():
+        if not isinstance(part, dict) or not part.get('html'):
+            continue
+
+        server_el = server_map.get(uid)
+        if server_el is not None:
+            merge_client_dom(server_el, part['html'], include_uuid=include_uuid)
+            continue
+
+        server_parent = server_map.get(part.get('parent'))
+        if server_parent is not None:
+            server_parent.add_child(Element.from_html(part['html'], include_uuid=include_uuid))
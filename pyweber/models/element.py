@@ -1,12 +1,12 @@
 import html as html_lib
 import re
-from uuid import uuid4
 
 from typing import (
     TYPE_CHECKING,
     Callable,
     Union,
-    Any
+    Any,
+    Optional
 )
 
 from pyweber.core.events import TemplateEvents
@@ -17,12 +17,22 @@ from pyweber.utils.types import (
 )
 
 from pyweber.models.file import File
+from pyweber.utils.ids import new_element_id
+from pyweber.models.element_index import get_element_index
+from pyweber.models.event_policy import EventPolicy, apply_policies, as_policy, event_name
+from pyweber.models.snapshot import mark_changed
+from pyweber.models.tracked import TrackedDict, TrackedList
 from questionary import checkbox
 
 if TYPE_CHECKING:
     from pyweber.core.template import Template
     from pyweber.core.element import Element
 
+def is_client_script(element: 'ElementConstrutor') -> bool:
+    """The ``<script>`` loading the bundled reactive client."""
+    src = element.attrs.get('src') or ''
+    return element.tag == 'script' and src.startswith('/_pyweber/static/') and src.endswith('/.js')
+
 class ChildElements(list['Element']):
     def __init__(self, parent: 'Element'):
         super().__init__()
@@ -33,6 +43,23 @@ class ChildElements(list['Element']):
         if hasattr(self.parent, 'register_child_placeholder'):
             self.parent.register_child_placeholder(element, before_uuid=before_uuid)
 
+        index = get_element_index(self.parent)
+        if index is not None:
+            index.add_subtree(element)
+
+        self.parent._field_changed('childs')
+
+    def _unregister_child(self, element: 'Element'):
+        self.parent._field_changed('childs')
+
+        # Skip nodes already re-parented elsewhere (moved without remove()).
+        if element.parent is not self.parent:
+            return
+
+        index = get_element_index(element)
+        if index is not None and index is get_element_index(self.parent):
+            index.remove_subtree(element)
+
     def append(self, element: 'Element'):
         super().append(element)
         self._register_child(element)
@@ -40,11 +67,14 @@ class ChildElements(list['Element']):
 
     def remove(self, element: 'Element'):
         super().remove(element)
+        self._unregister_child(element)
 
         return self
 
     def pop(self, index: int = -1):
-        return super().pop(index)
+        element = super().pop(index)
+        self._unregister_child(element)
+        return element
 
     def insert(self, index: int, element: 'Element'):
         super().insert(index, element)
@@ -60,6 +90,29 @@ class ChildElements(list['Element']):
             self.append(element=element)
         return self
 
+    def clear(self):
+        removed = list(self)
+        super().clear()
+        for element in removed:
+            self._unregister_child(element)
+
+    def __setitem__(self, index, value):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__setitem__(index, value)
+        for element in removed:
+            self._unregister_child(element)
+        for element in (value if isinstance(index, slice) else [value]):
+            self._register_child(element)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for element in removed:
+            self._unregister_child(element)
+
+    def __iadd__(self, elements):
+        return self.extend(elements)
+
 class ElementConstrutor:
     def __init__(
         self,
@@ -93,6 +146,21 @@ class ElementConstrutor:
         self.events = events or TemplateEvents()
         self.childs = childs or ChildElements(self)
 
+    def _field_changed(self, field: str):
+        """Called by setters and tracked containers after an in-place change."""
+        if field in ('uuid', 'id', 'tag', 'classes'):
+            index = self.__dict__.get('_ElementConstrutor__index')
+            if index is not None:
+                index.update(self)
+
+        # Children and pending methods are not part of the element's own snapshot fields
+        mark_changed(self, own=field not in ('childs', 'methods'))
+
+        # A <select> derives its value from its options
+        parent = self.__dict__.get('_Element__parent')
+        if parent is not None and parent.__dict__.get('_ElementConstrutor__tag') == 'select':
+            mark_changed(parent)
+
     def register_child_placeholder(self, child: 'ElementConstrutor', *, before_uuid: str = None):
         """Garante que cada filho tem {{uuid}} no content na posição correta."""
         placeholder = "{{" + child.uuid + "}}"
@@ -132,6 +200,7 @@ class ElementConstrutor:
             raise TypeError(f'sanitize value must be a boolean value, but got {type(value).__name__}')
 
         self.__sanitize = value
+        self._field_changed('sanitize')
 
     @property
     def template(self):
@@ -165,15 +234,20 @@ class ElementConstrutor:
         else:
             self.__files = None
 
+    def assigned_uuid(self) -> Optional[str]:
+        """The uuid set so far, ``None`` while the element is still being built."""
+        return self.__dict__.get('_ElementConstrutor__uuid')
+
     @property
     def uuid(self):
         return self.__uuid
 
     @uuid.setter
     def uuid(self, value: str):
-        if not value: value = str(uuid4())
+        if not value: value = new_element_id()
 
         self.__uuid = value.strip()
+        self._field_changed('uuid')
 
     @property
     def tag(self):
@@ -183,6 +257,7 @@ class ElementConstrutor:
     def tag(self, value: HTMLTag | str):
         if isinstance(value, HTMLTag):
             self.__tag = value.value
+            self._field_changed('tag')
             return
 
         if not isinstance(value, str):
@@ -192,6 +267,7 @@ class ElementConstrutor:
             raise ValueError('Element tag name not be an empty value')
 
         self.__tag = value
+        self._field_changed('tag')
 
     @property
     def id(self):
@@ -201,12 +277,14 @@ class ElementConstrutor:
     def id(self, value: str):
         if not value:
             self.__id = None
+            self._field_changed('id')
             return
 
         if not isinstance(value, str):
             raise TypeError('Element id must be a string')
 
         self.__id = value.strip()
+        self._field_changed('id')
 
     @property
     def classes(self):
@@ -226,7 +304,8 @@ class ElementConstrutor:
         else:
             raise TypeError('Element classes must to be a string list')
 
-        self.__classes = class_name
+        self.__classes = TrackedList(class_name, owner=self, field='classes')
+        self._field_changed('classes')
 
     def add_class(self, class_name: str):
         if not isinstance(class_name, str):
@@ -272,7 +351,8 @@ class ElementConstrutor:
         if not all(isinstance(k, str) and isinstance(v, str) for k, v in value.items()):
             raise TypeError('All keys and values must be a string')
 
-        self.__style = value
+        self.__style = TrackedDict(value, owner=self, field='style')
+        self._field_changed('style')
 
     def set_style(self, key: str, value: str):
         if not key or not value:
@@ -305,7 +385,8 @@ class ElementConstrutor:
         for k in {**value}:
             if hasattr(self, k): setattr(self, k, value.pop(k))
 
-        self.__attrs = value
+        self.__attrs = TrackedDict(value, owner=self, field='attrs')
+        self._field_changed('attrs')
 
     def set_attr(self, key: str, value: str):
         if not key:
@@ -355,6 +436,8 @@ class ElementConstrutor:
             except Exception as e:
                 raise ValueError(f"Could not convert value to string: {e}")
 
+        self._field_changed('content')
+
         if self.__content is not None:
             childs = getattr(self, '_Element__childs', None)
             if childs:
@@ -389,6 +472,7 @@ class ElementConstrutor:
                 raise ValueError(f"Could not convert value to string: {e}")
 
         self.__value = value
+        self._field_changed('value')
 
         if self.tag == 'textarea':
             self.content = value
@@ -417,6 +501,8 @@ class ElementConstrutor:
             raise TypeError('Event_handler must a be Events instance')
 
         self.__events = event_handler
+        event_handler._bind_owner(self)
+        self._field_changed('events')
 
     def add_event(self, event_type: EventType, event_handler: callable):
         if not isinstance(event_type, EventType):
@@ -433,7 +519,15 @@ class ElementConstrutor:
 
         setattr(self.__events, event_type.value, None)
 
-    def to_html(self, element: 'Element' = None, indent: int = 0):
+    def set_event_policy(self, event_type: EventType, policy: Union['EventPolicy', str, None]):
+        """Throttle, debounce or latest-wins delivery of ``event_type`` on this element only."""
+        if not isinstance(event_type, EventType):
+            raise TypeError('Event_type must a be EventType instance')
+
+        apply_policies(self, {event_name(event_type): as_policy(policy) if policy is not None else None})
+
+    def to_html(self, element: 'Element' = None, indent: int = 0, static: bool = False):
+        """HTML of ``element``; ``static`` leaves out uuids, event attributes and the client script."""
         if not element:
             element = self
 
@@ -453,7 +547,7 @@ class ElementConstrutor:
             return text
 
         indentation = ' ' * indent
-        uuid_attribute = f' uuid="{esc_attr(element.uuid)}"' if self.include_uuid else ""
+        uuid_attribute = f' uuid="{esc_attr(element.uuid)}"' if self.include_uuid and not static else ""
         html = f'{indentation}<{element.tag}{uuid_attribute}' if element.tag != 'comment' else f'{indentation}<!--'
 
         if element.id:
@@ -474,7 +568,7 @@ class ElementConstrutor:
                 else:
                     html += f" {key}"
 
-        for key, value in element.events.__dict__.items():
+        for key, value in ({} if static else element.events.__dict__).items():
             if value is not None:
                 html += f' _{key}="{self.create_event_id(value, key, element.uuid)}"'
 
@@ -515,10 +609,11 @@ class ElementConstrutor:
             if not child:
                 continue
             placeholder = "{{" + uuid + "}}"
-            if child.uuid in rendered_child_uuids:
+            if child.uuid in rendered_child_uuids or (static and is_client_script(child)):
                 final_content = final_content.replace(placeholder, '', 1)
+                rendered_child_uuids.add(child.uuid)
                 continue
-            child_html = self.to_html(child, indent + 4)
+            child_html = self.to_html(child, indent + 4, static=static)
             if placeholder in final_content:
                 final_content = final_content.replace(placeholder, child_html, 1)
             rendered_child_uuids.add(child.uuid)
@@ -527,8 +622,8 @@ class ElementConstrutor:
             if child.uuid in rendered_child_uuids:
                 continue
             placeholder = "{{" + child.uuid + "}}"
-            if placeholder not in raw_content:
-                final_content += '\n' + self.to_html(child, indent + 4)
+            if placeholder not in raw_content and not (static and is_client_script(child)):
+                final_content += '\n' + self.to_html(child, indent + 4, static=static)
 
         if final_content:
             if has_children or '\n' in final_content:
@@ -560,7 +655,7 @@ class ElementConstrutor:
         return content
 
     def create_event_id(self, event: Union[Callable, str], type: str, element_id: str = None):
-        from pyweber.core.events import EventBook
+        from pyweber.core.events import ElementEvents, EventBook
 
         element_id = element_id or self.uuid
 
@@ -585,6 +680,7 @@ class ElementConstrutor:
 
         elements = EventBook[event_id].setdefault('elements', {})
         bucket = elements.setdefault(element_id, [])
+        ElementEvents.setdefault(element_id, set()).add(event_id)
         event_name = type.removeprefix('on')
         if event_name not in bucket:
             bucket.append(event_name)
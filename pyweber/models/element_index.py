@@ -0,0 +1,183 @@
+"""Incremental lookup tables for a Template's element tree.
+
+The index is kept current by ``ChildElements`` mutations (attach/detach of
+whole subtrees) and by the ``uuid``/``id``/``tag``/``classes`` setters, so
+lookups by uuid, ``#id``, ``.class`` and tag never walk the tree.
+"""
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping, Optional
+
+if TYPE_CHECKING:
+    from pyweber.models.element import ElementConstrutor
+
+INDEX_ATTR = '_ElementConstrutor__index'
+
+def get_element_index(element: 'ElementConstrutor') -> Optional['ElementIndex']:
+    """Return the index ``element`` is registered in (``None`` when detached)."""
+    # Snapshots (``__slots__``) are never indexed
+    return getattr(element, '__dict__', {}).get(INDEX_ATTR) if element is not None else None
+
+def iter_subtree(element: 'ElementConstrutor') -> Iterator['ElementConstrutor']:
+    """Pre-order (document order) traversal without recursion."""
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        yield node
+        childs = node.childs
+        if childs:
+            stack.extend(reversed(childs))
+
+class ElementIndex:
+    def __init__(self, root: 'ElementConstrutor' = None):
+        self.__root = root
+        self.__by_uuid: dict[str, 'ElementConstrutor'] = {}
+        self.__by_id: dict[str, dict['ElementConstrutor', None]] = {}
+        self.__by_class: dict[str, dict['ElementConstrutor', None]] = {}
+        self.__by_tag: dict[str, dict['ElementConstrutor', None]] = {}
+        self.__keys: dict['ElementConstrutor', tuple] = {}
+
+        if root is not None:
+            self.add_subtree(root)
+
+    @property
+    def root(self):
+        return self.__root
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __contains__(self, element: 'ElementConstrutor'):
+        return element in self.__keys
+
+    def add_subtree(self, element: 'ElementConstrutor') -> None:
+        for node in iter_subtree(element):
+            node.__dict__[INDEX_ATTR] = self
+            self.__register(node)
+
+    def remove_subtree(self, element: 'ElementConstrutor') -> None:
+        for node in iter_subtree(element):
+            if node.__dict__.get(INDEX_ATTR) is self:
+                node.__dict__[INDEX_ATTR] = None
+            self.__unregister(node)
+
+    def update(self, element: 'ElementConstrutor') -> None:
+        """Re-read the indexed fields of ``element`` after a setter ran."""
+        if element in self.__keys:
+            self.__register(element)
+
+    def detach(self) -> None:
+        """Drop every back-reference (used when the Template swaps its root)."""
+        for node in list(self.__keys):
+            if node.__dict__.get(INDEX_ATTR) is self:
+                node.__dict__[INDEX_ATTR] = None
+        self.__keys.clear()
+        self.__by_uuid.clear()
+        self.__by_id.clear()
+        self.__by_class.clear()
+        self.__by_tag.clear()
+
+    def __register(self, node: 'ElementConstrutor') -> None:
+        if node in self.__keys:
+            self.__unregister(node)
+
+        uuid = node.__dict__.get('_ElementConstrutor__uuid')
+        id_ = node.__dict__.get('_ElementConstrutor__id')
+        tag = node.__dict__.get('_ElementConstrutor__tag')
+        classes = tuple(dict.fromkeys(node.__dict__.get('_ElementConstrutor__classes') or ()))
+
+        if uuid:
+            self.__by_uuid[uuid] = node
+        if id_:
+            self.__by_id.setdefault(id_, {})[node] = None
+        if tag:
+            self.__by_tag.setdefault(tag, {})[node] = None
+        for cls in classes:
+            if cls:
+                self.__by_class.setdefault(cls, {})[node] = None
+
+        self.__keys[node] = (uuid, id_, tag, classes)
+
+    def __unregister(self, node: 'ElementConstrutor') -> None:
+        keys = self.__keys.pop(node, None)
+        if keys is None:
+            return
+
+        uuid, id_, tag, classes = keys
+        if uuid and self.__by_uuid.get(uuid) is node:
+            del self.__by_uuid[uuid]
+        self.__discard(self.__by_id, id_, node)
+        self.__discard(self.__by_tag, tag, node)
+        for cls in classes:
+            self.__discard(self.__by_class, cls, node)
+
+    @staticmethod
+    def __discard(table: dict, key: str, node: 'ElementConstrutor') -> None:
+        if not key:
+            return
+        bucket = table.get(key)
+        if bucket is not None:
+            bucket.pop(node, None)
+            if not bucket:
+                del table[key]
+
+    def get_by_uuid(self, uuid: str) -> Optional['ElementConstrutor']:
+        return self.__by_uuid.get(uuid)
+
+    def get_by_id(self, id_: str) -> list['ElementConstrutor']:
+        return self.document_order(self.__by_id.get(id_, ()))
+
+    def get_by_class(self, *class_names: str) -> list['ElementConstrutor']:
+        """Elements carrying every class in ``class_names`` (document order)."""
+        buckets = [self.__by_class.get(name) for name in class_names]
+        if not buckets or any(not bucket for bucket in buckets):
+            return []
+
+        buckets.sort(key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        return self.document_order(node for node in smallest if all(node in bucket for bucket in rest))
+
+    def get_by_tag(self, tag: str) -> list['ElementConstrutor']:
+        return self.document_order(self.__by_tag.get(tag, ()))
+
+    def count(self, kind: str, key: str) -> int:
+        """Bucket size for ``kind`` in ``('id', 'class', 'tag')`` (cheap selectivity check)."""
+        table = {'id': self.__by_id, 'class': self.__by_class, 'tag': self.__by_tag}[kind]
+        return len(table.get(key, ()))
+
+    def bucket(self, kind: str, key: str) -> Iterable['ElementConstrutor']:
+        table = {'id': self.__by_id, 'class': self.__by_class, 'tag': self.__by_tag}[kind]
+        return table.get(key, {}).keys()
+
+    @property
+    def uuids(self) -> Mapping[str, 'ElementConstrutor']:
+        """Read-only live view of uuid → element."""
+        return MappingProxyType(self.__by_uuid)
+
+    @staticmethod
+    def document_order(elements: Iterable['ElementConstrutor']) -> list['ElementConstrutor']:
+        """Sort ``elements`` in pre-order without walking the whole tree.
+
+        Cost is O(k · depth) plus one sibling scan per distinct parent.
+        """
+        elements = list(elements)
+        if len(elements) < 2:
+            return elements
+
+        positions: dict[int, dict[int, int]] = {}
+
+        def path(node) -> list[int]:
+            out: list[int] = []
+            parent = node.parent
+            while parent is not None:
+                pos = positions.get(id(parent))
+                if pos is None:
+                    pos = positions[id(parent)] = {id(child): i for i, child in enumerate(parent.childs)}
+                out.append(pos.get(id(node), -1))
+                node, parent = parent, parent.parent
+            out.reverse()
+            return out
+
+        return sorted(elements, key=path)
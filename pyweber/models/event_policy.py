@@ -0,0 +1,116 @@
+"""Delivery policies for high-frequency DOM events.
+
+A policy decides how bursts of one event type on one element reach its
+handler:
+
+- ``throttle(ms)`` — at most one run per ``ms``; the latest event of the
+  interval runs when it ends
+- ``debounce(ms)`` — runs once the events stop for ``ms``, with the latest one
+- ``latest_wins()`` — runs right away; events arriving while the handler is
+  busy are collapsed into the latest, which runs when it frees up
+
+Under every policy the last event is delivered. Policies are rendered in the
+element's ``_policy`` attribute (``"input:debounce:150 mousemove:throttle:50"``)
+so the bundled client can enforce them before sending. The server enforces
+them in ``BaseWebsockets.message_handler`` (see ``pyweber.connection.event_gate``);
+events the client marks as ``gated`` only get ``latest_wins`` there, so a
+debounce is not waited out twice. Types without a declared policy use
+``DEFAULT_POLICIES``; everything else keeps the old behaviour (events arriving
+while the handler runs are dropped).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Literal, Optional, Union
+
+if TYPE_CHECKING:
+    from pyweber.models.element import ElementConstrutor
+
+POLICY_ATTR = '_policy'
+PolicyKind = Literal['throttle', 'debounce', 'latest']
+
+@dataclass(frozen=True)
+class EventPolicy:
+    kind: PolicyKind
+    wait_ms: int = 0
+
+    def __post_init__(self):
+        if self.kind not in ('throttle', 'debounce', 'latest'):
+            raise ValueError(f'Unknown event policy {self.kind!r}')
+        if self.wait_ms < 0:
+            raise ValueError('Event policy wait must not be negative')
+
+    @property
+    def wait(self) -> float:
+        return self.wait_ms / 1000
+
+    @classmethod
+    def parse(cls, text: str) -> 'EventPolicy':
+        kind, _, wait = text.strip().partition(':')
+        if kind in ('latest-wins', 'latest_wins'):
+            kind = 'latest'
+        return cls(kind=kind, wait_ms=int(wait or 0))
+
+    def __str__(self):
+        return self.kind if self.kind == 'latest' else f'{self.kind}:{self.wait_ms}'
+
+def throttle(ms: int) -> EventPolicy:
+    return EventPolicy('throttle', int(ms))
+
+def debounce(ms: int) -> EventPolicy:
+    return EventPolicy('debounce', int(ms))
+
+def latest_wins() -> EventPolicy:
+    return EventPolicy('latest')
+
+# Never drop the final keystroke / pointer position of a burst
+DEFAULT_POLICIES: dict[str, EventPolicy] = {
+    name: latest_wins() for name in (
+        'input', 'mousemove', 'pointermove', 'touchmove', 'scroll', 'wheel', 'drag', 'dragover',
+    )
+}
+
+def event_name(event_type: Union[str, Enum]) -> str:
+    """``'input'`` for ``'input'``, ``'oninput'`` or ``EventType.INPUT``."""
+    name = event_type.value if isinstance(event_type, Enum) else str(event_type)
+    return name[2:] if name.startswith('on') else name
+
+def as_policy(policy: Union[EventPolicy, str]) -> EventPolicy:
+    return policy if isinstance(policy, EventPolicy) else EventPolicy.parse(policy)
+
+def parse_policies(value: Optional[str]) -> dict[str, EventPolicy]:
+    """``{event: policy}`` from a ``_policy`` attribute; malformed entries are skipped."""
+    policies = {}
+    for item in (value or '').split():
+        name, _, policy = item.partition(':')
+        try:
+            policies[name] = EventPolicy.parse(policy)
+        except ValueError:
+            continue
+    return policies
+
+def format_policies(policies: dict[str, EventPolicy]) -> str:
+    return ' '.join(f'{name}:{policy}' for name, policy in sorted(policies.items()))
+
+def apply_policies(element: 'ElementConstrutor', policies: dict[str, Optional[EventPolicy]]):
+    """Merge ``policies`` into ``element``'s ``_policy`` attribute (``None`` removes one)."""
+    current = parse_policies(element.attrs.get(POLICY_ATTR))
+    for name, policy in policies.items():
+        if policy is None:
+            current.pop(name, None)
+        else:
+            current[name] = policy
+
+    if current:
+        element.attrs[POLICY_ATTR] = format_policies(current)
+    else:
+        element.attrs.pop(POLICY_ATTR, None)
+
+def event_policy(element: Any, event_type: Union[str, Enum]) -> Optional[EventPolicy]:
+    """Policy for ``event_type`` on ``element``: declared, else the default, else ``None``."""
+    name = event_name(event_type)
+    attrs = getattr(element, 'attrs', None) or {}
+    declared = parse_policies(attrs.get(POLICY_ATTR)).get(name)
+    return declared or DEFAULT_POLICIES.get(name)
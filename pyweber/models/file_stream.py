@@ -1,11 +1,21 @@
 import asyncio
-from typing import Union
+import struct
+from typing import Optional, Union
 from dataclasses import dataclass
 
 from pyweber.models.request import Request
 
 FILE_CHUNK_FUTURES: dict[str, asyncio.Future] = {}
 
+# Binary WebSocket frame with one chunk of a file, in either direction
+# (browser uploads read by ``app.stream``, downloads sent by ``send_file``):
+# magic (2) | flags (1) | len(file_id) (1) | file_id | offset (u64, big endian) | bytes
+FILE_FRAME_MAGIC = b'\xb7\x10'
+FILE_FRAME_ERROR = 0x01
+FILE_FRAME_CHUNK = 256 * 1024
+_FILE_FRAME_HEAD = struct.Struct('>2sBB')
+_FILE_FRAME_OFFSET = struct.Struct('>Q')
+
 @dataclass
 class FileResult:
     file_id: str
@@ -13,9 +23,39 @@ class FileResult:
     data: Union[bytes, str]
     code: int = 200
 
+@dataclass
+class FileFrame:
+    file_id: str
+    offset: int
+    data: bytes
+    error: bool = False
+
+def encode_file_frame(file_id: str, offset: int, data: bytes, error: bool = False) -> bytes:
+    key = file_id.encode('utf-8')
+    head = _FILE_FRAME_HEAD.pack(FILE_FRAME_MAGIC, FILE_FRAME_ERROR if error else 0, len(key))
+    return head + key + _FILE_FRAME_OFFSET.pack(offset) + bytes(data)
+
+def decode_file_frame(message: Union[bytes, bytearray, memoryview]) -> Optional[FileFrame]:
+    """``None`` unless ``message`` is a file frame."""
+    if len(message) < _FILE_FRAME_HEAD.size or bytes(message[:2]) != FILE_FRAME_MAGIC:
+        return None
+    _, flags, key_len = _FILE_FRAME_HEAD.unpack_from(message)
+    start = _FILE_FRAME_HEAD.size + key_len
+    if len(message) < start + _FILE_FRAME_OFFSET.size:
+        return None
+    (offset,) = _FILE_FRAME_OFFSET.unpack_from(message, start)
+    return FileFrame(
+        file_id=bytes(message[_FILE_FRAME_HEAD.size:start]).decode('utf-8', 'replace'),
+        offset=offset,
+        data=bytes(message[start + _FILE_FRAME_OFFSET.size:]),
+        error=bool(flags & FILE_FRAME_ERROR),
+    )
+
 class FileChunkManager:
     def __init__(self):
         self._futures: dict[str, asyncio.Future] = {}
+        # Windowed streams: one future per requested chunk, owned by a session
+        self._chunks: dict[tuple[str, int], tuple[Optional[str], asyncio.Future]] = {}
         self._lock = asyncio.Lock()
 
     def register(self, file_id: str):
@@ -65,4 +105,37 @@ class FileChunkManager:
 
         return result
 
+    def expect(self, file_id: str, offset: int, session_id: Optional[str] = None) -> asyncio.Future:
+        """Future for the chunk of ``file_id`` starting at ``offset``."""
+        future = asyncio.get_running_loop().create_future()
+        self._chunks[(file_id, offset)] = (session_id, future)
+        return future
+
+    def deliver(self, frame: FileFrame, session_id: Optional[str] = None) -> bool:
+        """Resolve the chunk ``frame`` answers; frames nobody waits for are dropped."""
+        pending = self._chunks.get((frame.file_id, frame.offset))
+        if pending is None:
+            return False
+        owner, future = pending
+        if owner is not None and owner != session_id:
+            return False
+        del self._chunks[(frame.file_id, frame.offset)]
+        if future.done():
+            return False
+        future.set_result(FileResult(
+            file_id=frame.file_id,
+            status='error' if frame.error else 'success',
+            data=frame.data.decode('utf-8', 'replace') if frame.error else frame.data,
+            code=400 if frame.error else 200,
+        ))
+        return True
+
+    def discard(self, file_id: str) -> int:
+        """Cancel the chunks still expected for ``file_id``."""
+        keys = [key for key in self._chunks if key[0] == file_id]
+        for key in keys:
+            _, future = self._chunks.pop(key)
+            future.cancel()
+        return len(keys)
+
 file_chunk_manager = FileChunkManager()
@@ -1,3 +1,5 @@
+import os
+from collections import OrderedDict
 from dataclasses import dataclass
 from threading import Lock
 from time import time
@@ -7,9 +9,33 @@ from pyweber.core.element import Element
 from pyweber.core.template import Template
 
 HANDOFF_TTL_SECONDS = 300
+HANDOFF_CAPACITY = 10_000
 HANDOFF_META_NAME = 'pyweber-handoff'
 
 
+def _setting(env: str, key: str, default: float) -> float:
+    from pyweber.config.config import config
+
+    value = os.environ.get(env)
+    if value is None:
+        value = config.get('session', key, default=default)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def handoff_ttl() -> float:
+    """Seconds a served page's template waits for its WebSocket."""
+    return _setting('PYWEBER_HANDOFF_TTL', 'handoff_ttl', HANDOFF_TTL_SECONDS)
+
+
+def handoff_capacity() -> int:
+    """Templates waiting for their WebSocket before the oldest is dropped."""
+    return int(_setting('PYWEBER_HANDOFF_CAPACITY', 'handoff_capacity', HANDOFF_CAPACITY))
+
+
 @dataclass
 class HandoffEntry:
     template: Template
@@ -17,60 +43,99 @@ class HandoffEntry:
     created_at: float
 
 
+@dataclass
+class HandoffStats:
+    created: int = 0
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+
 class TemplateHandoffRegistry:
     """One-shot HTTP → WS handoff of the **same** Template instance (move on consume).
 
     Storing a clone would type-erase subclasses and orphan ``self`` refs used by
     bound event handlers. The HTTP response and the future session share one object
     until ``consume`` moves it into the WebSocket session.
+
+    Entries are kept in creation order, so expired ones are always at the head
+    and are dropped there without scanning the rest. Above ``capacity`` the
+    oldest entry is evicted; its page falls back to ``clone_template``.
     """
 
-    def __init__(self, ttl: int = HANDOFF_TTL_SECONDS):
-        self._ttl = ttl
-        self._entries: dict[str, HandoffEntry] = {}
+    def __init__(self, ttl: int | None = None, capacity: int | None = None):
+        # ``None`` follows ``[session] handoff_ttl`` / ``handoff_capacity``
+        self._ttl_override = ttl
+        self._capacity_override = capacity
+        self._entries: OrderedDict[str, HandoffEntry] = OrderedDict()
         self._lock = Lock()
+        self.stats = HandoffStats()
 
     def create(self, template: Template, route: str) -> str:
         token = str(uuid4())
+        now = time()
         with self._lock:
-            self._purge_expired()
+            self._purge_expired(now)
+            capacity = self._capacity
+            while len(self._entries) >= capacity:
+                self._entries.popitem(last=False)
+                self.stats.evicted += 1
             self._entries[token] = HandoffEntry(
                 template=template,
                 route=route,
-                created_at=time(),
+                created_at=now,
             )
+            self.stats.created += 1
         return token
 
     def consume(self, token: str, route: str) -> Template | None:
-        if not token:
-            return None
-
         with self._lock:
-            entry = self._entries.pop(token, None)
+            entry = self._entries.pop(token, None) if token else None
 
-        if not entry:
-            return None
+            if not entry or entry.route != route:
+                self.stats.misses += 1
+                return None
 
-        if entry.route != route:
-            return None
+            if time() - entry.created_at > self._ttl:
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
 
-        if time() - entry.created_at > self._ttl:
-            return None
+            self.stats.hits += 1
+            return entry.template
 
-        return entry.template
+    @property
+    def _ttl(self) -> float:
+        return handoff_ttl() if self._ttl_override is None else self._ttl_override
+
+    @property
+    def _capacity(self) -> int:
+        return handoff_capacity() if self._capacity_override is None else max(self._capacity_override, 1)
+
+    def __len__(self):
+        return len(self._entries)
 
     def clear(self):
         with self._lock:
             self._entries.clear()
 
-    def _purge_expired(self):
-        now = time()
-        expired = [
-            token for token, entry in self._entries.items()
-            if now - entry.created_at > self._ttl
-        ]
-        for token in expired:
-            del self._entries[token]
+    def sweep(self) -> int:
+        """Drop expired entries (pages whose client never connected); returns how many."""
+        with self._lock:
+            return self._purge_expired(time())
+
+    def _purge_expired(self, now: float) -> int:
+        ttl = self._ttl
+        purged = 0
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if now - entry.created_at <= ttl:
+                break
+            self._entries.popitem(last=False)
+            purged += 1
+        self.stats.expired += purged
+        return purged
 
 
 def inject_handoff_token(template: Template, token: str) -> None:
@@ -0,0 +1,235 @@
+"""Copy-on-write snapshots of the Element tree.
+
+Every live element caches the last ``ElementSnapshot`` taken from it. Setters,
+``ChildElements`` mutations and tracked containers flag the element (own
+fields changed) and mark it and its ancestors stale. Taking a new snapshot only
+rebuilds stale paths; every clean subtree is the *same* immutable object as in
+the previous snapshot, so snapshot cost is proportional to what changed.
+
+Marking also stamps a process-wide version on every node it touches. A
+snapshot records the version of its node, so ``is_unchanged`` can tell in O(1)
+whether a live subtree still matches an older snapshot and diffing can skip it.
+
+``content_digest`` hashes everything a diff can emit for a subtree. Clones keep
+their uuids, so two sessions whose current trees and baselines have equal
+digests receive byte-identical diffs, which lets a broadcast render once.
+"""
+
+from __future__ import annotations
+
+from hashlib import blake2b
+from itertools import count
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Optional
+
+if TYPE_CHECKING:
+    from pyweber.core.template import Template
+    from pyweber.models.element import ElementConstrutor
+
+SNAPSHOT_ATTR = '_ElementConstrutor__snapshot'
+STALE_ATTR = '_ElementConstrutor__stale'
+DIRTY_ATTR = '_ElementConstrutor__dirty'
+VERSION_ATTR = '_ElementConstrutor__version'
+
+_versions = count(1)
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+def active_events(events: Any) -> dict[str, Any]:
+    """Assigned handlers of a ``TemplateEvents`` (or a snapshot's events mapping)."""
+    if isinstance(events, Mapping):
+        return dict(events)
+    return {name: handler for name, handler in vars(events).items() if handler is not None}
+
+class ElementFields:
+    """Own (non-child) state of one element, shared between snapshots while unchanged."""
+
+    __slots__ = ('tag', 'id', 'classes', 'attrs', 'style', 'content', 'value', 'events', 'sanitize')
+
+    def __init__(self, element: 'ElementConstrutor'):
+        self.tag: str = element.tag
+        self.id: Optional[str] = element.id
+        self.classes: tuple[str, ...] = tuple(element.classes or ())
+        self.attrs: Mapping[str, Any] = MappingProxyType(dict(element.attrs)) if element.attrs else _EMPTY
+        self.style: Mapping[str, str] = MappingProxyType(dict(element.style)) if element.style else _EMPTY
+        self.content: Optional[str] = element.content
+        self.value: Optional[str] = element.value
+        self.events: Mapping[str, Any] = MappingProxyType(active_events(element.events))
+        self.sanitize: bool = element.sanitize
+
+class ElementSnapshot:
+    """Immutable element state; ``childs`` are snapshots shared with older versions."""
+
+    __slots__ = ('uuid', 'fields', 'childs', 'version', 'calls', 'merkle', 'digest')
+
+    def __init__(
+        self,
+        uuid: str,
+        fields: ElementFields,
+        childs: tuple['ElementSnapshot', ...],
+        version: int = 0,
+        calls: bool = False,
+    ):
+        self.uuid = uuid
+        self.fields = fields
+        self.childs = childs
+        self.version = version
+        # Element methods (``focus()``, …) were queued here or below
+        self.calls = calls
+        # Structure hash, filled in lazily by ``pyweber.models.dom_hash``
+        self.merkle: Optional[str] = None
+        # Content hash, filled in lazily by ``content_digest``
+        self.digest: Optional[str] = None
+
+    def __repr__(self):
+        return f'ElementSnapshot(uuid={self.uuid!r}, tag={self.tag!r}, childs={len(self.childs)})'
+
+    tag = property(lambda self: self.fields.tag)
+    id = property(lambda self: self.fields.id)
+    classes = property(lambda self: list(self.fields.classes))
+    attrs = property(lambda self: self.fields.attrs)
+    style = property(lambda self: self.fields.style)
+    content = property(lambda self: self.fields.content)
+    value = property(lambda self: self.fields.value)
+    events = property(lambda self: self.fields.events)
+
+    def iter(self) -> Iterator['ElementSnapshot']:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.childs))
+
+    def find_tag(self, tag: str) -> Optional['ElementSnapshot']:
+        return next((node for node in self.iter() if node.tag == tag), None)
+
+class TemplateSnapshot:
+    """Point-in-time view of a Template; stored as ``Session.old_template``."""
+
+    __slots__ = ('root', 'include_uuid')
+
+    def __init__(self, root: ElementSnapshot, include_uuid: bool = True):
+        self.root = root
+        self.include_uuid = include_uuid
+
+    def __repr__(self):
+        return f'TemplateSnapshot(root={self.root!r})'
+
+    @property
+    def head(self) -> Optional[ElementSnapshot]:
+        return self.__top_level('head')
+
+    @property
+    def body(self) -> Optional[ElementSnapshot]:
+        return self.__top_level('body')
+
+    def __top_level(self, tag: str) -> Optional[ElementSnapshot]:
+        if self.root.tag == tag:
+            return self.root
+        return next((child for child in self.root.childs if child.tag == tag), None) or self.root.find_tag(tag)
+
+def mark_changed(element: 'ElementConstrutor', own: bool = True) -> None:
+    """Flag ``element`` (own fields when ``own``) and mark its snapshotted ancestors stale."""
+    version = next(_versions)
+    if own:
+        element.__dict__[DIRTY_ATTR] = True
+
+    node = element
+    while node is not None:
+        state = node.__dict__
+        if state.get(STALE_ATTR) or state.get(SNAPSHOT_ATTR) is None:
+            # Already stale ⇒ ancestors are too; never snapshotted ⇒ its parent
+            # was marked when this node was attached.
+            if state.get(SNAPSHOT_ATTR) is None and node is element:
+                state[VERSION_ATTR] = version
+                node = getattr(node, 'parent', None)
+                continue
+            break
+        state[STALE_ATTR] = True
+        state[VERSION_ATTR] = version
+        node = getattr(node, 'parent', None)
+
+def element_version(element: 'ElementConstrutor') -> int:
+    """Version stamped by the last ``mark_changed`` that reached ``element``."""
+    return element.__dict__.get(VERSION_ATTR, 0)
+
+def is_unchanged(element: 'ElementConstrutor', snapshot: ElementSnapshot) -> bool:
+    """True when neither ``element`` nor any descendant changed since ``snapshot``."""
+    state = element.__dict__
+    return (
+        snapshot.uuid == state.get('_ElementConstrutor__uuid')
+        and snapshot.version == state.get(VERSION_ATTR, 0)
+    )
+
+def fields_unchanged(element: 'ElementConstrutor', snapshot: ElementSnapshot) -> bool:
+    """True when ``element``'s own fields are still those recorded in ``snapshot``."""
+    state = element.__dict__
+    cached: Optional[ElementSnapshot] = state.get(SNAPSHOT_ATTR)
+    return not state.get(DIRTY_ATTR) and cached is not None and cached.fields is snapshot.fields
+
+def take_snapshot(element: 'ElementConstrutor') -> ElementSnapshot:
+    """Snapshot ``element``, reusing every cached clean subtree (clears marks)."""
+    state = element.__dict__
+    previous: Optional[ElementSnapshot] = state.get(SNAPSHOT_ATTR)
+
+    if previous is not None and not state.get(STALE_ATTR) and not state.get(DIRTY_ATTR):
+        return previous
+
+    childs = tuple(take_snapshot(child) for child in element.childs)
+
+    if previous is not None and not state.get(DIRTY_ATTR):
+        fields = previous.fields
+    else:
+        fields = ElementFields(element)
+
+    # Versions are unique per live node state, never shared between trees
+    version = state.get(VERSION_ATTR)
+    if not version:
+        version = state[VERSION_ATTR] = next(_versions)
+    methods = getattr(element, 'get_element_methods', None)
+    calls = bool(methods and methods()) or any(child.calls for child in childs)
+    snapshot = ElementSnapshot(uuid=element.uuid, fields=fields, childs=childs, version=version, calls=calls)
+    state[SNAPSHOT_ATTR] = snapshot
+    state[STALE_ATTR] = False
+    state[DIRTY_ATTR] = False
+    return snapshot
+
+def snapshot_template(template: 'Template') -> TemplateSnapshot:
+    return TemplateSnapshot(root=take_snapshot(template.root), include_uuid=getattr(template, 'include_uuid', True))
+
+def content_digest(node: ElementSnapshot) -> str:
+    """Hash of ``node``'s subtree: uuids, own fields and event handlers (memoised)."""
+    stack: list[tuple[ElementSnapshot, bool]] = [(node, False)]
+    while stack:
+        current, ready = stack.pop()
+        if current.digest is not None:
+            continue
+        if not ready:
+            stack.append((current, True))
+            stack.extend((child, False) for child in current.childs if child.digest is None)
+            continue
+
+        fields = current.fields
+        # Event ids are rendered from the handler's identity
+        events = tuple(
+            (name, handler if isinstance(handler, str) else id(handler))
+            for name, handler in fields.events.items()
+        )
+        state = (
+            current.uuid, fields.tag, fields.id, fields.classes,
+            tuple(fields.attrs.items()), tuple(fields.style.items()),
+            fields.content, fields.value, events, fields.sanitize,
+            tuple(child.digest for child in current.childs),
+        )
+        current.digest = blake2b(repr(state).encode('utf-8'), digest_size=16).hexdigest()
+    return node.digest
+
+def template_digest(snapshot: TemplateSnapshot) -> Optional[str]:
+    """``content_digest`` of a whole template; ``None`` while element methods are queued.
+
+    Rendering a diff consumes queued methods from the live tree it ran on, so
+    such a template cannot share another session's render.
+    """
+    if snapshot.root.calls:
+        return None
+    return f'{int(snapshot.include_uuid)}:{content_digest(snapshot.root)}'
@@ -39,34 +39,49 @@ class StreamStats:
 
 
 class AdaptiveController:
-    """Controla chunk_size e interval dinamicamente"""
+    """Controla chunk_size, interval e a janela de chunks em voo dinamicamente"""
 
-    def __init__(self, max_size: int):
+    MAX_WINDOW = 16
+
+    def __init__(self, max_size: int, window: int = 4):
         self.max_size = max_size
-        self.chunk_size = 1024 * 64
+        self.chunk_size = min(1024 * 64, max_size)
         self.interval_ms = 50
+        self.window = max(1, min(window, self.MAX_WINDOW))
+        self.min_rtt_ms: float | None = None
         self._MIN_CHUNK = 1024
         self._MIN_INTERVAL = 10
         self._MAX_INTERVAL = 1000
+        self._last_delivery_ms: float | None = None
         self.stats = StreamStats()  # ✅ estatísticas integradas
 
-    def update(self, received_bytes: int, elapsed_ms: float):
-        throughput = received_bytes / max(elapsed_ms, 1)  # bytes/ms
+    def update(self, received_bytes: int, elapsed_ms: float, now_ms: float | None = None):
+        """``elapsed_ms``: do pedido à chegada deste chunk (inclui a espera atrás dos outros em voo)."""
+        now_ms = time() * 1000 if now_ms is None else now_ms
+        # Com vários chunks em voo, o intervalo entre chegadas mede a largura de banda
+        gap_ms = elapsed_ms if self._last_delivery_ms is None else min(now_ms - self._last_delivery_ms, elapsed_ms)
+        self._last_delivery_ms = now_ms
+        throughput = received_bytes / max(gap_ms, 1)  # bytes/ms
 
         # ajusta chunk
         ideal = int(throughput * self.interval_ms)
         self.chunk_size = max(self._MIN_CHUNK, min(ideal, self.max_size))
 
         # ajusta intervalo
-        if elapsed_ms < self.interval_ms * 0.5:
+        if gap_ms < self.interval_ms * 0.5:
             self.interval_ms = max(self._MIN_INTERVAL, int(self.interval_ms * 0.8))
-        elif elapsed_ms > self.interval_ms * 1.5:
+        elif gap_ms > self.interval_ms * 1.5:
             self.interval_ms = min(self._MAX_INTERVAL, int(self.interval_ms * 1.2))
 
+        # ajusta janela: produto largura de banda × atraso (em chunks) + 1 de folga
+        self.min_rtt_ms = elapsed_ms if self.min_rtt_ms is None else min(self.min_rtt_ms, elapsed_ms)
+        in_flight = -(-int(throughput * self.min_rtt_ms) // self.chunk_size) + 1
+        self.window = max(1, min(in_flight, self.MAX_WINDOW))
+
         # ✅ actualiza estatísticas
         self.stats.total_bytes += received_bytes
         self.stats.total_chunks += 1
-        self.stats.elapsed_ms += elapsed_ms
+        self.stats.elapsed_ms += gap_ms
 
     def progress(self, file_size: int) -> dict:
         """Progresso do download"""
@@ -89,3 +104,4 @@ class AdaptiveController:
     def reset_stats(self):
         """Reinicia estatísticas para novo stream"""
         self.stats = StreamStats()
+        self._last_delivery_ms = None
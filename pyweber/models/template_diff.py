@@ -1,5 +1,6 @@
 from pyweber.core.element import Element
 from pyweber.core.template import Template
+from pyweber.models.snapshot import ElementSnapshot, TemplateSnapshot, active_events, fields_unchanged, is_unchanged
 from typing import Literal, Union, Any
 
 class TemplateDiff:
@@ -12,11 +13,23 @@ class TemplateDiff:
 
     def __raise_typr_error(self, *elements: Element):
         for element in elements:
-            if not isinstance(element, Element):
+            if not isinstance(element, (Element, ElementSnapshot)):
                 raise TypeError(f'all elements must be Element instances, but got {type(element).__name__}')
 
-    def track_differences(self, new_element: Union[Element, Template], old_element: Union[Element, Template]):
-        if isinstance(old_element, Template):
+    def track_differences(
+        self,
+        new_element: Union[Element, Template],
+        old_element: Union[Element, ElementSnapshot, Template, TemplateSnapshot],
+        old_parent: str = None
+    ):
+        """Diff ``new_element`` against ``old_element``.
+
+        ``old_element`` may be an immutable snapshot, which has no parent pointer;
+        ``old_parent`` carries its parent uuid in that case. Against a snapshot
+        only the paths marked since it was taken are visited: clean subtrees
+        are skipped by version and clean nodes skip the field comparison.
+        """
+        if isinstance(old_element, (Template, TemplateSnapshot)):
             old_element = old_element.root
 
         if isinstance(new_element, Template):
@@ -24,11 +37,16 @@ class TemplateDiff:
 
         self.__raise_typr_error(old_element, new_element)
 
+        if isinstance(old_element, ElementSnapshot) and is_unchanged(new_element, old_element):
+            return
+
         status = None
         methods = new_element.get_element_methods()
 
         if new_element.uuid != old_element.uuid:
             status = 'Added'
+        elif isinstance(old_element, ElementSnapshot) and fields_unchanged(new_element, old_element):
+            status = 'Changed' if methods else None
         else:
             if new_element.id != old_element.id:
                 status = 'Changed'
@@ -42,7 +60,7 @@ class TemplateDiff:
                 status = 'Changed'
             elif new_element.style != old_element.style:
                 status = 'Changed'
-            elif new_element.events.__dict__ != old_element.events.__dict__:
+            elif active_events(new_element.events) != active_events(old_element.events):
                 status = 'Changed'
             elif [v for v in new_element.classes if v not in old_element.classes]:
                 status = 'Changed'
@@ -55,7 +73,7 @@ class TemplateDiff:
             self.add_element_on_diff(element=new_element, status=status, methods=methods)
 
             if status == 'Added':
-                self.add_element_on_diff(element=old_element, status='Removed', methods=methods)
+                self.add_element_on_diff(element=old_element, status='Removed', methods=methods, parent=old_parent)
 
             self.__checked_elements.append(new_element.uuid)
 
@@ -64,13 +82,15 @@ class TemplateDiff:
 
         for uuid, old_child in old_element_childs_map.items():
             if uuid in new_element_childs_map:
-                if old_child.parent and old_child.parent.uuid not in self.__checked_elements:
-                    self.track_differences(new_element_childs_map[uuid], old_child)
+                if isinstance(old_child, ElementSnapshot) and is_unchanged(new_element_childs_map[uuid], old_child):
+                    continue
+                if old_element.uuid not in self.__checked_elements:
+                    self.track_differences(new_element_childs_map[uuid], old_child, old_parent=old_element.uuid)
             else:
                 # ✅ só marca Removed se o pai NÃO está já no diff como Changed
-                parent_uuid = old_child.parent.uuid if old_child.parent else None
+                parent_uuid = old_element.uuid
                 if parent_uuid not in self.__differences or self.__differences[parent_uuid]['status'] != 'Changed':
-                    self.add_element_on_diff(element=old_child, status='Removed', methods=methods)
+                    self.add_element_on_diff(element=old_child, status='Removed', methods=methods, parent=parent_uuid)
 
         for uuid, new_child in new_element_childs_map.items():
             if uuid not in old_element_childs_map:
@@ -79,9 +99,18 @@ class TemplateDiff:
                 if parent_uuid not in self.__differences or self.__differences[parent_uuid]['status'] != 'Changed':
                     self.add_element_on_diff(element=new_child, status='Added', methods=methods)
 
-    def add_element_on_diff(self, element: Element, status: Literal['Added', 'Changed', 'Removed'], methods: dict[str, dict[str, Any]]):
+    def add_element_on_diff(
+        self,
+        element: Union[Element, ElementSnapshot],
+        status: Literal['Added', 'Changed', 'Removed'],
+        methods: dict[str, dict[str, Any]],
+        parent: str = None
+    ):
+        if parent is None and getattr(element, 'parent', None):
+            parent = element.parent.uuid
+
         self.differences[element.uuid] = {
-            'parent': element.parent.uuid if element.parent else None,
+            'parent': parent,
             'element': element.to_html() if status in ['Added', 'Changed'] else element.uuid,
             'status': status
         }
@@ -0,0 +1,267 @@
+"""Fine-grained DOM patch operations between a snapshot and the live tree.
+
+``TemplateDiff`` ships the full ``to_html()`` of every changed node. For
+clients that announce the ``patch`` feature the server instead sends a list of
+small operations applied in order by ``applyPatch`` in ``static/js.js``:
+
+- ``set-text`` ``{uuid, text}`` — leaf text content
+- ``set-attr`` ``{uuid, name, value}`` / ``remove-attr`` ``{uuid, name}``
+- ``add-class`` / ``remove-class`` ``{uuid, names}``
+- ``set-style`` ``{uuid, props}`` — a ``None`` value removes the property
+- ``set-value`` ``{uuid, value}``
+- ``insert`` ``{parent, before, html}`` — ``before`` ``None`` appends
+- ``move`` ``{uuid, parent, before}`` / ``remove`` ``{uuid}``
+- ``replace`` ``{uuid, html}`` — fallback when no finer op applies
+- ``call`` ``{uuid, methods}`` — element methods (``focus()``, …)
+
+Children are reconciled by key: the ``key`` attribute when every sibling has a
+distinct one, otherwise the uuid. Kept children on the longest increasing
+subsequence of their old positions stay put; only the others are moved, so
+sorting, shuffling, prepending or appending costs the minimum number of ops.
+A child matched by ``key`` but rebuilt with a new uuid is renamed in place
+(``set-attr`` ``uuid``) and patched instead of being re-sent.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Union
+
+from pyweber.core.element import Element
+from pyweber.core.template import Template
+from pyweber.models.snapshot import ElementSnapshot, TemplateSnapshot, active_events, fields_unchanged, is_unchanged
+
+if TYPE_CHECKING:
+    from pyweber.models.element import ElementConstrutor
+
+_PLACEHOLDER = re.compile(r'\{\{(.*?)\}\}')
+_RAW_TEXT_TAGS = frozenset({'script', 'style'})
+
+def render_order(content: Optional[str], childs: Iterable[Any]) -> list[str]:
+    """Child uuids in the order ``to_html`` renders them (placeholders first)."""
+    childs = list(childs)
+    known = {child.uuid for child in childs}
+    order: list[str] = []
+    seen: set[str] = set()
+    for key in _PLACEHOLDER.findall(content or ''):
+        key = key.strip()
+        if key in known and key not in seen:
+            order.append(key)
+            seen.add(key)
+    order.extend(child.uuid for child in childs if child.uuid not in seen)
+    return order
+
+def _own_text(content: Optional[str], child_uuids: Iterable[str]) -> str:
+    child_uuids = set(child_uuids)
+    return _PLACEHOLDER.sub(lambda match: '' if match.group(1).strip() in child_uuids else match.group(0), content or '')
+
+def child_key(child: Any) -> str:
+    """Reconciliation key: the ``key`` attribute, falling back to the uuid."""
+    key = child.attrs.get('key')
+    return str(key) if key not in (None, '') else child.uuid
+
+def longest_increasing_subsequence(sequence: list[int]) -> set[int]:
+    """Positions (into ``sequence``) of one longest strictly increasing subsequence."""
+    tails: list[int] = []                 # positions of the smallest tail for each length
+    previous: list[int] = [-1] * len(sequence)
+
+    for position, value in enumerate(sequence):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if sequence[tails[middle]] < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low:
+            previous[position] = tails[low - 1]
+        if low == len(tails):
+            tails.append(position)
+        else:
+            tails[low] = position
+
+    result: set[int] = set()
+    position = tails[-1] if tails else -1
+    while position >= 0:
+        result.add(position)
+        position = previous[position]
+    return result
+
+def _keyed(childs: list[Any]) -> Optional[dict[str, Any]]:
+    keyed = {child_key(child): child for child in childs}
+    return keyed if len(keyed) == len(childs) else None
+
+def _rendered_attrs(attrs: Any) -> dict[str, str]:
+    # Mirrors ElementConstrutor.to_html: None is skipped, booleans/empties are bare.
+    rendered = {}
+    for key, value in attrs.items():
+        if value is None:
+            continue
+        rendered[key] = str(value) if value and value not in [True, False] else ''
+    return rendered
+
+class TemplatePatch:
+    def __init__(self):
+        self.__operations: list[dict[str, Any]] = []
+
+    @property
+    def operations(self): return self.__operations
+
+    def track_patches(
+        self,
+        new_element: Union['ElementConstrutor', Template],
+        old_element: Union[ElementSnapshot, TemplateSnapshot]
+    ):
+        """Append the operations turning ``old_element`` into ``new_element``."""
+        if isinstance(new_element, Template):
+            new_element = new_element.root
+
+        if isinstance(old_element, TemplateSnapshot):
+            old_element = old_element.root
+
+        if not isinstance(new_element, Element) or not isinstance(old_element, ElementSnapshot):
+            raise TypeError('track_patches expects a live Element and an ElementSnapshot')
+
+        self.__patch_node(new_element, old_element)
+
+    def __patch_node(self, new_element: 'ElementConstrutor', old_element: ElementSnapshot, renamed: bool = False):
+        if is_unchanged(new_element, old_element):
+            return
+
+        if new_element.uuid != old_element.uuid and not renamed:
+            self.__replace(new_element, old_element.uuid)
+            return
+
+        if not fields_unchanged(new_element, old_element) and not self.__patch_fields(new_element, old_element):
+            self.__replace(new_element, old_element.uuid)
+            return
+
+        if not self.__patch_childs(new_element, old_element):
+            self.__replace(new_element, old_element.uuid)
+            return
+
+        methods = new_element.get_element_methods()
+        if methods:
+            self.__add('call', uuid=new_element.uuid, methods={**methods})
+            new_element.remove_element_methods()
+
+    def __add(self, op: str, **fields: Any):
+        self.__operations.append({'op': op, **fields})
+
+    def __replace(self, element: 'ElementConstrutor', uuid: str):
+        self.__add('replace', uuid=uuid, html=element.to_html())
+        self.__call_subtree(element)
+
+    def __call_subtree(self, element: 'ElementConstrutor'):
+        """Emit ``call`` ops for methods queued anywhere in freshly rendered markup."""
+        pending = [element]
+        while pending:
+            node = pending.pop()
+            methods = node.get_element_methods()
+            if methods:
+                self.__add('call', uuid=node.uuid, methods={**methods})
+                node.remove_element_methods()
+            pending.extend(reversed(node.childs))
+
+    def __patch_fields(self, new: 'ElementConstrutor', old: ElementSnapshot) -> bool:
+        """Emit own-field ops; ``False`` when only a ``replace`` can express the change."""
+        if new.tag != old.tag or new.sanitize != old.fields.sanitize:
+            return False
+
+        uuid = new.uuid
+
+        if old.childs or new.childs:
+            # Placeholders left behind by removed children are ignored as well
+            child_uuids = {child.uuid for child in old.childs} | {child.uuid for child in new.childs}
+            if _own_text(old.content, child_uuids) != _own_text(new.content, child_uuids):
+                return False
+        elif new.content != old.content:
+            content = new.content or ''
+            if '{{' in content or not new.sanitize or str(new.tag).lower() in _RAW_TEXT_TAGS:
+                return False
+            self.__add('set-text', uuid=uuid, text=content)
+
+        if new.id != old.id:
+            if new.id:
+                self.__add('set-attr', uuid=uuid, name='id', value=new.id)
+            else:
+                self.__add('remove-attr', uuid=uuid, name='id')
+
+        new_classes = [name for name in new.classes if name]
+        old_classes = [name for name in old.classes if name]
+        added = [name for name in new_classes if name not in old_classes]
+        removed = [name for name in old_classes if name not in new_classes]
+        if added:
+            self.__add('add-class', uuid=uuid, names=added)
+        if removed:
+            self.__add('remove-class', uuid=uuid, names=removed)
+
+        if new.value != old.value:
+            self.__add('set-value', uuid=uuid, value=new.value if new.value is not None else '')
+
+        new_attrs, old_attrs = _rendered_attrs(new.attrs), _rendered_attrs(old.attrs)
+        for name, value in new_attrs.items():
+            if old_attrs.get(name) != value:
+                self.__add('set-attr', uuid=uuid, name=name, value=value)
+        for name in old_attrs.keys() - new_attrs.keys():
+            self.__add('remove-attr', uuid=uuid, name=name)
+
+        new_style, old_style = dict(new.style), dict(old.style)
+        props = {key: value for key, value in new_style.items() if old_style.get(key) != value}
+        props.update({key: None for key in old_style.keys() - new_style.keys()})
+        if props:
+            self.__add('set-style', uuid=uuid, props=props)
+
+        new_events, old_events = active_events(new.events), active_events(old.events)
+        for name, handler in new_events.items():
+            if old_events.get(name) is not handler or new.uuid != old.uuid:
+                self.__add('set-attr', uuid=uuid, name=f'_{name}', value=new.create_event_id(handler, name, uuid))
+        for name in old_events.keys() - new_events.keys():
+            self.__add('remove-attr', uuid=uuid, name=f'_{name}')
+
+        return True
+
+    def __patch_childs(self, new: 'ElementConstrutor', old: ElementSnapshot) -> bool:
+        """Emit remove/rename/insert/move ops for the child list, then recurse."""
+        old_by_uuid = {child.uuid: child for child in old.childs}
+        new_by_uuid = {child.uuid: child for child in new.childs}
+        old_childs = [old_by_uuid[uuid] for uuid in render_order(old.content, old.childs)]
+        new_childs = [new_by_uuid[uuid] for uuid in render_order(new.content, new.childs)]
+
+        old_keyed, new_keyed = _keyed(old_childs), _keyed(new_childs)
+        if old_keyed is None or new_keyed is None:
+            old_keyed = {child.uuid: child for child in old_childs}
+            new_keyed = {child.uuid: child for child in new_childs}
+
+        old_keys, new_keys = list(old_keyed), list(new_keyed)
+        old_index = {key: position for position, key in enumerate(old_keys)}
+        kept = [key for key in new_keys if key in old_index]
+        stable = {kept[position] for position in longest_increasing_subsequence([old_index[key] for key in kept])}
+
+        # Moving elements across interleaved text would misplace the text
+        if len(stable) != len(kept) and _own_text(new.content, old_by_uuid.keys() | new_by_uuid.keys()).strip():
+            return False
+
+        for key in old_keys:
+            if key not in new_keyed:
+                self.__add('remove', uuid=old_keyed[key].uuid)
+
+        for key in kept:
+            if new_keyed[key].uuid != old_keyed[key].uuid:
+                self.__add('set-attr', uuid=old_keyed[key].uuid, name='uuid', value=new_keyed[key].uuid)
+
+        if old_keys != new_keys:
+            before = None
+            for key in reversed(new_keys):
+                child = new_keyed[key]
+                if key not in old_index:
+                    self.__add('insert', parent=new.uuid, before=before, html=child.to_html())
+                    self.__call_subtree(child)
+                elif key not in stable:
+                    self.__add('move', uuid=child.uuid, parent=new.uuid, before=before)
+                before = child.uuid
+
+        for key in kept:
+            self.__patch_node(new_keyed[key], old_keyed[key], renamed=True)
+
+        return True
@@ -0,0 +1,137 @@
+"""Containers that report in-place mutations back to their owning Element.
+
+``element.classes.append('x')`` or ``element.attrs['href'] = ...`` bypass the
+property setters, so the owner would never learn about the change.
+``TrackedList`` / ``TrackedDict`` call ``owner._field_changed(field)`` after
+every mutating method.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import Any, Iterable
+
+
+class _OwnerNotifier:
+    __slots__ = ()
+
+    def _bind(self, owner: Any, field: str) -> None:
+        self._owner_ref = weakref.ref(owner) if owner is not None else None
+        self._field = field
+
+    def _notify(self) -> None:
+        owner = self._owner_ref() if self._owner_ref is not None else None
+        if owner is not None:
+            owner._field_changed(self._field)
+
+
+class TrackedList(_OwnerNotifier, list):
+    __slots__ = ('_owner_ref', '_field')
+
+    def __init__(self, items: Iterable[Any] = (), owner: Any = None, field: str = None):
+        super().__init__(items)
+        self._bind(owner, field)
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are detached plain lists; setters re-wrap them.
+        return (list, (list(self),))
+
+    def append(self, item):
+        super().append(item)
+        self._notify()
+
+    def extend(self, items):
+        super().extend(items)
+        self._notify()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._notify()
+
+    def remove(self, item):
+        super().remove(item)
+        self._notify()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._notify()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._notify()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._notify()
+
+    def reverse(self):
+        super().reverse()
+        self._notify()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._notify()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._notify()
+
+    def __iadd__(self, items):
+        result = super().__iadd__(items)
+        self._notify()
+        return result
+
+    def __imul__(self, count):
+        result = super().__imul__(count)
+        self._notify()
+        return result
+
+
+class TrackedDict(_OwnerNotifier, dict):
+    __slots__ = ('_owner_ref', '_field')
+
+    def __init__(self, items: Any = (), owner: Any = None, field: str = None):
+        super().__init__(items)
+        self._bind(owner, field)
+
+    def __reduce_ex__(self, protocol):
+        return (dict, (dict(self),))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._notify()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._notify()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._notify()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._notify()
+        return result
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        super().__setitem__(key, default)
+        self._notify()
+        return default
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._notify()
+
+    def clear(self):
+        super().clear()
+        self._notify()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._notify()
+        return result
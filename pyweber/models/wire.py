@@ -0,0 +1,223 @@
+"""Server → browser wire encodings, negotiated per session.
+
+Clients announce what they can decode in the ``features`` list of every
+message (the handshake included). The server picks the richest encoding both
+sides share and falls back to the original indented JSON for old clients:
+
+- legacy — ``json.dumps(..., indent=4)``, unchanged
+- ``compact`` — protocol v2 JSON: no whitespace, patch operations as arrays
+  headed by a one-letter op code, uuids interned into a per-message table
+- ``binary`` — the same v2 envelope as a tiny TLV document (binary frame),
+  decoded by ``decodeBinary`` in ``static/js.js``
+
+A v2 envelope is ``{"v": 2, "i": [uuid, ...], "p": [[code, ...], ...], ...}``
+where every other key of the message is kept as is. Operations reference uuids
+by their position in ``i``; the table is rebuilt for every message so no state
+is shared between frames.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Iterable, Union
+
+WIRE_VERSION = 2
+
+# op name → (code, positional fields); uuid-like fields are interned
+OP_CODES: dict[str, tuple[str, tuple[str, ...]]] = {
+    'set-text': ('t', ('uuid', 'text')),
+    'set-attr': ('a', ('uuid', 'name', 'value')),
+    'remove-attr': ('A', ('uuid', 'name')),
+    'add-class': ('c', ('uuid', 'names')),
+    'remove-class': ('C', ('uuid', 'names')),
+    'set-style': ('s', ('uuid', 'props')),
+    'set-value': ('v', ('uuid', 'value')),
+    'insert': ('i', ('parent', 'before', 'html')),
+    'move': ('m', ('uuid', 'parent', 'before')),
+    'remove': ('r', ('uuid',)),
+    'replace': ('R', ('uuid', 'html')),
+    'call': ('f', ('uuid', 'methods')),
+}
+OP_NAMES: dict[str, str] = {code: name for name, (code, _) in OP_CODES.items()}
+_ID_FIELDS = frozenset({'uuid', 'parent', 'before'})
+
+# TLV type tags
+_NULL, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _MAP = range(8)
+BINARY_MAGIC = b'\xb7\x02'      # never a valid UTF-8 start byte
+
+def negotiate(features: Iterable[str]) -> str:
+    """Wire format for a client that announced ``features``."""
+    features = set(features or ())
+    if 'binary' in features:
+        return 'binary'
+    if 'compact' in features:
+        return 'compact'
+    return 'legacy'
+
+def compact_patch(operations: list[dict[str, Any]]) -> tuple[list[str], list[list[Any]]]:
+    """Turn patch operations into ``(ids, rows)`` with short codes and interned uuids."""
+    ids: list[str] = []
+    index: dict[str, int] = {}
+
+    def intern(uuid: Any) -> Any:
+        if uuid is None:
+            return None
+        if uuid not in index:
+            index[uuid] = len(ids)
+            ids.append(uuid)
+        return index[uuid]
+
+    rows = []
+    for operation in operations:
+        code, fields = OP_CODES[operation['op']]
+        rows.append([code, *(
+            intern(operation.get(field)) if field in _ID_FIELDS else operation.get(field)
+            for field in fields
+        )])
+    return ids, rows
+
+def expand_patch(ids: list[str], rows: list[list[Any]]) -> list[dict[str, Any]]:
+    """Inverse of ``compact_patch`` (what the browser does before ``applyPatch``)."""
+    operations = []
+    for code, *values in rows:
+        name = OP_NAMES[code]
+        operation: dict[str, Any] = {'op': name}
+        for field, value in zip(OP_CODES[name][1], values):
+            operation[field] = ids[value] if field in _ID_FIELDS and value is not None else value
+        operations.append(operation)
+    return operations
+
+def to_envelope(data: dict[str, Any]) -> dict[str, Any]:
+    """Protocol v2 envelope of a message dict."""
+    envelope: dict[str, Any] = {'v': WIRE_VERSION}
+    for key, value in data.items():
+        if key == 'patch':
+            envelope['i'], envelope['p'] = compact_patch(value)
+        else:
+            envelope[key] = value
+    return envelope
+
+def from_envelope(envelope: dict[str, Any]) -> dict[str, Any]:
+    data = {key: value for key, value in envelope.items() if key not in ('v', 'i', 'p')}
+    if 'p' in envelope:
+        data['patch'] = expand_patch(envelope.get('i', []), envelope['p'])
+    return data
+
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+def _write_str(out: bytearray, text: str):
+    raw = text.encode('utf-8')
+    _write_varint(out, len(raw))
+    out += raw
+
+def _write_value(out: bytearray, value: Any):
+    if value is None:
+        out.append(_NULL)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)   # zigzag
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += struct.pack('>d', value)
+    elif isinstance(value, str):
+        out.append(_STR)
+        _write_str(out, value)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _write_value(out, item)
+    elif isinstance(value, dict):
+        out.append(_MAP)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            _write_str(out, str(key))
+            _write_value(out, item)
+    else:
+        raise TypeError(f'Object of type {type(value).__name__} is not wire serializable')
+
+def _read_value(data: bytes, offset: int) -> tuple[Any, int]:
+    tag = data[offset]
+    offset += 1
+    if tag == _NULL:
+        return None, offset
+    if tag in (_TRUE, _FALSE):
+        return tag == _TRUE, offset
+    if tag == _INT:
+        raw, offset = _read_varint(data, offset)
+        return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), offset
+    if tag == _FLOAT:
+        return struct.unpack_from('>d', data, offset)[0], offset + 8
+    if tag == _STR:
+        length, offset = _read_varint(data, offset)
+        return data[offset:offset + length].decode('utf-8'), offset + length
+    if tag == _LIST:
+        count, offset = _read_varint(data, offset)
+        items = []
+        for _ in range(count):
+            item, offset = _read_value(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _MAP:
+        count, offset = _read_varint(data, offset)
+        mapping = {}
+        for _ in range(count):
+            length, offset = _read_varint(data, offset)
+            key = data[offset:offset + length].decode('utf-8')
+            mapping[key], offset = _read_value(data, offset + length)
+        return mapping, offset
+    raise ValueError(f'Unknown wire tag {tag}')
+
+def encode_binary(value: Any) -> bytes:
+    out = bytearray(BINARY_MAGIC)
+    _write_value(out, value)
+    return bytes(out)
+
+def decode_binary(data: bytes) -> Any:
+    if not data.startswith(BINARY_MAGIC):
+        raise ValueError('Not a pyweber binary frame')
+    value, _ = _read_value(data, len(BINARY_MAGIC))
+    return value
+
+def encode_message(data: Any, wire_format: str = 'legacy') -> Union[str, bytes]:
+    """Serialize one outgoing message; ``bytes`` means a binary frame."""
+    if wire_format == 'legacy' or not isinstance(data, dict):
+        return json.dumps(data, ensure_ascii=False, indent=4)
+
+    envelope = to_envelope(data)
+    if wire_format == 'binary':
+        return encode_binary(envelope)
+    return json.dumps(envelope, ensure_ascii=False, separators=(',', ':'))
+
+def decode_message(payload: Union[str, bytes]) -> Any:
+    """Inverse of ``encode_message`` for any of the three formats."""
+    if isinstance(payload, (bytes, bytearray)) and payload.startswith(BINARY_MAGIC):
+        data = decode_binary(bytes(payload))
+    else:
+        data = json.loads(payload)
+    if isinstance(data, dict) and data.get('v') == WIRE_VERSION:
+        return from_envelope(data)
+    return data
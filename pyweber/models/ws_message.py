@@ -5,6 +5,8 @@ from pyweber.core.element import Element
 from pyweber.models.file import File
 from pyweber.models.file import Field
 from pyweber.models.handoff import handoff_registry
+from pyweber.models.element_index import get_element_index
+from pyweber.core.selector import is_within
 
 if TYPE_CHECKING:
     from pyweber.pyweber.pyweber import Pyweber
@@ -25,7 +27,11 @@ class wsMessage:
         self.event_data: dict[str, int] = self.get_value(key='event_data') or {}
         self.session_id: str = self.get_value(key='sessionId')
         self.window_event: str = self.get_value(key='window_event')
+        # Set by clients that already applied the element's throttle/debounce policy
+        self.gated: bool = bool(self.get_value(key='gated'))
         self._resolved_template = None
+        # Subtrees the client must upload after a hash handshake (None = in sync)
+        self.dom_sync: dict[str, Any] | None = None
         self.window = self.get_window()
 
     async def ensure_template(self):
@@ -56,6 +62,8 @@ class wsMessage:
         if self.session_id in sessions.all_sessions:
             session_template = sessions.get_session(session_id=self.session_id).template
         else:
+            # A new template has none of the values sent before, not just the changed ones
+            self.__values = self.get_value(key='all_values') or self.__values
             session_template = handoff_registry.consume(
                 token=self.get_value(key='handoffToken'),
                 route=self.route or '',
@@ -85,6 +93,16 @@ class wsMessage:
                     client_html,
                     include_uuid=getattr(session_template, 'include_uuid', True),
                 )
+        elif self.get_value(key='template_parts'):
+            from pyweber.models.dom_merge import merge_client_parts
+
+            merge_client_parts(
+                session_template.root,
+                self.get_value(key='template_parts'),
+                include_uuid=getattr(session_template, 'include_uuid', True),
+            )
+        elif isinstance(self.get_value(key='dom_hash'), dict) and getattr(session_template, 'include_uuid', True):
+            self.dom_sync = self.get_dom_sync(session_template)
 
         # Always apply browser field values — click events send values with
         # template=null, so this must not be gated on client_html.
@@ -93,6 +111,15 @@ class wsMessage:
 
         return session_template
 
+    def get_dom_sync(self, template) -> dict[str, Any] | None:
+        """Compare the client's Merkle hashes with ``template``; what to ask for, if anything."""
+        from pyweber.models.dom_hash import divergent_subtrees
+
+        divergent = divergent_subtrees(template.snapshot(), self.get_value(key='dom_hash'))
+        if divergent is None:
+            return {'full': True}
+        return {'parts': divergent} if divergent else None
+
     def get_window(self):
         from pyweber.core.window import Window, Screen, Location, Orientation, LocalStorage, SessionStorage
 
@@ -101,42 +128,58 @@ class wsMessage:
 
         window._Window__ws = self.ws
         window.session_id = self.session_id
-        window.width = self.get_window_values(key='width') or 0
-        window.height = self.get_window_values(key='height') or 0
-        window.inner_width = self.get_window_values(key='innerWidth') or 0
-        window.inner_height = self.get_window_values(key='innerHeight') or 0
-        window.scroll_x = self.get_window_values(key='scrollX') or 0
-        window.scroll_y = self.get_window_values(key='scrollY') or 0
-        window.screen = Screen(
-            width=self.get_window_values(key='screen').get('width', None),
-            height=self.get_window_values(key='screen').get('height', None),
-            colorDepth=self.get_window_values(key='screen').get('colorDepth', None),
-            pixelDepth=self.get_window_values(key='screen').get('pixelDepth', None),
-            screenX=self.get_window_values(key='screen').get('screenX', None),
-            screenY=self.get_window_values(key='screen').get('screenY', None),
-            orientation=Orientation(
-                angle=self.get_window_values(key='screen').get('orientation', {}).get('angle', None),
-                type=self.get_window_values(key='screen').get('orientation', {}).get('type', None),
-                on_change=self.get_window_values(key='screen').get('orientation', {}).get('on_change', None),
+
+        # Delta messages only rebuild what the client reported as changed
+        changed = self.get_value(key='window_changed') if existing else None
+
+        def touched(key: str) -> bool:
+            return changed is None or key in changed
+
+        for key, attribute in (
+            ('width', 'width'), ('height', 'height'),
+            ('innerWidth', 'inner_width'), ('innerHeight', 'inner_height'),
+            ('scrollX', 'scroll_x'), ('scrollY', 'scroll_y'),
+        ):
+            if touched(key):
+                setattr(window, attribute, self.get_window_values(key=key) or 0)
+
+        if touched('screen'):
+            screen = self.get_window_values(key='screen')
+            orientation = screen.get('orientation', {})
+            window.screen = Screen(
+                width=screen.get('width', None),
+                height=screen.get('height', None),
+                colorDepth=screen.get('colorDepth', None),
+                pixelDepth=screen.get('pixelDepth', None),
+                screenX=screen.get('screenX', None),
+                screenY=screen.get('screenY', None),
+                orientation=Orientation(
+                    angle=orientation.get('angle', None),
+                    type=orientation.get('type', None),
+                    on_change=orientation.get('on_change', None),
+                )
+            )
+        if touched('location'):
+            location = self.get_window_values(key='location')
+            window.location = Location(
+                host=location.get('host', None),
+                url=location.get('href', None),
+                protocol=location.get('protocol', None),
+                route=location.get('pathname', None),
+                origin=location.get('origin', None),
+            )
+        if touched('sessionStorage'):
+            window.session_storage = SessionStorage(
+                data=self.get_window_values(key='sessionStorage') or {},
+                session_id=self.session_id,
+                ws=self.ws
+            )
+        if touched('localStorage'):
+            window.local_storage = LocalStorage(
+                data=self.get_window_values(key='localStorage') or {},
+                session_id=self.session_id,
+                ws=self.ws
             )
-        )
-        window.location = Location(
-            host=self.get_window_values(key='location').get('host', None),
-            url=self.get_window_values(key='location').get('href', None),
-            protocol=self.get_window_values(key='location').get('protocol', None),
-            route=self.get_window_values(key='location').get('pathname', None),
-            origin=self.get_window_values(key='location').get('origin', None),
-        )
-        window.session_storage = SessionStorage(
-            data=self.get_window_values(key='sessionStorage') or {},
-            session_id=self.session_id,
-            ws=self.ws
-        )
-        window.local_storage = LocalStorage(
-            data=self.get_window_values(key='localStorage') or {},
-            session_id=self.session_id,
-            ws=self.ws
-        )
 
         return window
 
@@ -150,8 +193,23 @@ class wsMessage:
         return self.__raw_window.get(key, {})
 
     def insert_values(self, element: Element):
-        values: dict[str, Union[List[dict[str, Union[str, List[int]]]], str]] = self.__values.get(element.uuid, None)
+        index = get_element_index(element)
+
+        if index is not None:
+            # Indexed tree: touch only the elements the client reported.
+            for uuid, values in self.__values.items():
+                target = index.get_by_uuid(uuid)
+                if target is not None and (element is index.root or is_within(target, element)):
+                    self.__apply_values(element=target, values=values)
+            return
 
+        self.__apply_values(element=element, values=self.__values.get(element.uuid, None))
+
+        if element.childs:
+            for child in element.childs:
+                self.insert_values(element=child)
+
+    def __apply_values(self, element: Element, values: dict[str, Any]):
         if values:
             if element.tag == 'input' and element.attrs.get('type') == 'file':
 
@@ -174,7 +232,3 @@ class wsMessage:
 
             element.selection_start = values.get('selection_start', None)
             element.selection_end = values.get('selection_end', None)
-
-        if element.childs:
-            for child in element.childs:
-                self.insert_values(element=child)
@@ -6,6 +6,7 @@ import webbrowser
 import traceback
 import logging
 import asyncio
+from collections import deque
 from typing import Union, Callable, Any, AsyncGenerator
 from dataclasses import dataclass
 from pyweber.utils.types import WindowEventType
@@ -55,6 +56,8 @@ from pyweber.services import (
     ResponsePipeline,
     TemplateService,
     OpenAPISetup,
+    ClientKind,
+    ClientProfileService,
 )
 
 @dataclass
@@ -143,6 +146,7 @@ class Pyweber(
         self._templates = TemplateService()
         self._pipeline = ResponsePipeline(self)
         self._openapi = OpenAPISetup(self)
+        self._clients = ClientProfileService()
         # Alias kept for any code that introspected the mangled name
         self.__static_directories = self._static.directories
         self.__add_framework_routes()
@@ -163,6 +167,7 @@ class Pyweber(
 
     def clear_cache_templates(self):
         self.__cache_templates.clear()
+        self._clients.clear()
 
     @property
     def ws_server(self): return self.__ws_server
@@ -189,51 +194,56 @@ class Pyweber(
     def static(self, *directories: str):
         self._static.add(*directories)
 
-    async def _receive_chunk(self, file_id: str, timeout: float) -> tuple[bytes, float]:
-        loop = asyncio.get_event_loop()
-        t_start = loop.time()
-
-        result: FileResult = await file_chunk_manager.get(file_id, timeout=timeout)
-
-        elapsed_ms = (loop.time() - t_start) * 1000
-
-        if result.code != 200 or result.status == 'error' or not result.data:
-            return b'', elapsed_ms
-        return result.data, elapsed_ms
-
     async def stream(
         self,
         file: File,
         session_id: str,
         max_size: int = 1024 * 64,
         timeout: float = 30.0,
+        window: int = 4,
     ) -> AsyncGenerator[bytes, None]:
+        """Read ``file`` from the browser, yielding its chunks in order.
 
-        controller = AdaptiveController(max_size=max_size)
-        offset = 0
+        Up to ``controller.window`` chunks are requested ahead of the one being
+        consumed; the browser answers each with a binary WebSocket frame.
+        ``AdaptiveController`` tunes both the chunk size and the window.
+        """
+        loop = asyncio.get_running_loop()
+        controller = AdaptiveController(max_size=max_size, window=window)
         file_id = file.file_id
+        requested = 0
+        in_flight: deque[tuple[int, int, asyncio.Future, float]] = deque()
 
-        while offset < file.size:
-            file_chunk_manager.register(file_id=file.file_id)
-
-            data = {
-                'request_file': file_id,
-                'start': offset,
-                'end': min(offset + controller.chunk_size, file.size)
-            }
-
-            await self.ws_server.send_message(data=data, session_id=session_id)
-
-            chunk, elapsed_ms = await self._receive_chunk(file_id=file_id, timeout=timeout)
-            if not chunk: break
+        try:
+            while in_flight or requested < file.size:
+                ranges = []
+                while len(in_flight) < controller.window and requested < file.size:
+                    end = min(requested + controller.chunk_size, file.size)
+                    future = file_chunk_manager.expect(file_id, requested, session_id=session_id)
+                    in_flight.append((requested, end, future, loop.time()))
+                    ranges.append([requested, end])
+                    requested = end
+
+                if ranges:
+                    await self.ws_server.send_message(
+                        data={'request_file': file_id, 'ranges': ranges},
+                        session_id=session_id,
+                    )
 
-            yield chunk
+                start, end, future, sent_at = in_flight.popleft()
+                try:
+                    result: FileResult = await asyncio.wait_for(future, timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
 
-            received = len(chunk)
-            offset += received
-            controller.update(received_bytes=received, elapsed_ms=elapsed_ms)
+                chunk = result.data if result.code == 200 and isinstance(result.data, bytes) else b''
+                if len(chunk) != end - start:
+                    break
 
-            await asyncio.sleep(0)
+                controller.update(received_bytes=len(chunk), elapsed_ms=(loop.time() - sent_at) * 1000)
+                yield chunk
+        finally:
+            file_chunk_manager.discard(file_id)
 
     def __special_routes(self):
         return ['/_pyweber/file_chunk']
@@ -288,6 +298,8 @@ class Pyweber(
         _route, _ = self.resolve_path(route=request.path)
         title = None
         _route_method = f"{_route}_{request.method}"
+        client = self._clients.classify(request)
+        static = client == ClientKind.STATIC
 
         if _route_method in self.__cache_templates:
             content_result, template_result = self.__cache_templates[_route_method]
@@ -300,6 +312,7 @@ class Pyweber(
                 resp=request,
                 middlewares=self.get_before_request_middlewares
             )
+            cache_key = cached = None
 
             if before_request_response:
                 template_result = await self._process_templates(
@@ -315,29 +328,43 @@ class Pyweber(
                 )
 
             else:
-                template_result = await self.get_template(
-                    route=request.path,
-                    method=request.method,
-                    **request.query_params
-                )
+                cache_key = self._clients.cache_key(request) if static else None
+                cached = self._clients.cached(cache_key)
 
-            if self._should_register_handoff(template_result):
-                template_result.template = self._ensure_template_object(
-                    template_result.template,
-                    title=title,
-                )
-                token = handoff_registry.create(
+                if cached:
+                    content_result, template_result = cached
+                else:
+                    # Cookies set by the route make the page personal
+                    cookies_before = dict(self.cookies)
+                    template_result = await self.get_template(
+                        route=request.path,
+                        method=request.method,
+                        **request.query_params
+                    )
+
+            if not cached:
+                # Only a browser that will open the WebSocket gets a handoff
+                if client == ClientKind.INTERACTIVE and self._should_register_handoff(template_result):
+                    template_result.template = self._ensure_template_object(
+                        template_result.template,
+                        title=title,
+                    )
+                    token = handoff_registry.create(
+                        template=template_result.template,
+                        route=_route,
+                    )
+                    inject_handoff_token(template_result.template, token)
+
+                content_result = self.template_to_bytes(
                     template=template_result.template,
-                    route=_route,
+                    content_type=template_result.content_type,
+                    title=title,
+                    process_response=template_result.process_response,
+                    static=static,
                 )
-                inject_handoff_token(template_result.template, token)
 
-            content_result = self.template_to_bytes(
-                template=template_result.template,
-                content_type=template_result.content_type,
-                title=title,
-                process_response=template_result.process_response
-            )
+                if cache_key and dict(self.cookies) == cookies_before and self._templates.is_cacheable(template_result, content_result):
+                    self._clients.store(cache_key, (content_result, template_result))
 
         response = Response(
             request=request,
@@ -354,6 +381,12 @@ class Pyweber(
             for key, value in template_result.response_headers.items():
                 response.set_header(key, value)
 
+        if self._clients.enabled and getattr(template_result, 'content_type', None) == ContentTypes.html:
+            # The page differs between browsers and static clients
+            vary = str(response.headers.get('Vary') or '')
+            if 'User-Agent' not in vary:
+                response.set_header('Vary', f'{vary}, User-Agent, Accept'.strip(', '))
+
         response = self._apply_static_etag(request, response, template_result)
 
         after_request_response = await self.process_middleware(
@@ -407,13 +440,15 @@ class Pyweber(
         template: Union[Template, Element, dict, list, set, str, bytes],
         content_type: ContentTypes = ContentTypes.html,
         title: str = None,
-        process_response: bool = False
+        process_response: bool = False,
+        static: bool = False
     ):
         return self._templates.template_to_bytes(
             template,
             content_type=content_type,
             title=title,
             process_response=process_response,
+            static=static,
         )
 
     def _process_byte_object(self, data: bytes, content_type: ContentTypes):
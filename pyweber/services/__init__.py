@@ -4,10 +4,13 @@ from pyweber.services.static_files import StaticFilesService
 from pyweber.services.response_pipeline import ResponsePipeline
 from pyweber.services.template_service import TemplateService
 from pyweber.services.openapi_setup import OpenAPISetup
+from pyweber.services.client_profile import ClientKind, ClientProfileService
 
 __all__ = [
     'StaticFilesService',
     'ResponsePipeline',
     'TemplateService',
     'OpenAPISetup',
+    'ClientKind',
+    'ClientProfileService',
 ]
@@ -0,0 +1,154 @@
+"""Classify who is asking for a page before paying for interactivity.
+
+Every HTML response used to stamp uuids on all elements, register event ids
+and park the ``Template`` in the handoff registry for ``handoff_ttl`` seconds,
+even for crawlers, link unfurlers, ``curl`` and ``HEAD`` probes that never
+open the WebSocket. ``ClientProfileService`` sorts requests into
+
+- ``interactive``: browsers; the full reactive page
+- ``prefetch``: ``Sec-Purpose: prefetch`` / ``Purpose: prefetch``; the full
+  page (the browser may use it for the real navigation) without a handoff,
+  the WebSocket then clones the route template
+- ``static``: ``HEAD``, known bots/tools by ``User-Agent``, or an ``Accept``
+  header without HTML; plain HTML without uuids, event ids, the client
+  script or a handoff
+
+Headless browsers (Puppeteer/Playwright e2e runs, Lighthouse audits) run the
+page and stay interactive; add their patterns to ``user_agents`` to opt them in.
+Static renders of cookie-less requests are kept in a small TTL/LRU cache shared
+by the HTTP worker threads. Settings live in ``[static_render]`` (``enabled``,
+``user_agents``, ``cache_ttl``, ``cache_size``).
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+if TYPE_CHECKING:
+    from pyweber.models.request import Request
+
+DEFAULT_CACHE_TTL = 60.0
+DEFAULT_CACHE_SIZE = 256
+
+BOT_USER_AGENTS = (
+    r'bot\b', r'crawler', r'spider', r'slurp', r'bingpreview', r'facebookexternalhit',
+    r'embedly', r'whatsapp', r'telegram', r'discordbot', r'slackbot',
+    r'curl/', r'wget/', r'python-requests', r'python-urllib',
+    r'httpx', r'aiohttp', r'go-http-client', r'okhttp', r'libwww-perl', r'java/',
+)
+HTML_TYPES = ('text/html', 'application/xhtml+xml', '*/*', 'text/*')
+
+
+class ClientKind(str, Enum):
+    INTERACTIVE = 'interactive'
+    PREFETCH = 'prefetch'
+    STATIC = 'static'
+
+
+@dataclass
+class ClientStats:
+    interactive: int = 0
+    prefetch: int = 0
+    static: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+def _setting(key: str, default: Any) -> Any:
+    from pyweber.config.config import config
+    return config.get('static_render', key, default=default)
+
+
+def _positive(value: Any, default: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+class ClientProfileService:
+    """Client classification plus the cache of static renders."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        user_agents: Optional[Iterable[str]] = None,
+        cache_ttl: Optional[float] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.enabled = bool(_setting('enabled', True) if enabled is None else enabled)
+        extra = list(_setting('user_agents', []) or []) if user_agents is None else list(user_agents)
+        self.__user_agents = re.compile('|'.join((*BOT_USER_AGENTS, *extra)), re.IGNORECASE)
+        self.cache_ttl = _positive(_setting('cache_ttl', DEFAULT_CACHE_TTL) if cache_ttl is None else cache_ttl, DEFAULT_CACHE_TTL)
+        self.cache_size = int(_positive(_setting('cache_size', DEFAULT_CACHE_SIZE) if cache_size is None else cache_size, DEFAULT_CACHE_SIZE))
+        self.__cache: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.stats = ClientStats()
+
+    def classify(self, request: 'Request') -> ClientKind:
+        kind = self.__classify(request) if self.enabled else ClientKind.INTERACTIVE
+        setattr(self.stats, kind.value, getattr(self.stats, kind.value) + 1)
+        return kind
+
+    def __classify(self, request: 'Request') -> ClientKind:
+        if request.method == 'HEAD':
+            return ClientKind.STATIC
+
+        headers = request.headers
+        if self.__user_agents.search(headers.get('user-agent') or ''):
+            return ClientKind.STATIC
+
+        # A missing Accept header is treated as a browser, only an explicit
+        # non-HTML one means the client will not run the page
+        accept = [value[0].strip().lower() for value in request.accept]
+        if accept and not any(value in HTML_TYPES for value in accept):
+            return ClientKind.STATIC
+
+        purpose = (headers.get('sec-purpose') or headers.get('purpose') or '').lower()
+        if 'prefetch' in purpose or 'prerender' in purpose:
+            return ClientKind.PREFETCH
+        return ClientKind.INTERACTIVE
+
+    def cache_key(self, request: 'Request') -> Optional[str]:
+        """Key of a shareable static render, ``None`` for personalised requests."""
+        headers = request.headers
+        if headers.get('cookie') or headers.get('authorization'):
+            return None
+        query = '&'.join(f'{key}={value}' for key, value in sorted(request.query_params.items()))
+        return f'{request.method} {request.path}?{query}'
+
+    def cached(self, key: Optional[str]) -> Any:
+        if key is None:
+            return None
+        with self.__lock:
+            entry = self.__cache.get(key)
+            if entry is None or monotonic() - entry[0] > self.cache_ttl:
+                self.__cache.pop(key, None)
+                self.stats.cache_misses += 1
+                return None
+            self.__cache.move_to_end(key)
+            self.stats.cache_hits += 1
+            return entry[1]
+
+    def store(self, key: Optional[str], value: Any):
+        if key is None:
+            return
+        with self.__lock:
+            self.__cache[key] = (monotonic(), value)
+            self.__cache.move_to_end(key)
+            while len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.__cache)
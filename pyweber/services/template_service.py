@@ -34,6 +34,15 @@ class TemplateService:
             return False
         return True
 
+    def is_cacheable(self, template_result: TemplateResult, content_result) -> bool:
+        """Whether a rendered page can be shared between anonymous requests."""
+        return (
+            not isinstance(content_result, Response)
+            and template_result.content_type == ContentTypes.html
+            and 200 <= template_result.status_code < 300
+            and not getattr(template_result, 'response_headers', None)
+        )
+
     def ensure_template_object(
         self,
         template: Union[Template, Element, str],
@@ -85,12 +94,13 @@ class TemplateService:
         content_type: ContentTypes = ContentTypes.html,
         title: str = None,
         process_response: bool = False,
+        static: bool = False,
     ):
         from pyweber.pyweber.pyweber import ContentResult
 
         if isinstance(template, Template):
             return self._process_template_object(
-                template=template, title=title, content_type=content_type
+                template=template, title=title, content_type=content_type, static=static
             )
         if isinstance(template, Element):
             return self._process_element_object(
@@ -98,6 +108,7 @@ class TemplateService:
                 title=title,
                 content_type=content_type,
                 process_template=process_response,
+                static=static,
             )
         if isinstance(template, (dict, set, list)):
             return self._process_json_object(template=template)
@@ -110,6 +121,7 @@ class TemplateService:
             title=title,
             content_type=content_type,
             process_response=process_response,
+            static=static,
         )
 
     def _process_byte_object(self, data: bytes, content_type: ContentTypes):
@@ -120,10 +132,10 @@ class TemplateService:
         from pyweber.pyweber.pyweber import ContentResult
         return ContentResult(content=json.dumps(template).encode(), content_type=ContentTypes.json)
 
-    def _process_template_object(self, template: Template, title: str, content_type: ContentTypes):
+    def _process_template_object(self, template: Template, title: str, content_type: ContentTypes, static: bool = False):
         from pyweber.pyweber.pyweber import ContentResult
         template.title = title if title else template.title
-        return ContentResult(content=template.build_html().encode(), content_type=content_type)
+        return ContentResult(content=template.build_html(static=static).encode(), content_type=content_type)
 
     def _process_element_object(
         self,
@@ -131,14 +143,15 @@ class TemplateService:
         title: str,
         content_type: ContentTypes,
         process_template: bool,
+        static: bool = False,
     ):
         from pyweber.pyweber.pyweber import ContentResult
         if process_template:
             return ContentResult(
-                content=Template(template=element.to_html(), title=title).build_html().encode(),
+                content=Template(template=element.to_html(static=static), title=title).build_html(static=static).encode(),
                 content_type=content_type,
             )
-        return ContentResult(content=element.to_html().encode(), content_type=content_type)
+        return ContentResult(content=element.to_html(static=static).encode(), content_type=content_type)
 
     def _process_string_object(
         self,
@@ -146,13 +159,14 @@ class TemplateService:
         title: str,
         content_type: ContentTypes,
         process_response: bool,
+        static: bool = False,
     ):
         from pyweber.pyweber.pyweber import ContentResult
         if not isinstance(data, str):
             data = str(data)
         if process_response and content_type == ContentTypes.html:
             return ContentResult(
-                content=Template(template=data, title=title).build_html().encode(),
+                content=Template(template=data, title=title).build_html(static=static).encode(),
                 content_type=content_type,
             )
         return ContentResult(content=data.encode(), content_type=content_type)
@@ -69,7 +69,6 @@ class SessionSnapshot:
             current_route=self.current_route,
         )
         session.create_at = self.create_at
-        session.old_template = template
         return session
 
 
@@ -6,6 +6,12 @@ const activeListeners = [];
 const fileMap = {};
 const fileSignatureMap = {};
 
+// Protocol features announced to the server with every message
+const clientFeatures = ['patch', 'compact', 'binary'];
+
+// Form values and window data last sent on this socket; later messages send only changes
+let stateBaseline = null;
+
 let reconnectAttempts = 0;
 const maxReconnectAttempts = 2;
 
@@ -28,8 +34,23 @@ async function compress(data) {
     return new Uint8Array(await new Response(stream.readable).arrayBuffer());
 }
 
-async function sendToServer(data) {
+// Sends go out one at a time so each delta is diffed against the message sent just before it
+let sendChain = Promise.resolve();
+
+function sendToServer(data) {
+    sendChain = sendChain.then(() => sendNow(data)).catch(error => console.error('Erro ao enviar mensagem:', error));
+    return sendChain;
+}
+
+async function sendNow(data) {
     if (socket.readyState !== WebSocket.OPEN) return;
+    // Diffed here, right before sending, so the baseline is always what the server has seen
+    if (data && typeof data === 'object' && 'window_data' in data) data = withStateDelta(data);
+    // permessage-deflate already compresses every frame with a per-connection dictionary
+    if (socket.extensions.includes('permessage-deflate')) {
+        socket.send(typeof data === 'string' ? data : JSON.stringify(data));
+        return;
+    }
     socket.send(await compress(data));
 }
 
@@ -37,12 +58,14 @@ async function sendToServer(data) {
 function connectWebSocket() {
     const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     socket = new WebSocket(`${wsProtocol}//${window.location.host}`);
+    socket.binaryType = 'arraybuffer';
 
     socket.onopen = async function () {
         socketReady = true;
         reconnectAttempts = 0;
+        stateBaseline = null;
         watchDomInjections();
-        // Só envia outerHTML no handshake se existir contrato uuid estável
+        // Handshake de hashes só se existir contrato uuid estável
         const includeTemplate = pageHasStableUuids();
         sendToServer(await getEventData({ includeTemplate }));
     };
@@ -65,13 +88,24 @@ function connectWebSocket() {
 
     socket.onmessage = async function (event) {
         // Suporta resposta do servidor em bytes ou string
-        const raw = event.data instanceof ArrayBuffer
-            ? new TextDecoder().decode(event.data)
-            : (event.data instanceof Blob
-                ? new TextDecoder().decode(await event.data.arrayBuffer())
-                : event.data);
-
-        const data = JSON.parse(raw);
+        const raw = event.data instanceof Blob ? await event.data.arrayBuffer() : event.data;
+        if (raw instanceof ArrayBuffer && isFileFrame(raw)) {
+            receiveFileFrame(decodeFileFrame(raw));
+            return;
+        }
+        const data = decodeMessage(raw);
+
+        if (data.stateReset) {
+            // The server holds the rejected event and replays it with this full state
+            stateBaseline = null;
+            sendToServer({
+                route: window.location.pathname,
+                values: await getFormValues(),
+                window_data: getWindowData(),
+                sessionId: getsessionId()
+            });
+            return;
+        }
 
         // Bind session before flushing buffered window events from the same payload.
         if (data.setSessionId) {
@@ -96,13 +130,34 @@ function connectWebSocket() {
             }
         }
 
+        if (data.download) {
+            startDownload(data.download);
+            return;
+        }
+
         if (data.request_file) {
-            const response = await get_file_content(data.request_file, data.start, data.end);
-            await send_file_chunk(response.file_id, response.status, response.data);
+            const ranges = data.ranges || [[data.start, data.end]];
+            for (const [start, end] of ranges) {
+                await send_file_chunk(data.request_file, start, end);
+            }
+            return;
+        }
+
+        if (data.domSync) {
+            sendToServer(await getEventData(data.domSync.full
+                ? { fullTemplate: true }
+                : { templateParts: collectTemplateParts(data.domSync.parts) }));
+            return;
+        }
+
+        if (data.patch) {
+            applyPatch(data.patch);
             return;
         }
 
         if (data.template) {
+            // Legacy diffs may rewrite any field: send all values again next time
+            if (stateBaseline) stateBaseline.values = {};
             applyDifferences(data.template);
             return;
         }
@@ -247,13 +302,78 @@ async function update_cookies() {
     });
 }
 
-// ─── Envio de ficheiro via HTTP (mantém binário puro, sem compressão JSON) ────
-async function send_file_chunk(file_id, status, data) {
-    await fetch(`/_pyweber/file_chunk?file_id=${file_id}&status=${status}`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/octet-stream' },
-        body: data instanceof ArrayBuffer ? data : new TextEncoder().encode(data)
-    });
+// ─── Envio de ficheiro em frames binários do WebSocket (sem base64/JSON) ───────
+// magic (2) | flags (1) | len(file_id) (1) | file_id | offset (u64) | bytes
+const FILE_FRAME_MAGIC = [0xb7, 0x10];
+const FILE_FRAME_ERROR = 0x01;
+
+function encodeFileFrame(file_id, offset, data, error = false) {
+    const id = new TextEncoder().encode(file_id);
+    const body = data instanceof ArrayBuffer ? new Uint8Array(data) : new TextEncoder().encode(String(data));
+    const frame = new Uint8Array(4 + id.length + 8 + body.length);
+    frame.set(FILE_FRAME_MAGIC, 0);
+    frame[2] = error ? FILE_FRAME_ERROR : 0;
+    frame[3] = id.length;
+    frame.set(id, 4);
+    new DataView(frame.buffer).setBigUint64(4 + id.length, BigInt(offset));
+    frame.set(body, 12 + id.length);
+    return frame.buffer;
+}
+
+function isFileFrame(buffer) {
+    const bytes = new Uint8Array(buffer, 0, Math.min(buffer.byteLength, 2));
+    return bytes.length === 2 && bytes[0] === FILE_FRAME_MAGIC[0] && bytes[1] === FILE_FRAME_MAGIC[1];
+}
+
+function decodeFileFrame(buffer) {
+    const bytes = new Uint8Array(buffer);
+    const idLength = bytes[3];
+    const offset = Number(new DataView(buffer).getBigUint64(4 + idLength));
+    return {
+        file_id: new TextDecoder().decode(bytes.subarray(4, 4 + idLength)),
+        offset,
+        error: (bytes[2] & FILE_FRAME_ERROR) !== 0,
+        data: bytes.subarray(12 + idLength),
+    };
+}
+
+// ─── Downloads enviados pelo servidor (window.download) ───────────────────────
+const downloads = new Map();
+
+function startDownload({ file_id, name, size, type }) {
+    downloads.set(file_id, { name, type, size, received: 0, buffer: new Uint8Array(size) });
+    if (size === 0) finishDownload(file_id);
+}
+
+function receiveFileFrame(frame) {
+    const download = downloads.get(frame.file_id);
+    if (!download) return;
+    if (frame.error) {
+        downloads.delete(frame.file_id);
+        return;
+    }
+    download.buffer.set(frame.data, frame.offset);
+    download.received += frame.data.length;
+    if (download.received >= download.size) finishDownload(frame.file_id);
+}
+
+function finishDownload(file_id) {
+    const download = downloads.get(file_id);
+    downloads.delete(file_id);
+    const url = URL.createObjectURL(new Blob([download.buffer], { type: download.type }));
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = download.name;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+    setTimeout(() => URL.revokeObjectURL(url), 0);
+}
+
+async function send_file_chunk(file_id, start, end) {
+    if (socket.readyState !== WebSocket.OPEN) return;
+    const response = await get_file_content(file_id, start, end);
+    socket.send(encodeFileFrame(file_id, start, response.data, response.status !== 'success'));
 }
 
 // ─── DOM ──────────────────────────────────────────────────────────────────────
@@ -320,6 +440,227 @@ function applyDifferences(differences) {
     });
 }
 
+// ─── Wire format (see pyweber/models/wire.py) ────────────────────────────────
+const WIRE_OPS = {
+    t: ['set-text', 'uuid', 'text'],
+    a: ['set-attr', 'uuid', 'name', 'value'],
+    A: ['remove-attr', 'uuid', 'name'],
+    c: ['add-class', 'uuid', 'names'],
+    C: ['remove-class', 'uuid', 'names'],
+    s: ['set-style', 'uuid', 'props'],
+    v: ['set-value', 'uuid', 'value'],
+    i: ['insert', 'parent', 'before', 'html'],
+    m: ['move', 'uuid', 'parent', 'before'],
+    r: ['remove', 'uuid'],
+    R: ['replace', 'uuid', 'html'],
+    f: ['call', 'uuid', 'methods'],
+};
+const WIRE_ID_FIELDS = new Set(['uuid', 'parent', 'before']);
+
+/** Legacy JSON, compact v2 JSON or a binary TLV frame → message object. */
+function decodeMessage(raw) {
+    let data;
+    if (raw instanceof ArrayBuffer) {
+        const bytes = new Uint8Array(raw);
+        data = bytes[0] === 0xb7 && bytes[1] === 0x02
+            ? decodeBinary(bytes)
+            : JSON.parse(new TextDecoder().decode(bytes));
+    } else {
+        data = JSON.parse(raw);
+    }
+    return data && data.v === 2 ? expandEnvelope(data) : data;
+}
+
+function expandEnvelope(envelope) {
+    const { v, i: ids = [], p: rows, ...data } = envelope;
+    if (rows) {
+        data.patch = rows.map(([code, ...values]) => {
+            const [op, ...fields] = WIRE_OPS[code];
+            const operation = { op };
+            fields.forEach((field, index) => {
+                const value = values[index];
+                operation[field] = WIRE_ID_FIELDS.has(field) && value !== null ? ids[value] : value;
+            });
+            return operation;
+        });
+    }
+    return data;
+}
+
+function decodeBinary(bytes) {
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const decoder = new TextDecoder();
+    let offset = 2;
+
+    const varint = () => {
+        let result = 0, scale = 1, byte;
+        do {
+            byte = bytes[offset++];
+            result += (byte & 0x7f) * scale;
+            scale *= 128;
+        } while (byte & 0x80);
+        return result;
+    };
+    const string = () => {
+        const length = varint();
+        const text = decoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        return text;
+    };
+    const value = () => {
+        switch (bytes[offset++]) {
+            case 0: return null;
+            case 1: return false;
+            case 2: return true;
+            case 3: {
+                const raw = varint();
+                return raw % 2 === 0 ? raw / 2 : -(raw + 1) / 2;
+            }
+            case 4: {
+                const number = view.getFloat64(offset);
+                offset += 8;
+                return number;
+            }
+            case 5: return string();
+            case 6: {
+                const items = new Array(varint());
+                for (let index = 0; index < items.length; index++) items[index] = value();
+                return items;
+            }
+            case 7: {
+                const count = varint();
+                const mapping = {};
+                for (let index = 0; index < count; index++) {
+                    const key = string();
+                    mapping[key] = value();
+                }
+                return mapping;
+            }
+            default:
+                throw new Error(`Unknown wire tag at ${offset - 1}`);
+        }
+    };
+    return value();
+}
+
+// ─── Handshake por hashes (ver pyweber/models/dom_hash.py) ────────────────────
+function fnvHash(text) {
+    let digest = '';
+    for (const seed of [0x811c9dc5, (0x811c9dc5 ^ 0x9e3779b9) >>> 0]) {
+        let value = seed;
+        for (let i = 0; i < text.length; i++) {
+            value = Math.imul(value ^ text.charCodeAt(i), 16777619) >>> 0;
+        }
+        digest += value.toString(16).padStart(8, '0');
+    }
+    return digest;
+}
+
+function domHash(el, memo) {
+    if (memo.has(el)) return memo.get(el);
+    const childs = Array.from(el.children, child => domHash(child, memo));
+    const digest = fnvHash([el.localName.toLowerCase(), el.getAttribute('uuid') || '', ...childs].join('\x1f'));
+    memo.set(el, digest);
+    return digest;
+}
+
+function getDomHashes() {
+    const memo = new Map();
+    const sections = [];
+    const parts = {};
+    for (const section of [document.head, document.body]) {
+        if (!section) continue;
+        sections.push(section.getAttribute('uuid'));
+        for (const child of section.children) {
+            parts[child.getAttribute('uuid')] = domHash(child, memo);
+        }
+    }
+    return { root: domHash(document.documentElement, memo), sections, parts };
+}
+
+function collectTemplateParts(uuids) {
+    const parts = {};
+    for (const uuid of uuids || []) {
+        const el = findByUuid(uuid);
+        if (el) parts[uuid] = { parent: el.parentElement?.getAttribute('uuid') ?? null, html: el.outerHTML };
+    }
+    return parts;
+}
+
+function findByUuid(uuid) {
+    return uuid ? document.querySelector(`[uuid="${uuid}"]`) : null;
+}
+
+/** Apply fine-grained patch operations (see pyweber/models/template_patch.py) in order. */
+function applyPatch(operations) {
+    if (!Array.isArray(operations)) return;
+
+    for (const op of operations) {
+        switch (op.op) {
+            case 'insert': {
+                const parent = findByUuid(op.parent);
+                const node = parent && createElementFromHTML(op.html);
+                if (node) parent.insertBefore(node, findByUuid(op.before));
+                continue;
+            }
+            case 'move': {
+                const parent = findByUuid(op.parent);
+                const node = findByUuid(op.uuid);
+                if (parent && node) parent.insertBefore(node, findByUuid(op.before));
+                continue;
+            }
+        }
+
+        const el = findByUuid(op.uuid);
+        if (!el) continue;   // uuid contract broken — skip, never rewrite the document
+
+        // The server changed this field, so its next value is news even if unchanged for the user
+        if (stateBaseline && ['set-value', 'set-attr', 'remove-attr', 'replace'].includes(op.op)) {
+            delete stateBaseline.values[op.uuid];
+        }
+
+        switch (op.op) {
+            case 'set-text':
+                el.textContent = op.text;
+                break;
+            case 'set-attr':
+                el.setAttribute(op.name, op.value);
+                break;
+            case 'remove-attr':
+                el.removeAttribute(op.name);
+                break;
+            case 'add-class':
+                el.classList.add(...op.names);
+                break;
+            case 'remove-class':
+                el.classList.remove(...op.names);
+                break;
+            case 'set-style':
+                Object.entries(op.props).forEach(([name, value]) => {
+                    value === null ? el.style.removeProperty(name) : el.style.setProperty(name, value);
+                });
+                break;
+            case 'set-value':
+                if ('value' in el) el.value = op.value;
+                op.value === '' ? el.removeAttribute('value') : el.setAttribute('value', op.value);
+                break;
+            case 'remove':
+                el.remove();
+                break;
+            case 'replace': {
+                // Same guard as applyDifferences: never replace the document root
+                if (el === document.documentElement) break;
+                const node = createElementFromHTML(op.html);
+                if (node) el.replaceWith(node);
+                break;
+            }
+            case 'call':
+                execute_event_handlers(el, op.methods);
+                break;
+        }
+    }
+}
+
 function execute_event_handlers(element, methods) {
     if (!(element instanceof HTMLElement)) return;
     Object.entries(methods).forEach(([method, params]) => {
@@ -373,7 +714,17 @@ async function sendEvent({ type, event, event_ref, window_response }) {
         return;
     }
 
+    if (event_ref === EventRef.DOCUMENT) {
+        gateEvent({ type, event, event_ref, window_response }, deliverEvent);
+    } else {
+        await deliverEvent({ type, event, event_ref, window_response });
+    }
+}
+
+async function deliverEvent({ type, event, event_ref, window_response, gated = false }) {
     const eventData = await getEventData({ type, event, event_ref, window_response });
+    // Already throttled/debounced here; the server then only collapses bursts (latest wins)
+    if (gated) eventData.gated = true;
 
     if (socket.readyState !== WebSocket.OPEN) return;
 
@@ -384,6 +735,55 @@ async function sendEvent({ type, event, event_ref, window_response }) {
     }
 }
 
+// ─── Políticas de eventos ─────────────────────────────────────────────────────
+// `_policy="input:debounce:150 mousemove:throttle:50"` no elemento com o handler.
+// Em rajadas, o último evento é sempre entregue. Eventos já filtrados aqui seguem com `gated`
+// e o servidor aplica-lhes apenas `latest`; clientes sem esse campo são filtrados lá.
+const eventGates = new Map();   // `${uuid}:${type}` → { timer, last, pending }
+
+function eventPolicy(el, type) {
+    const spec = el?.getAttribute?.('_policy');
+    if (!spec) return null;
+    for (const item of spec.trim().split(/\s+/)) {
+        const [name, kind, wait] = item.split(':');
+        if (name === type) return { kind, wait: Number(wait) || 0 };
+    }
+    return null;
+}
+
+function gateEvent(item, send) {
+    const el = item.event?.target?.closest?.(`[_on${item.type}]`);
+    const policy = eventPolicy(el, item.type);
+    if (!policy || policy.wait <= 0 || !['throttle', 'debounce'].includes(policy.kind)) {
+        send(item);
+        return;
+    }
+
+    item.gated = true;
+    const key = `${el.getAttribute('uuid')}:${item.type}`;
+    let gate = eventGates.get(key);
+    if (!gate) eventGates.set(key, gate = { timer: null, last: 0, pending: null });
+    gate.pending = item;
+
+    const fire = () => {
+        gate.timer = null;
+        gate.last = performance.now();
+        const next = gate.pending;
+        gate.pending = null;
+        if (policy.kind === 'debounce') eventGates.delete(key);
+        if (next) send(next);
+    };
+
+    if (policy.kind === 'debounce') {
+        clearTimeout(gate.timer);
+        gate.timer = setTimeout(fire, policy.wait);
+    } else if (!gate.timer) {
+        const delay = gate.last + policy.wait - performance.now();
+        if (delay <= 0) fire();
+        else gate.timer = setTimeout(fire, delay);
+    }
+}
+
 // ─── Utilitários Base64 ───────────────────────────────────────────────────────
 function toBase64(string) {
     const encoded = new TextEncoder().encode(string);
@@ -496,11 +896,11 @@ window.__pyweber_resyncDom = resyncDomWithServer;
 window.__pyweber_adopt = adoptDomNode;
 
 // ─── Construção do payload ────────────────────────────────────────────────────
-async function getEventData({ type = null, event = null, event_ref = null, window_response = null, file_content = null, includeTemplate = false }) {
+async function getEventData({ type = null, event = null, event_ref = null, window_response = null, file_content = null, includeTemplate = false, fullTemplate = false, templateParts = null }) {
     const target = event?.target instanceof HTMLElement ? event.target : null;
     const values = await getFormValues();
 
-    if (includeTemplate) {
+    if (includeTemplate || fullTemplate) {
         stampMissingUuids();
     }
 
@@ -510,8 +910,10 @@ async function getEventData({ type = null, event = null, event_ref = null, windo
         route: window.location.pathname,
         target_uuid: target?.getAttribute('uuid') ?? null,
         current_target_uuid: target?.closest(`[_on${type}]`)?.getAttribute('uuid') ?? null,
-        template: includeTemplate ? document.documentElement.outerHTML : null,
-        values,                         // ← sem JSON.stringify desnecessário
+        template: fullTemplate ? document.documentElement.outerHTML : null,
+        dom_hash: includeTemplate && !fullTemplate ? getDomHashes() : null,
+        template_parts: templateParts,
+        values,
         event_data: {
             clientX: event?.clientX ?? null,
             clientY: event?.clientY ?? null,
@@ -557,12 +959,53 @@ async function getEventData({ type = null, event = null, event_ref = null, windo
             eventPhase: event?.eventPhase ?? null,
             timestamp: Date.now()
         },
-        window_data: getWindowData(),   // ← sem JSON.stringify desnecessário
+        window_data: getWindowData(),
         window_response: window_response ?? {},
         window_event: event_ref === EventRef.WINDOW ? sessionStorage.getItem(type) : null,
         file_content: file_content ?? {},
         sessionId: getsessionId(),
-        handoffToken: getHandoffToken()
+        handoffToken: getHandoffToken(),
+        features: clientFeatures
+    };
+}
+
+// ─── Estado delta ─────────────────────────────────────────────────────────────
+function sameJson(a, b) {
+    return JSON.stringify(a) === JSON.stringify(b);
+}
+
+function diffEntries(previous, current, same) {
+    const delta = {};
+    for (const [key, value] of Object.entries(current)) {
+        if (!(key in previous) || !same(previous[key], value)) delta[key] = value;
+    }
+    for (const key of Object.keys(previous)) {
+        if (!(key in current)) delta[key] = null;
+    }
+    return delta;
+}
+
+function withStateDelta(payload) {
+    const current = { values: payload.values, window_data: payload.window_data };
+    const previous = stateBaseline;
+    stateBaseline = current;
+    if (!previous) return { ...payload, state: 'full' };
+
+    const window_data = {};
+    for (const [key, value] of Object.entries(current.window_data)) {
+        if (key === 'localStorage' || key === 'sessionStorage') {
+            const changed = diffEntries(previous.window_data[key] || {}, value, (a, b) => a === b);
+            if (Object.keys(changed).length) window_data[key] = changed;
+        } else if (!sameJson(previous.window_data[key], value)) {
+            window_data[key] = value;
+        }
+    }
+
+    return {
+        ...payload,
+        state: 'delta',
+        values: diffEntries(previous.values, current.values, sameJson),
+        window_data
     };
 }
 
@@ -0,0 +1,84 @@
+import itertools
+import os
+import threading
+import time
+from typing import Callable
+from uuid import uuid4
+
+BASE62_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def to_base62(number: int) -> str:
+    if number < 0:
+        raise ValueError('number must be a non-negative integer')
+
+    if number == 0:
+        return BASE62_ALPHABET[0]
+
+    digits: list[str] = []
+    while number:
+        number, rem = divmod(number, 62)
+        digits.append(BASE62_ALPHABET[rem])
+
+    return ''.join(reversed(digits))
+
+class CompactIdGenerator:
+    """Sequential base62 element ids (``<prefix>_<counter>``).
+
+    The prefix encodes the process start epoch, the full pid and a few random
+    bits, so ids minted by different workers (on one host or several, before
+    or after a restart) never collide inside a persisted session. Ids are
+    ~14 characters instead of uuid4's 36.
+    """
+
+    def __init__(self, prefix: str = None):
+        self.__lock = threading.Lock()
+        self.reset(prefix=prefix)
+
+    @property
+    def prefix(self) -> str:
+        return self.__prefix
+
+    def reset(self, prefix: str = None):
+        with self.__lock:
+            self.__prefix = prefix if prefix is not None else self.default_prefix()
+            self.__counter = itertools.count(1)
+
+    @staticmethod
+    def default_prefix() -> str:
+        salt = int.from_bytes(os.urandom(2), 'big') % 3844
+        return to_base62(int(time.time())) + to_base62(os.getpid()) + to_base62(salt).rjust(2, '0')
+
+    def __call__(self) -> str:
+        # next() on itertools.count is atomic under the GIL
+        return f'{self.__prefix}_{to_base62(next(self.__counter))}'
+
+def uuid4_id_generator() -> str:
+    """Legacy generator: random uuid4 strings (pre-1.7 behaviour)."""
+    return str(uuid4())
+
+default_id_generator = CompactIdGenerator()
+__id_generator: Callable[[], str] = default_id_generator
+
+def set_id_generator(generator: Callable[[], str] = None):
+    """Replace the element id generator; ``None`` restores the compact default."""
+    global __id_generator
+
+    if generator is not None and not callable(generator):
+        raise TypeError(f'id generator must be callable, but got {type(generator).__name__}')
+
+    __id_generator = generator or default_id_generator
+
+def get_id_generator() -> Callable[[], str]:
+    return __id_generator
+
+def new_element_id() -> str:
+    value = __id_generator()
+
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('id generator must return a non-empty string')
+
+    return value
+
+if hasattr(os, 'register_at_fork'):
+    # Forked workers inherit the parent's counter; give each child its own prefix.
+    os.register_at_fork(after_in_child=default_id_generator.reset)
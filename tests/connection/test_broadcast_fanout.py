@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+from pyweber.connection.session import sessions
+from pyweber.connection.websocket import WebsocketManager, send_timeout
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.pyweber.pyweber import Pyweber
+
+
+class Conn:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, data, opcode=1):
+        await asyncio.sleep(self.delay)
+        self.sent.append((opcode, data))
+
+
+@pytest.fixture
+def manager():
+    manager = WebsocketManager(app=None)
+    yield manager
+    for session_id in list(manager.ws_connections):
+        sessions.remove_session(session_id)
+
+
+def _connect(manager, session_id, template, conn, features=('patch',)):
+    manager.add_session(session_id, template, Window(), '/')
+    sessions.get_session(session_id).features = frozenset(features)
+    manager.ws_connections[session_id] = conn
+    return conn
+
+
+class TestBroadcastFanOut:
+    async def test_sessions_on_the_same_version_share_one_render(self, manager, monkeypatch):
+        template = Template(template='<body><p id="n">0</p></body>')
+        conns = [_connect(manager, f'fan-{i}', template, Conn()) for i in range(3)]
+        renders = []
+        render = manager.data_to_json
+
+        async def counting(data, session_id, last_target=False):
+            renders.append(session_id)
+            return await render(data, session_id)
+
+        monkeypatch.setattr(manager, 'data_to_json', counting)
+        template.querySelector('#n').content = '1'
+        await manager.send_message({'template': template}, session_id=None)
+
+        assert renders == ['fan-0']
+        assert conns[0].sent and all(conn.sent == conns[0].sent for conn in conns)
+        baselines = {id(sessions.get_session(f'fan-{i}').old_template) for i in range(3)}
+        assert len(baselines) == 1
+
+    async def test_sessions_on_cloned_templates_share_one_render(self, manager, monkeypatch):
+        app = Pyweber()
+        app.add_route(route='/page', template=Template(template='<body><p id="n">0</p></body>'))
+        clones = [await app.clone_template('/page') for _ in range(3)]
+        conns = [_connect(manager, f'clone-{i}', clone, Conn()) for i, clone in enumerate(clones)]
+        renders = []
+        render = manager.data_to_json
+
+        async def counting(data, session_id, last_target=False):
+            renders.append(session_id)
+            return await render(data, session_id)
+
+        monkeypatch.setattr(manager, 'data_to_json', counting)
+        for clone in clones:
+            clone.querySelector('#n').content = '1'
+        await manager.send_message({'template': clones[0]}, session_id=None)
+
+        assert renders == ['clone-0']
+        assert b'"1"' in conns[0].sent[0][1] and all(conn.sent == conns[0].sent for conn in conns)
+        for i, clone in enumerate(clones):
+            assert sessions.get_session(f'clone-{i}').old_template.root is clone.snapshot().root
+
+        # Followers diff against their own baseline afterwards
+        clones[2].querySelector('#n').content = '2'
+        await manager.send_message({'template': clones[2]}, session_id=None)
+
+        assert renders == ['clone-0', 'clone-0', 'clone-2']
+        assert b'"2"' in conns[2].sent[1][1] and b'"1"' not in conns[2].sent[1][1]
+        assert conns[0].sent[1] == conns[1].sent[1] and b'"2"' not in conns[0].sent[1][1]
+
+    async def test_queued_element_methods_are_not_shared(self, manager):
+        template = Template(template='<body><input id="q"></body>')
+        clone = template.clone()
+        _connect(manager, 'm-1', template, Conn())
+        _connect(manager, 'm-2', clone, Conn())
+        assert manager.render_key({'template': template}, 'm-1') == manager.render_key({'template': clone}, 'm-2')
+
+        clone.querySelector('#q').click()
+        assert manager.render_key({'template': template}, 'm-1') != manager.render_key({'template': clone}, 'm-2')
+
+        await manager.send_message({'template': clone}, session_id='m-2')
+        assert manager.render_key({'template': template}, 'm-1') == manager.render_key({'template': clone}, 'm-2')
+
+    async def test_different_versions_and_formats_render_separately(self, manager):
+        shared = Template(template='<body><p>a</p></body>')
+        _connect(manager, 'v-1', shared, Conn())
+        _connect(manager, 'v-2', Template(template='<body><p>b</p></body>'), Conn())
+        _connect(manager, 'v-3', shared, Conn(), features=('patch', 'binary'))
+
+        keys = {manager.render_key({'template': shared}, s_id) for s_id in ('v-1', 'v-2', 'v-3')}
+        assert len(keys) == 3
+        assert manager.render_key({'reload': True}, 'v-1') == manager.render_key({'reload': True}, 'v-2')
+
+    async def test_slow_connection_does_not_stall_the_broadcast(self, manager, monkeypatch):
+        monkeypatch.setenv('PYWEBER_WS_SEND_TIMEOUT', '0.05')
+        template = Template(template='<body></body>')
+        slow = _connect(manager, 'slow', template, Conn(delay=5))
+        fast = [_connect(manager, f'fast-{i}', Template(template='<body></body>'), Conn(delay=0.02)) for i in range(5)]
+
+        started = time.perf_counter()
+        await manager.send_message({'reload': True}, session_id=None)
+
+        assert time.perf_counter() - started < 1
+        assert all(conn.sent == [(1, fast[0].sent[0][1])] for conn in fast)
+        assert slow.sent == []
+
+    def test_send_timeout_setting(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_WS_SEND_TIMEOUT', '2.5')
+        assert send_timeout() == 2.5
+        monkeypatch.setenv('PYWEBER_WS_SEND_TIMEOUT', '-1')
+        assert send_timeout() == 5.0
@@ -0,0 +1,169 @@
+import asyncio
+
+from pyweber.connection.event_gate import EventGate
+from pyweber.connection.session import sessions
+from pyweber.connection.websocket import WebsocketManager, event_is_running
+from pyweber.core.element import Element
+from pyweber.core.events import TemplateEvents
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.models.event_policy import debounce, latest_wins, throttle
+from pyweber.models.task_manager import TaskManager
+from pyweber.models.ws_message import wsMessage
+from pyweber.utils.types import EventType
+
+
+class Handler:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.seen = []
+
+    def __call__(self, value):
+        async def run():
+            self.seen.append(value)
+            await asyncio.sleep(self.delay)
+        return run
+
+
+class TestEventGate:
+    async def test_latest_wins_runs_the_last_event_after_a_busy_handler(self):
+        gate, handler = EventGate(), Handler(delay=0.03)
+        for value in range(10):
+            gate.submit('s1', 'evt', latest_wins(), handler(value))
+            await asyncio.sleep(0)
+
+        await gate.join()
+        assert handler.seen == [0, 9]
+        assert (gate.stats.received, gate.stats.ran, gate.stats.coalesced) == (10, 2, 8)
+
+    async def test_debounce_runs_once_with_the_last_event(self):
+        gate, handler = EventGate(), Handler()
+        for value in range(5):
+            gate.submit('s1', 'evt', debounce(20), handler(value))
+        assert handler.seen == []
+
+        await gate.join()
+        assert handler.seen == [4]
+
+    async def test_throttle_runs_leading_and_trailing_events(self):
+        gate, handler = EventGate(), Handler()
+        for value in range(5):
+            gate.submit('s1', 'evt', throttle(30), handler(value))
+            await asyncio.sleep(0)
+
+        await gate.join()
+        assert handler.seen == [0, 4]
+
+    async def test_slots_are_per_session(self):
+        gate, handler = EventGate(), Handler(delay=0.01)
+        gate.submit('s1', 'evt', latest_wins(), handler('a'))
+        gate.submit('s2', 'evt', latest_wins(), handler('b'))
+        await gate.join()
+        assert sorted(handler.seen) == ['a', 'b']
+
+    async def test_cancel_drops_pending_runs(self):
+        gate, handler = EventGate(), Handler()
+        gate.submit('s1', 'evt', debounce(20), handler(1))
+        gate.cancel('s1')
+
+        await asyncio.sleep(0.04)
+        assert handler.seen == []
+        assert not gate.pending('s1', 'evt')
+
+
+class TestMessageHandlerPolicies:
+    async def test_input_burst_delivers_the_last_value(self, pyweber_app):
+        manager = WebsocketManager(app=pyweber_app)
+        seen = []
+
+        async def on_input(e):
+            seen.append(e.event_data.key)
+            await asyncio.sleep(0.02)
+
+        field = Element('input', events=TemplateEvents(oninput=on_input))
+        template = Template('<html><body></body></html>')
+        template.body.childs = [field]
+        sid = 'gate-input'
+        manager.add_session(sid, template, Window(), '/')
+
+        def message(key):
+            msg = wsMessage(raw_message={
+                'type': 'input', 'event_ref': 'document', 'route': '/',
+                'target_uuid': field.uuid, 'current_target_uuid': field.uuid,
+                'template': None, 'values': {}, 'event_data': {'key': key},
+                'window_data': {}, 'window_response': {}, 'window_event': None,
+                'file_content': {}, 'sessionId': sid,
+            }, app=pyweber_app, ws=manager)
+            msg.session_id = sid
+            return msg
+
+        try:
+            for key in 'abcde':
+                assert not event_is_running(message(key), manager.task_manager)
+                await manager.message_handler(message(key))
+                await asyncio.sleep(0)
+
+            await manager.event_gate.join()
+            assert seen == ['a', 'e']
+        finally:
+            sessions.remove_session(sid)
+
+    async def test_gated_events_skip_the_server_debounce(self, pyweber_app):
+        manager = WebsocketManager(app=pyweber_app)
+        seen = []
+
+        async def on_input(e):
+            seen.append(e.event_data.key)
+
+        field = Element('input', events=TemplateEvents(oninput=on_input))
+        field.set_event_policy(EventType.INPUT, debounce(300))
+        template = Template('<html><body></body></html>')
+        template.body.childs = [field]
+        sid = 'gate-debounce'
+        manager.add_session(sid, template, Window(), '/')
+
+        def message(key, **extra):
+            msg = wsMessage(raw_message={
+                'type': 'input', 'event_ref': 'document', 'route': '/',
+                'target_uuid': field.uuid, 'current_target_uuid': field.uuid,
+                'template': None, 'values': {}, 'event_data': {'key': key},
+                'window_data': {}, 'window_response': {}, 'window_event': None,
+                'file_content': {}, 'sessionId': sid, **extra,
+            }, app=pyweber_app, ws=manager)
+            msg.session_id = sid
+            return msg
+
+        try:
+            await manager.message_handler(message('gated', gated=True))
+            await asyncio.sleep(0.02)
+            assert seen == ['gated']
+
+            await manager.message_handler(message('legacy'))
+            await asyncio.sleep(0.02)
+            assert seen == ['gated']
+
+            await manager.event_gate.join()
+            assert seen == ['gated', 'legacy']
+        finally:
+            sessions.remove_session(sid)
+
+    def test_click_keeps_dropping_while_running(self, pyweber_app):
+        def on_click(e):
+            pass
+
+        button = Element('button')
+        button.add_event(EventType.CLICK, on_click)
+        template = Template('<html><body></body></html>')
+        template.body.childs = [button]
+        sid = 'gate-click'
+        WebsocketManager(app=pyweber_app).add_session(sid, template, Window(), '/')
+
+        tm = TaskManager()
+        tm.active_handlers_async[sid] = {f'event_{id(on_click)}': object()}
+        msg = type('Msg', (), {'session_id': sid, 'target_uuid': button.uuid, 'type': 'click'})()
+        try:
+            assert event_is_running(msg, tm)
+            button.set_event_policy(EventType.CLICK, 'throttle:100')
+            assert not event_is_running(msg, tm)
+        finally:
+            sessions.remove_session(sid)
@@ -39,22 +39,25 @@ class TestHttpServerExtended:
             qr.add_data.assert_called_once()
             qr.print_ascii.assert_called_once()
 
-    def test_dispatch_websocket_uses_thread(self, server, monkeypatch):
+    def test_dispatch_websocket_uses_the_shared_loop(self, server, monkeypatch):
         from helpers import make_ws_upgrade_request
 
-        started = []
+        scheduled = []
 
-        class FakeThread:
-            def __init__(self, target=None, args=(), daemon=False):
-                started.append(True)
+        def fake_schedule(coro, loop):
+            scheduled.append(loop)
+            coro.close()
 
-            def start(self):
-                pass
+        monkeypatch.setattr('pyweber.connection.http.asyncio.run_coroutine_threadsafe', fake_schedule)
+        server._dispatch_client(RecvSocket(make_ws_upgrade_request()))
+        server._dispatch_client(RecvSocket(make_ws_upgrade_request()))
 
-        monkeypatch.setattr('pyweber.connection.http.threading.Thread', FakeThread)
-        client = RecvSocket(make_ws_upgrade_request())
-        server._dispatch_client(client)
-        assert started
+        try:
+            assert len(scheduled) == 2 and scheduled[0] is scheduled[1]
+            assert scheduled[0].is_running() or scheduled[0] is server.websocket_loop()
+        finally:
+            loop = server.websocket_loop()
+            loop.call_soon_threadsafe(loop.stop)
 
     def test_peek_is_websocket_false_and_exception(self, server):
         client = RecvSocket(make_http_request())
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+
+from pyweber.connection.outbound import OutboundQueue, max_lag, max_queue
+from pyweber.connection.session import sessions
+from pyweber.connection.websocket import WebsocketManager
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.models.ws_message import wsMessage
+
+
+class Writer:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.written = []
+
+    async def __call__(self, message, opcode):
+        await asyncio.sleep(self.delay)
+        self.written.append(message)
+        return True
+
+
+async def render(data):
+    return json.dumps(data), 1
+
+
+def _queue(writer, dropped, **limits):
+    return OutboundQueue(write=writer, render=render, on_overflow=dropped.append, **limits)
+
+
+class TestOutboundQueue:
+    async def test_frames_are_written_in_order_by_the_writer(self):
+        writer, dropped = Writer(), []
+        queue = _queue(writer, dropped)
+        futures = [queue.put(f'm{i}') for i in range(3)]
+        assert queue.depth == 3
+
+        assert await asyncio.gather(*futures) == [True, True, True]
+        assert writer.written == ['m0', 'm1', 'm2']
+        assert queue.depth == 0 and queue.stats.max_depth == 3
+
+    async def test_updates_behind_a_slow_write_are_collapsed(self):
+        writer, dropped = Writer(delay=0.02), []
+        queue = _queue(writer, dropped)
+        first = queue.put('patch-1')
+        updates = [queue.put_update({'step': step}) for step in range(10)]
+
+        await asyncio.gather(first, *updates)
+        assert writer.written == ['patch-1', '{"step": 9}']
+        assert queue.stats.collapsed == 9
+
+    async def test_full_queue_drops_the_connection(self):
+        writer, dropped = Writer(delay=1), []
+        queue = _queue(writer, dropped, size_limit=2)
+        futures = [queue.put(f'm{i}') for i in range(3)]
+
+        assert await asyncio.gather(*futures[1:]) == [False, False]
+        assert queue.closed and dropped == ['3 frames queued']
+        assert queue.stats.dropped == 1
+
+    async def test_lagging_connection_is_dropped(self):
+        writer, dropped = Writer(delay=0.05), []
+        queue = _queue(writer, dropped, lag_limit=0.01)
+        queue.put('m0')
+        late = queue.put('m1')
+
+        assert await late is False
+        assert queue.closed and dropped and 'behind' in dropped[0]
+        assert writer.written == ['m0']
+
+    def test_limits_from_env(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_WS_MAX_QUEUE', '8')
+        monkeypatch.setenv('PYWEBER_WS_MAX_LAG', '2.5')
+        assert (max_queue(), max_lag()) == (8, 2.5)
+        monkeypatch.setenv('PYWEBER_WS_MAX_QUEUE', 'zero')
+        assert max_queue() == 32
+
+
+class Conn:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def send(self, data, opcode=1):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(data))
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def manager():
+    manager = WebsocketManager(app=None)
+    yield manager
+    for session_id in list(manager.ws_connections):
+        sessions.remove_session(session_id)
+
+
+class TestSendMessageQueues:
+    async def test_backed_up_client_receives_one_consolidated_diff(self, manager):
+        template = Template(template='<body><p id="n">0</p></body>')
+        manager.add_session('slow', template, Window(), '/')
+        conn = manager.ws_connections['slow'] = Conn(delay=0.02)
+
+        sends = [manager.send_message({'reload': True}, session_id='slow')]
+        for step in range(1, 6):
+            template.querySelector('#n').content = str(step)
+            sends.append(manager.send_message({'template': template}, session_id='slow'))
+        await asyncio.gather(*sends)
+
+        assert len(conn.sent) == 2
+        assert '5' in json.dumps(conn.sent[1])
+        assert manager.outbound_stats.collapsed == 4
+        assert manager.queue_depths() == {'slow': 0}
+
+    async def test_state_reset_waits_behind_queued_frames(self, manager):
+        manager.add_session('slow', Template(template='<body></body>'), Window(), '/')
+        conn = manager.ws_connections['slow'] = Conn(delay=0.02)
+
+        update = asyncio.ensure_future(manager.send_message({'reload': True}, session_id='slow'))
+        await asyncio.sleep(0)
+        assert await manager.send_state_reset('slow', conn) is True
+        await update
+
+        assert conn.sent == [{'reload': True}, {'stateReset': True}]
+        assert manager.outbound_stats.enqueued == 2
+
+    async def test_inbound_message_keeps_the_baseline_of_a_deferred_update(self, manager):
+        template = Template(template='<body><p id="n">0</p></body>')
+        manager.add_session('slow', template, Window(), '/')
+        conn = manager.ws_connections['slow'] = Conn(delay=0.02)
+        inbound = {'sessionId': 'slow', 'route': '/', 'template': None, 'window_data': {}}
+
+        first = asyncio.ensure_future(manager.send_message({'reload': True}, session_id='slow'))
+        await asyncio.sleep(0)
+        template.querySelector('#n').content = 'A'
+        update = asyncio.ensure_future(manager.send_message({'template': template}, session_id='slow'))
+        await asyncio.sleep(0)
+        await manager.get_sync_template(wsMessage(raw_message=dict(inbound), app=None, ws=manager))
+        await asyncio.gather(first, update)
+
+        assert len(conn.sent) == 2 and '>A<' in json.dumps(conn.sent[1])
+
+    async def test_overflow_closes_only_the_slow_connection(self, manager, monkeypatch):
+        monkeypatch.setenv('PYWEBER_WS_MAX_QUEUE', '3')
+        for session_id, delay in (('slow', 1), ('fast', 0)):
+            manager.add_session(session_id, Template(template='<body></body>'), Window(), '/')
+            manager.ws_connections[session_id] = Conn(delay=delay)
+
+        for step in range(5):
+            asyncio.ensure_future(manager.send_message({'step': step}, session_id=None))
+            await asyncio.sleep(0.01)
+
+        assert manager.ws_connections['slow'].closed
+        assert len(manager.ws_connections['fast'].sent) == 5
+        assert manager.outbound_stats.dropped == 1
+        await manager.clear_session('slow')
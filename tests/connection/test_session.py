@@ -48,3 +48,24 @@ class TestSessionManager:
 
     def test_global_sessions_singleton(self):
         assert isinstance(sessions, SessionManager)
+
+    def test_route_index_follows_route_changes(self, session_manager):
+        def make(sid, route):
+            return Session(template=Mock(), window=Mock(), session_id=sid, current_route=route)
+
+        session_manager.add_session('a', make('a', '/home'))
+        session_manager.add_session('b', make('b', '/home'))
+        session_manager.add_session('c', make('c', '/about'))
+        assert sorted(session_manager.session_ids_on_route('/home')) == ['a', 'b']
+
+        session_manager.get_session('b').current_route = '/about'
+        assert session_manager.session_ids_on_route('/home') == ['a']
+        assert sorted(session_manager.session_ids_on_route('/about')) == ['b', 'c']
+
+        session_manager.remove_session('c')
+        session_manager.add_session('a', make('a', '/about'))
+        assert session_manager.session_ids_on_route('/home') == []
+        assert sorted(session_manager.session_ids_on_route('/about')) == ['a', 'b']
+
+        session_manager.sessions.clear()
+        assert session_manager.session_ids_on_route('/about') == []
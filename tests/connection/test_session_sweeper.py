@@ -0,0 +1,131 @@
+import time
+
+from pyweber.connection.session import Session, SessionManager, sessions
+from pyweber.connection.sweeper import ELEMENT_BYTES, SessionSweeper, session_cost
+from helpers import RecvSocket, make_masked_frame
+from pyweber.connection.websocket import WebsocketManager, WebsocketServer
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.models.handoff import TemplateHandoffRegistry, handoff_ttl
+
+
+def _session(session_id, idle=0.0, body='<p>x</p>'):
+    session = Session(Template(f'<html><body>{body}</body></html>'), Window(), session_id, '/')
+    session.last_active = time.time() - idle
+    return session
+
+
+class Evictions:
+    def __init__(self, manager):
+        self.manager = manager
+        self.ids = []
+
+    async def __call__(self, session_id):
+        self.ids.append(session_id)
+        self.manager.evict(session_id)
+
+
+class TestSessionSweeper:
+    async def test_idle_sessions_are_evicted_and_counted(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_SESSION_IDLE_TTL', '60')
+        manager = SessionManager()
+        for session_id, idle in (('old', 120), ('fresh', 5)):
+            manager.sessions[session_id] = _session(session_id, idle)
+        evict = Evictions(manager)
+        sweeper = SessionSweeper(evict=evict, manager=manager)
+
+        assert await sweeper.sweep() == ['old']
+        assert manager.all_sessions == ['fresh']
+        assert (manager.evicted, sweeper.stats.idle_evicted) == (1, 1)
+
+        manager.add_session('old', _session('old'))
+        assert manager.resurrected == 1 and not manager.was_evicted('old')
+
+    async def test_budget_evicts_least_recently_active_first(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_SESSION_IDLE_TTL', '0')
+        manager = SessionManager()
+        for session_id, idle in (('a', 30), ('b', 20), ('c', 10)):
+            manager.sessions[session_id] = _session(session_id, idle, body='<p>1</p>' * 200)
+        cost = session_cost(manager.sessions['a'])
+        assert cost >= 200 * ELEMENT_BYTES
+        monkeypatch.setenv('PYWEBER_SESSION_MEMORY_BUDGET_MB', str(cost * 1.5 / 1024 / 1024))
+        sweeper = SessionSweeper(evict=Evictions(manager), manager=manager)
+
+        assert await sweeper.sweep() == ['a', 'b']
+        assert sweeper.stats.budget_evicted == 2
+
+    async def test_evicted_session_keeps_its_stored_snapshot(self, monkeypatch):
+        manager = SessionManager()
+        deleted = []
+        monkeypatch.setattr(manager, '_schedule_delete', deleted.append)
+        manager.sessions['s'] = _session('s')
+
+        assert manager.evict('s')
+        manager.remove_session('s')
+        assert deleted == []
+        manager.remove_session('other')
+        assert deleted == ['other']
+
+    async def test_idle_sessions_with_a_live_connection_are_kept(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_SESSION_IDLE_TTL', '60')
+        manager = SessionManager()
+        for session_id in ('dashboard', 'gone'):
+            manager.sessions[session_id] = _session(session_id, 120)
+        sweeper = SessionSweeper(evict=Evictions(manager), manager=manager, connected=lambda s: s == 'dashboard')
+
+        assert await sweeper.sweep() == ['gone']
+        monkeypatch.setenv('PYWEBER_SESSION_IDLE_EVICT_CONNECTED', 'true')
+        assert await sweeper.sweep() == ['dashboard']
+
+    async def test_every_inbound_frame_counts_as_activity(self):
+        ws = WebsocketManager(app=None)
+        ws.add_session('push-only', Template('<html><body></body></html>'), Window(), '/')
+        session = sessions.get_session('push-only')
+        session.last_active -= 120
+        pong = make_masked_frame(b'', opcode=10) + make_masked_frame(b'', opcode=8)
+        server = WebsocketServer(RecvSocket(pong))
+        server.id = 'push-only'
+
+        try:
+            await server.manage_connection(lambda connection: None)
+            assert time.time() - session.last_active < 5
+        finally:
+            sessions.remove_session('push-only')
+
+    async def test_manager_closes_the_evicted_connection(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_SESSION_IDLE_TTL', '60')
+        monkeypatch.setenv('PYWEBER_SESSION_IDLE_EVICT_CONNECTED', '1')
+        ws = WebsocketManager(app=None)
+        ws.add_session('idle-ws', Template('<html><body></body></html>'), Window(), '/')
+        sessions.get_session('idle-ws').last_active -= 120
+
+        class Conn:
+            closed = False
+
+            async def close(self):
+                self.closed = True
+
+        conn = ws.ws_connections['idle-ws'] = Conn()
+        try:
+            assert 'idle-ws' in await ws.sweeper.sweep()
+            assert conn.closed and 'idle-ws' not in ws.ws_connections
+            assert sessions.get_session('idle-ws') is None
+        finally:
+            sessions.remove_session('idle-ws')
+
+
+class TestHandoffSweep:
+    def test_expired_handoffs_are_swept(self):
+        registry = TemplateHandoffRegistry(ttl=10)
+        stale = registry.create(Template('<html><body></body></html>'), '/')
+        fresh = registry.create(Template('<html><body></body></html>'), '/')
+        registry._entries[stale].created_at -= 60
+
+        assert registry.sweep() == 1
+        assert len(registry) == 1 and fresh in registry._entries
+
+    def test_ttl_setting(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_HANDOFF_TTL', '45')
+        assert handoff_ttl() == 45
+        monkeypatch.setenv('PYWEBER_HANDOFF_TTL', '-1')
+        assert handoff_ttl() == 300
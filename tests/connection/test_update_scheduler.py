@@ -0,0 +1,217 @@
+import asyncio
+import json
+
+import pytest
+
+from pyweber.connection.scheduler import UpdateScheduler, update_window
+from pyweber.connection.session import sessions
+from pyweber.connection.websocket import WebsocketManager
+from pyweber.core.element import Element
+from pyweber.core.events import EventData, EventHandler
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.models.ws_message import wsMessage
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, data, session_id, route=None):
+        self.sent.append((session_id, route, dict(data)))
+
+
+class TestUpdateScheduler:
+    async def test_requests_in_one_window_become_one_send(self):
+        send = Recorder()
+        scheduler = UpdateScheduler(send=send, window=0.02)
+
+        for step in range(50):
+            await scheduler.request({'progress': step}, session_id='s1')
+        assert send.sent == []
+
+        await asyncio.sleep(0.05)
+        assert send.sent == [('s1', None, {'progress': 49})]
+        assert (scheduler.stats.requested, scheduler.stats.sent, scheduler.stats.coalesced) == (50, 1, 49)
+
+    async def test_sessions_and_broadcast_routes_are_separate(self):
+        send = Recorder()
+        scheduler = UpdateScheduler(send=send, window=0.01)
+
+        await scheduler.request({'a': 1}, session_id='s1', route='/x')
+        await scheduler.request({'b': 1}, session_id='s2', route='/x')
+        await scheduler.request({'c': 1}, session_id=None, route='/x')
+        await scheduler.flush_all()
+
+        assert sorted(send.sent, key=repr) == sorted([
+            ('s1', '/x', {'a': 1}), ('s2', '/x', {'b': 1}), (None, '/x', {'c': 1})
+        ], key=repr)
+
+    async def test_flush_sends_now_and_disarms_the_timer(self):
+        send = Recorder()
+        scheduler = UpdateScheduler(send=send, window=0.02)
+
+        await scheduler.request({'step': 1}, session_id='s1')
+        await scheduler.flush('s1', data={'step': 2})
+        assert send.sent == [('s1', None, {'step': 2})]
+        assert not scheduler.pending('s1')
+
+        await asyncio.sleep(0.05)
+        assert len(send.sent) == 1
+
+    async def test_zero_window_and_cancel(self):
+        send = Recorder()
+        scheduler = UpdateScheduler(send=send, window=0)
+        await scheduler.request({'x': 1}, session_id='s1')
+        assert len(send.sent) == 1
+
+        scheduler.window = 0.01
+        await scheduler.request({'x': 2}, session_id='s1')
+        scheduler.cancel('s1')
+        await asyncio.sleep(0.03)
+        assert len(send.sent) == 1
+
+    async def test_updates_inside_a_batch_go_out_when_it_closes(self):
+        send = Recorder()
+        scheduler = UpdateScheduler(send=send, window=0)
+        template = Template(template='<body><p id="n">0</p></body>')
+
+        async with template.batch():
+            for step in range(3):
+                template.querySelector('#n').content = str(step)
+                await scheduler.request({'template': template, 'step': step}, session_id='s1')
+            await scheduler.flush('s1')
+            await asyncio.sleep(0.01)
+            assert send.sent == []
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(send.sent) == 1 and send.sent[0][2]['step'] == 2
+        assert scheduler.stats.sent == 1
+
+    async def test_direct_send_inside_a_batch_is_held(self):
+        manager = WebsocketManager(app=None)
+        template = Template(template='<body><ul id="list"></ul></body>')
+        manager.add_session('s-batch', template, Window(), '/')
+        sent = []
+
+        class Connection:
+            async def send(self, message, opcode=1):
+                sent.append(message)
+        manager.ws_connections['s-batch'] = Connection()
+
+        try:
+            async with template.batch():
+                template.querySelector('#list').childs.append(Element('li', content='a'))
+                await manager.send_message({'template': template}, session_id='s-batch')
+                template.querySelector('#list').childs.append(Element('li', content='b'))
+                assert sent == []
+
+            await manager.updates.flush_all()
+            await manager.send_message({'template': template}, session_id='s-batch')
+            first, second = (json.loads(message) for message in sent)
+            assert json.dumps(first).count('<li') == 2
+            assert '<li' not in json.dumps(second)
+        finally:
+            sessions.remove_session('s-batch')
+
+    async def test_inbound_message_inside_a_batch_keeps_the_baseline(self):
+        manager = WebsocketManager(app=None)
+        template = Template(template='<body><p id="n">0</p><p id="k">0</p></body>')
+        manager.add_session('s-rebase', template, Window(), '/')
+        sent = []
+
+        class Connection:
+            async def send(self, message, opcode=1):
+                sent.append(message)
+        manager.ws_connections['s-rebase'] = Connection()
+        inbound = {'sessionId': 's-rebase', 'route': '/', 'template': None, 'window_data': {}}
+
+        try:
+            async with template.batch():
+                template.querySelector('#n').content = 'A'
+                await manager.get_sync_template(wsMessage(raw_message=dict(inbound), app=None, ws=manager))
+                template.querySelector('#k').content = 'B'
+                await manager.send_message({'template': template}, session_id='s-rebase')
+
+            await manager.updates.flush_all()
+            assert len(sent) == 1
+            assert '>A<' in sent[0].decode() and '>B<' in sent[0].decode()
+        finally:
+            sessions.remove_session('s-rebase')
+
+    async def test_inbound_message_inside_the_window_keeps_the_baseline(self):
+        manager = WebsocketManager(app=None)
+        manager.updates.window = 0.02
+        template = Template(template='<body><p id="n">0</p></body>')
+        manager.add_session('s-window', template, Window(), '/')
+        sent = []
+
+        class Connection:
+            async def send(self, message, opcode=1):
+                sent.append(message)
+        manager.ws_connections['s-window'] = Connection()
+        inbound = {'sessionId': 's-window', 'route': '/', 'template': None, 'window_data': {}}
+
+        try:
+            template.querySelector('#n').content = 'A'
+            await manager.updates.request({'template': template}, session_id='s-window', route='/')
+            await manager.get_sync_template(wsMessage(raw_message=dict(inbound), app=None, ws=manager))
+            await asyncio.sleep(0.05)
+
+            assert len(sent) == 1 and '>A<' in sent[0].decode()
+        finally:
+            sessions.remove_session('s-window')
+
+    def test_window_setting(self, monkeypatch):
+        monkeypatch.setenv('PYWEBER_WS_UPDATE_WINDOW_MS', '40')
+        assert update_window() == pytest.approx(0.04)
+        monkeypatch.setenv('PYWEBER_WS_UPDATE_WINDOW_MS', 'nope')
+        assert update_window() == pytest.approx(0.016)
+
+
+class TestEventHandlerUpdates:
+    @pytest.fixture
+    def handler(self):
+        manager = WebsocketManager(app=None)
+        manager.updates.window = 0.02
+        send = Recorder()
+        manager.send_message = send
+
+        template = Template(template='<body><p id="bar">0%</p></body>')
+        manager.add_session('s-progress', template, Window(), '/')
+        handler = EventHandler(
+            event_type='click',
+            route='/',
+            target=template.querySelector('#bar'),
+            current_target=template.querySelector('#bar'),
+            template=template,
+            window=Window(),
+            event_data=EventData({}),
+            app=None,
+            session=sessions.get_session('s-progress'),
+            ws=manager,
+        )
+        yield handler, send
+        sessions.remove_session('s-progress')
+
+    async def test_update_in_a_loop_sends_one_frame(self, handler):
+        e, send = handler
+        for percent in range(0, 101, 5):
+            e.target.content = f'{percent}%'
+            e.update()
+
+        await asyncio.sleep(0.06)
+        assert len(send.sent) == 1
+        assert send.sent[0][0] == 's-progress' and 'template' in send.sent[0][2]
+
+    async def test_flush_delivers_immediately(self, handler):
+        e, send = handler
+        e.update()
+        e.flush()
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(send.sent) == 1
+        await asyncio.sleep(0.05)
+        assert len(send.sent) == 1
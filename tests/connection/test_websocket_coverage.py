@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import socket
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -581,7 +582,7 @@ class TestWsHandlers:
         sid = 'wsgi-live'
         manager.add_session(sid, tpl, Window(), '/wsgi-click')
         sock.id = sid
-        sock._WebsocketServer__messages.append(
+        sock.feed(
             json.dumps(
                 _full_message(
                     type='click',
@@ -709,10 +710,8 @@ class TestWsHandlers:
             type='',
             event_ref='',
         )
-        sock._WebsocketServer__messages.extend([
-            json.dumps(file_msg),
-            json.dumps(win_msg),
-        ])
+        sock.feed(json.dumps(file_msg))
+        sock.feed(json.dumps(win_msg))
 
         processed = {'n': 0}
 
@@ -805,25 +804,21 @@ class TestWebsocketServerFrames:
                 return b''
 
         ws = WebsocketServer(BoomClose())
-        ws._WebsocketServer__messages.append('x')
+        ws.feed('x')
         assert await ws.__anext__() == 'x'
         await ws.close()
 
     @pytest.mark.asyncio
     async def test_read_exact_blocking_then_data(self):
-        class Flaky:
-            def __init__(self):
-                self.n = 0
-            def setblocking(self, f): pass
-            def recv(self, n):
-                self.n += 1
-                if self.n == 1:
-                    raise BlockingIOError()
-                return b'ab'[:n]
-
-        ws = WebsocketServer(Flaky())
-        data = await ws.read_exact(2)
-        assert data == b'ab'
+        server_sock, peer = socket.socketpair()
+        try:
+            ws = WebsocketServer(server_sock)
+            asyncio.get_running_loop().call_later(0.05, peer.send, b'ab')
+            data = await asyncio.wait_for(ws.read_exact(2), timeout=1)
+            assert data == b'ab'
+        finally:
+            server_sock.close()
+            peer.close()
 
     def test_remove_connection_without_loop(self, pyweber_app):
         manager = pyweber_app.ws_server
@@ -0,0 +1,133 @@
+import asyncio
+import zlib
+
+import pytest
+
+from helpers import RecvSocket, make_masked_frame
+from pyweber.connection.deflate import PerMessageDeflate, parse_offers
+from pyweber.connection.websocket import WebsocketServer, WebsocketUpgrade
+
+
+def _upgrade(extensions: str = None) -> WebsocketUpgrade:
+    headers = (
+        'GET / HTTP/1.1\r\n'
+        'Host: localhost\r\n'
+        'Connection: Upgrade\r\n'
+        'Upgrade: websocket\r\n'
+        'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n'
+        + (f'Sec-WebSocket-Extensions: {extensions}\r\n' if extensions else '')
+        + '\r\n'
+    )
+    return WebsocketUpgrade(headers=headers.encode('iso-8859-1'))
+
+
+class _Client:
+    """Browser side of the extension: raw inflate with a shared window."""
+
+    def __init__(self):
+        self.inflate = zlib.decompressobj(-15)
+        self.deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+
+    def receive(self, frame: bytes) -> tuple[bool, bytes]:
+        rsv1 = bool(frame[0] & 0x40)
+        length = frame[1] & 0x7F
+        offset = 2 + {126: 2, 127: 8}.get(length, 0)
+        payload = frame[offset:]
+        return rsv1, (self.inflate.decompress(payload + b'\x00\x00\xff\xff') if rsv1 else payload)
+
+    def send(self, payload: bytes) -> bytes:
+        data = self.deflate.compress(payload) + self.deflate.flush(zlib.Z_SYNC_FLUSH)
+        frame = bytearray(make_masked_frame(data[:-4]))
+        frame[0] |= 0x40
+        return bytes(frame)
+
+
+class TestNegotiation:
+    def test_parse_offers_skips_invalid_ones(self):
+        offers = parse_offers(
+            'x-webkit-deflate-frame, permessage-deflate; foo=1, '
+            'permessage-deflate; client_max_window_bits; server_max_window_bits=10'
+        )
+        assert offers == [{'client_max_window_bits': None, 'server_max_window_bits': '10'}]
+
+    def test_upgrade_response_accepts_the_offer(self):
+        upgrade = _upgrade('permessage-deflate; client_max_window_bits')
+        assert upgrade.deflate is not None
+        assert 'Sec-WebSocket-Extensions: permessage-deflate\r\n' in upgrade.upgrade_response
+        assert upgrade.upgrade_response.endswith('\r\n\r\n')
+
+    def test_server_parameters_are_honoured(self):
+        upgrade = _upgrade('permessage-deflate; server_max_window_bits=10; server_no_context_takeover')
+        assert upgrade.deflate.window_bits == 10
+        assert upgrade.deflate.context_takeover is False
+        assert upgrade.deflate.response_header == (
+            'permessage-deflate; server_no_context_takeover; server_max_window_bits=10'
+        )
+
+    def test_unsupported_or_missing_offers_run_uncompressed(self, monkeypatch):
+        assert _upgrade().deflate is None
+        assert _upgrade('permessage-deflate; server_max_window_bits=8').deflate is None
+        assert 'Sec-WebSocket-Extensions' not in _upgrade().upgrade_response
+
+        monkeypatch.setenv('PYWEBER_WS_DEFLATE', 'off')
+        assert _upgrade('permessage-deflate').deflate is None
+
+
+class TestCompression:
+    async def test_outgoing_frames_share_the_dictionary(self):
+        ws = WebsocketServer(RecvSocket(b''), deflate=PerMessageDeflate(min_bytes=16))
+        client = _Client()
+        message = b'{"patch": [{"op": "set-text", "uuid": "abc", "text": "hello world"}]}' * 4
+
+        first = await ws.frame_to_send(message)
+        second = await ws.frame_to_send(message)
+
+        assert client.receive(first) == (True, message)
+        assert client.receive(second) == (True, message)
+        assert len(second) < len(first) < len(message)
+
+    async def test_cancelled_sender_does_not_advance_the_dictionary(self):
+        ws = WebsocketServer(RecvSocket(b''), deflate=PerMessageDeflate(min_bytes=16))
+        client, written, release = _Client(), [], asyncio.Event()
+        message = b'{"patch": [{"op": "set-text", "uuid": "abc", "text": "hello world"}]}' * 4
+
+        async def write_all(frame: bytes):
+            await release.wait()
+            written.append(frame)
+        ws.write_all = write_all
+
+        first = asyncio.create_task(ws.send(message))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(ws.send(b'{"dropped": true}' * 8))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        release.set()
+        await asyncio.gather(first, return_exceptions=True)
+        await ws.send(message)
+
+        assert [client.receive(frame) for frame in written] == [(True, message), (True, message)]
+
+    async def test_small_messages_are_sent_uncompressed(self):
+        ws = WebsocketServer(RecvSocket(b''), deflate=PerMessageDeflate(min_bytes=256))
+        frame = await ws.frame_to_send(b'{"reload": true}')
+        assert not frame[0] & 0x40 and frame.endswith(b'{"reload": true}')
+
+    async def test_incoming_compressed_messages_are_inflated(self):
+        client = _Client()
+        frames = client.send(b'{"first": 1}') + client.send(b'{"first": 1}') + make_masked_frame(b'', opcode=8)
+        ws = WebsocketServer(RecvSocket(frames), deflate=PerMessageDeflate())
+        seen = []
+
+        def handler(server):
+            seen.extend(server)
+
+        await ws.manage_connection(handler)
+        assert seen == ['{"first": 1}', '{"first": 1}']
+
+    def test_decompression_is_bounded(self):
+        deflate = PerMessageDeflate(max_size=1024)
+        bomb = zlib.compressobj(9, zlib.DEFLATED, -15)
+        payload = bomb.compress(b'\0' * 100_000) + bomb.flush(zlib.Z_SYNC_FLUSH)
+
+        with pytest.raises(ValueError):
+            deflate.decompress(payload[:-4])
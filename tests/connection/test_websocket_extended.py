@@ -95,6 +95,36 @@ class TestWebsocketManagerExtended:
         await manager.send_message(data={'ping': 1}, session_id=None)
         assert sent
 
+    def test_connection_map_indexes_send_callables(self):
+        from pyweber.connection.websocket import ConnectionMap
+
+        async def send_a(message): ...
+        async def send_b(message): ...
+
+        connections = ConnectionMap({'a': send_a})
+        connections['b'] = send_b
+        assert connections.session_for(send_b) == 'b'
+
+        connections['b'] = send_a
+        assert connections.session_for(send_b) is None
+        connections.pop('b')
+        assert connections.session_for(send_a) == 'a'
+        del connections['a']
+        assert connections.session_for(send_a) is None and connections == {}
+
+    @pytest.mark.asyncio
+    async def test_asgi_disconnect_drops_the_session_of_that_send(self, manager, monkeypatch):
+        async def send(message): ...
+
+        async def handler(receive, send, cookies=None):
+            manager.add_session('asgi-1', Template(template='<html></html>'), Window(), '/')
+            manager.ws_connections['asgi-1'] = send
+
+        monkeypatch.setattr(manager, 'ws_handler_asgi', handler)
+        await manager({'type': 'websocket', 'headers': []}, receive=None, send=send)
+        assert 'asgi-1' not in manager.ws_connections
+        assert sessions.get_session('asgi-1') is None
+
     def _full_message(self, **overrides):
         message = {
             'type': '',
@@ -1,10 +1,12 @@
 import asyncio
 import json
+import os
+import socket
 
 import pytest
 
 from helpers import RecvSocket, make_masked_frame
-from pyweber.connection.websocket import WebsocketServer, WebsocketManager, event_is_running
+from pyweber.connection.websocket import WebsocketServer, WebsocketManager, event_is_running, unmask
 from pyweber.pyweber.pyweber import Pyweber
 from pyweber.core.template import Template
 
@@ -35,6 +37,12 @@ class TestWebsocketFrames:
         assert message == payload
         assert fin == 1
 
+    @pytest.mark.parametrize('size', [0, 1, 3, 4, 5, 1023, 70000])
+    def test_unmask_matches_bytewise_xor(self, size):
+        payload = bytes([0, 0]) + os.urandom(max(size - 2, 0)) if size >= 2 else os.urandom(size)
+        key = b'\x00\xff\x10\x01'
+        assert unmask(payload, key) == bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+
     @pytest.mark.asyncio
     async def test_receive_rejects_unmasked_client_frame(self):
         # Frame sem bit de mask — servidor deve ignorar
@@ -88,13 +96,13 @@ class TestWebsocketServerMore:
 
     def test_iter_with_queued_message(self):
         ws = WebsocketServer(RecvSocket(b''))
-        ws._WebsocketServer__messages.append(b'queued')
+        ws.feed(b'queued')
         assert next(iter(ws)) == b'queued'
 
     @pytest.mark.asyncio
     async def test_aiter_yields_queued(self):
         ws = WebsocketServer(RecvSocket(b''))
-        ws._WebsocketServer__messages.append('hello')
+        ws.feed('hello')
 
         async def take_one():
             async for msg in ws:
@@ -104,6 +112,69 @@ class TestWebsocketServerMore:
         assert result == 'hello'
 
 
+class TestEventLoopTransport:
+    @staticmethod
+    async def _recv_frame(peer) -> bytes:
+        loop = asyncio.get_running_loop()
+        header = await loop.sock_recv(peer, 2)
+        return header + (await loop.sock_recv(peer, header[1] & 0x7F) if header[1] & 0x7F else b'')
+
+    @pytest.mark.asyncio
+    async def test_connections_share_the_loop_and_never_poll(self, monkeypatch):
+        sleeps = []
+        real_sleep = asyncio.sleep
+
+        async def spy_sleep(delay, *args, **kwargs):
+            sleeps.append(delay)
+            return await real_sleep(delay, *args, **kwargs)
+
+        monkeypatch.setattr('pyweber.connection.websocket.asyncio.sleep', spy_sleep)
+        loop = asyncio.get_running_loop()
+        pairs = [socket.socketpair() for _ in range(3)]
+        for server_sock, peer in pairs:
+            peer.setblocking(False)
+        received = asyncio.Queue()
+
+        async def handler(server):
+            async for message in server:
+                await received.put(message)
+
+        servers = [WebsocketServer(server_sock) for server_sock, _ in pairs]
+        tasks = [asyncio.create_task(ws.manage_connection(handler)) for ws in servers]
+        try:
+            for index, (_, peer) in enumerate(pairs):
+                await loop.sock_sendall(peer, make_masked_frame(f'm{index}'.encode()))
+            messages = {await asyncio.wait_for(received.get(), timeout=1) for _ in pairs}
+            assert messages == {'m0', 'm1', 'm2'}
+
+            # Ping is answered with a pong carrying the same payload
+            peer = pairs[0][1]
+            await loop.sock_sendall(peer, make_masked_frame(b'hb', opcode=9))
+            pong = await asyncio.wait_for(self._recv_frame(peer), timeout=1)
+            assert pong == bytes([0x8A, 2]) + b'hb'
+
+            for _, peer in pairs:
+                await loop.sock_sendall(peer, make_masked_frame(b'', opcode=8))
+            await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+        finally:
+            for server_sock, peer in pairs:
+                server_sock.close()
+                peer.close()
+
+        # Only the keepalive timers sleep; nothing waits in 10 ms steps
+        assert all(delay == WebsocketServer.ping_interval for delay in sleeps)
+
+    @pytest.mark.asyncio
+    async def test_iteration_ends_when_the_connection_closes(self):
+        ws = WebsocketServer(RecvSocket(make_masked_frame(b'', opcode=8)))
+        ws.feed('pending')
+
+        await ws.manage_connection(lambda server: None)
+
+        assert [message async for message in ws] == ['pending']
+        assert list(ws) == []
+
+
 class TestWebsocketManager:
     @pytest.fixture
     def manager(self, pyweber_app):
@@ -0,0 +1,111 @@
+import pytest
+
+from pyweber.core.element import Element
+from pyweber.core.selector import SelectorSyntaxError, compile_query, compile_selector
+from pyweber.core.template import Template
+
+HTML = '''
+<body>
+  <nav id="top" class="bar"><a href="/home" class="link active" lang="en-US">Home</a></nav>
+  <main>
+    <ul id="list">
+      <li class="item" data-kind="fruit apple"><span class="label">A</span></li>
+      <li class="item done" data-kind="veg"><span class="label">B</span></li>
+    </ul>
+    <form><input name="email" type="email"><input name="pwd" type="password"></form>
+  </main>
+</body>
+'''
+
+
+@pytest.fixture
+def tpl():
+    return Template(template=HTML)
+
+
+@pytest.fixture
+def detached():
+    return Element.from_html(f'<html>{HTML}</html>')
+
+
+@pytest.fixture(params=['indexed', 'detached'])
+def root(request, tpl, detached):
+    return tpl.root if request.param == 'indexed' else detached
+
+
+class TestCssSelectors:
+    def test_compound_tag_class_id(self, root):
+        assert root.querySelector('ul#list').id == 'list'
+        assert [el.get_attr('data-kind') for el in root.querySelectorAll('li.item.done')] == ['veg']
+        assert root.querySelector('a.link.active[href="/home"]').content == 'Home'
+        assert root.querySelector('div#list') is None
+
+    def test_descendant_and_child_combinators(self, root):
+        assert [el.content for el in root.querySelectorAll('main span.label')] == ['A', 'B']
+        assert [el.content for el in root.querySelectorAll('ul > li > span')] == ['A', 'B']
+        assert root.querySelectorAll('main > span') == []
+        assert root.querySelector('nav>a').content == 'Home'
+
+    def test_attribute_operators(self, root):
+        assert root.querySelector('[data-kind~=apple]') is not None
+        assert root.querySelector('[lang|=en]') is not None
+        assert root.querySelector('[href^="/ho"]') is not None
+        assert root.querySelector('[href$=me]') is not None
+        assert root.querySelector('[href*=om]') is not None
+        assert root.querySelector('[type=EMAIL i]') is not None
+        assert root.querySelector('[data-kind=fruit]') is None
+        assert len(root.querySelectorAll('input[name]')) == 2
+
+    def test_selector_lists_and_universal(self, root):
+        found = root.querySelectorAll('nav a, input[type=password]')
+        assert [el.tag for el in found] == ['a', 'input']
+        assert len(root.querySelectorAll('ul > *')) == 2
+
+    def test_legacy_forms_still_work(self, root):
+        assert root.querySelector('[name=email; type=email]') is not None
+        assert root.querySelector('[name:pwd]') is not None
+        assert root.querySelectorAll('li', search_mode='exact')
+        assert [el.id for el in root.querySelectorAll('#lis', search_mode='startswith')] == ['list']
+
+
+class TestCompiledSelectors:
+    def test_compile_is_cached(self):
+        assert compile_selector('ul > li.item') is compile_selector('ul > li.item')
+        assert compile_query('classes', 'item', 'regex') is compile_query('classes', 'item', 'regex')
+
+    @pytest.mark.parametrize('selector', ['', '> li', 'ul >', 'li:hover', '.a div#x span,'])
+    def test_invalid_selectors(self, selector):
+        with pytest.raises(SelectorSyntaxError):
+            compile_selector(selector)
+
+    def test_query_selector_stops_at_first_match(self, detached, monkeypatch):
+        visited = []
+        compiled = compile_selector('li')
+        original = compiled.matches
+
+        def spy(element):
+            visited.append(element)
+            return original(element)
+
+        monkeypatch.setattr(compiled, 'matches', spy)
+        assert detached.querySelector('li') is not None
+        total = len(detached.querySelectorAll('*'))
+        assert len(visited) < total
+
+    def test_get_element_early_exit_with_regex(self, root):
+        assert root.getElement(by='classes', value='^it', search_mode='regex').tag == 'li'
+
+
+class TestIndexedSelectors:
+    def test_index_tracks_mutations_for_compound_queries(self, tpl):
+        ul = tpl.querySelector('#list')
+        ul.add_child(Element('li', classes=['item', 'new'], childs=[Element('span', classes=['label'], content='C')]))
+        assert [el.content for el in tpl.querySelectorAll('ul > li.item > span.label')] == ['A', 'B', 'C']
+
+        tpl.querySelector('li.new').remove_class('item')
+        assert len(tpl.querySelectorAll('li.item')) == 2
+
+    def test_scoped_query(self, tpl):
+        nav = tpl.querySelector('nav')
+        assert nav.querySelector('li') is None
+        assert nav.querySelector('.link') is not None
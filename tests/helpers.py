@@ -16,6 +16,10 @@ class RecvSocket:
     def sendall(self, data: bytes):
         self.sent += data
 
+    def send(self, data: bytes) -> int:
+        self.sent += bytes(data)
+        return len(data)
+
     def close(self):
         self.closed = True
 
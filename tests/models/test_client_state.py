@@ -0,0 +1,140 @@
+import copy
+import json
+from unittest.mock import AsyncMock, Mock
+
+from pyweber.connection.session import Session, sessions
+from pyweber.connection.websocket import WebsocketManager
+from pyweber.core.window import Window
+from pyweber.models.client_state import ClientState
+from pyweber.models.ws_message import wsMessage
+
+
+def _full():
+    return {
+        'values': {'in-1': {'value': 'a'}, 'in-2': {'value': 'b'}},
+        'window_data': {
+            'width': 1280,
+            'screen': {'width': 1920},
+            'location': {'pathname': '/'},
+            'localStorage': {'theme': 'dark', 'lang': 'pt'},
+            'sessionStorage': {},
+        },
+    }
+
+
+class TestClientState:
+    def test_full_message_sets_the_baseline(self):
+        state = ClientState()
+        message = _full()
+        assert state.apply(message)
+        assert state.synced and message['window_changed'] is None
+        assert message['all_values'] == {'in-1': {'value': 'a'}, 'in-2': {'value': 'b'}}
+
+    def test_delta_is_merged_and_reported(self):
+        state = ClientState()
+        state.apply(_full())
+
+        message = {
+            'state': 'delta',
+            'values': {'in-1': {'value': 'ab'}, 'in-2': None},
+            'window_data': {'width': 800, 'localStorage': {'lang': None, 'token': 'x'}},
+        }
+        assert state.apply(message)
+        assert 'state' not in message
+        assert message['values'] == {'in-1': {'value': 'ab'}}
+        assert message['all_values'] == {'in-1': {'value': 'ab'}}
+        assert message['window_changed'] == ['width', 'localStorage']
+        assert message['window_data']['width'] == 800
+        assert message['window_data']['screen'] == {'width': 1920}
+        assert message['window_data']['localStorage'] == {'theme': 'dark', 'token': 'x'}
+
+    def test_delta_without_baseline_asks_for_a_resync(self):
+        state = ClientState()
+        message = {'state': 'delta', 'values': {'in-1': {'value': 'x'}}, 'window_data': {'width': 1}}
+        assert state.apply(message) is False
+        assert message['values'] == {} and not state.synced
+
+    def test_held_event_is_released_with_the_full_state(self):
+        state = ClientState()
+        orphan = {'type': 'click', 'state': 'delta', 'values': {}, 'window_data': {}}
+        state.apply(orphan)
+        state.hold(orphan)
+        assert state.release() == []
+
+        state.apply(_full())
+        (released,) = state.release()
+        assert released['type'] == 'click'
+        assert released['all_values'] == {'in-1': {'value': 'a'}, 'in-2': {'value': 'b'}}
+        assert released['window_data']['width'] == 1280 and released['window_changed'] is None
+        assert state.release() == []
+
+
+class TestDeltaMessages:
+    def _message(self, **overrides):
+        message = {
+            'type': 'input', 'event_ref': 'document', 'route': '/',
+            'target_uuid': 'in-1', 'current_target_uuid': 'in-1', 'template': None,
+            'event_data': {}, 'window_response': {}, 'window_event': None,
+            'sessionId': 'delta-1', 'file_content': {}, 'handoffToken': None,
+        }
+        message.update(overrides)
+        return message
+
+    def test_window_parts_absent_from_the_delta_are_kept(self):
+        state = ClientState()
+        sessions.add_session('delta-1', Session(template=None, window=Window(), session_id='delta-1', current_route='/'))
+        try:
+            first = self._message(**_full())
+            state.apply(first)
+            window = wsMessage(raw_message=first, app=None, ws=None).window
+            screen, storage = window.screen, window.local_storage
+
+            second = self._message(state='delta', values={}, window_data={'width': 640})
+            state.apply(second)
+            window = wsMessage(raw_message=second, app=None, ws=None).window
+
+            assert window.width == 640
+            assert window.screen is screen and window.local_storage is storage
+        finally:
+            sessions.remove_session('delta-1')
+
+    def test_handler_requests_a_resync_for_an_orphan_delta(self):
+        manager = WebsocketManager(app=Mock(list_routes=['/']))
+        state = ClientState()
+        payload = self._message(state='delta', values={}, window_data={})
+
+        message = manager.process_ws_message_handler(json.dumps(payload), state=state)
+        assert message.get('stateReset') is True
+
+    async def test_event_that_hit_a_reset_is_replayed_after_the_resync(self):
+        manager = WebsocketManager(app=Mock(list_routes=['/']))
+        manager.send_state_reset = AsyncMock()
+        manager._ensure_session_and_template = AsyncMock(return_value=('delta-1', None, False))
+        manager.update_session = Mock()
+        handled = []
+        manager.message_handler = AsyncMock(side_effect=lambda message: handled.append(message))
+
+        resync = {'route': '/', 'sessionId': 'delta-1', **_full()}
+        frames = [
+            {'type': 'websocket.receive', 'text': json.dumps(self._message(state='delta', values={}, window_data={}))},
+            {'type': 'websocket.receive', 'text': json.dumps(resync)},
+            {'type': 'websocket.disconnect'},
+        ]
+        receive = AsyncMock(side_effect=frames)
+        await manager.ws_handler_asgi(receive=receive, send=AsyncMock())
+
+        manager.send_state_reset.assert_awaited_once()
+        (message,) = handled
+        assert message.type == 'input' and message.target_uuid == 'in-1'
+        assert message.window.width == 1280
+
+    def test_typing_delta_is_small_regardless_of_page_size(self):
+        state = ClientState()
+        full = _full()
+        full['values'] = {f'in-{i}': {'value': 'x' * 50} for i in range(2000)}
+        state.apply(copy.deepcopy(full))
+
+        delta = self._message(state='delta', values={'in-7': {'value': 'xy'}}, window_data={})
+        assert len(json.dumps(delta)) < 400
+        state.apply(delta)
+        assert len(state.values) == 2000 and state.values['in-7'] == {'value': 'xy'}
@@ -0,0 +1,104 @@
+from pyweber.core.element import Element
+from pyweber.core.template import Template
+from pyweber.models.dom_hash import divergent_subtrees, node_hash, subtree_hash, top_level_hashes
+from pyweber.models.dom_merge import merge_client_parts
+
+
+def _page() -> Template:
+    return Template(
+        template=(
+            '<body>'
+            '<nav id="nav"><a>home</a><!-- menu --><a>about</a></nav>'
+            '<main id="main"><ul><li>1</li><li>2</li></ul></main>'
+            '</body>'
+        )
+    )
+
+
+def _client_hashes(template: Template) -> dict:
+    """What the browser would send for a DOM rendered from ``template``."""
+    snapshot = template.snapshot()
+    parts, sections = top_level_hashes(snapshot)
+    return {'root': subtree_hash(snapshot.root), 'sections': sections, 'parts': parts}
+
+
+class TestMerkleHash:
+    def test_hash_covers_structure_and_skips_comments(self):
+        tpl = _page()
+        nav = tpl.querySelector('#nav')
+        links = [child for child in nav.childs if child.tag == 'a']
+
+        expected = node_hash('nav', nav.uuid, [node_hash('a', link.uuid, []) for link in links])
+        assert subtree_hash(next(n for n in tpl.snapshot().root.iter() if n.uuid == nav.uuid)) == expected
+
+    def test_unchanged_subtrees_keep_their_cached_hash(self):
+        tpl = _page()
+        first = tpl.snapshot()
+        subtree_hash(first.root)
+
+        tpl.querySelector('#main').add_child(Element('p'))
+        second = tpl.snapshot()
+        nav = next(n for n in second.root.iter() if n.tag == 'nav')
+        assert nav.merkle is not None
+        assert subtree_hash(second.root) != first.root.merkle
+
+
+class TestHandshake:
+    def test_in_sync_client_uploads_nothing(self):
+        tpl = _page()
+        assert divergent_subtrees(tpl.snapshot(), _client_hashes(tpl)) == []
+
+    def test_only_the_divergent_subtree_is_requested(self):
+        server = _page()
+        client = server.clone()
+        client.querySelector('#main').querySelector('ul').add_child(Element('li', content='3'))
+
+        assert divergent_subtrees(server.snapshot(), _client_hashes(client)) == [server.querySelector('#main').uuid]
+
+    def test_unknown_sections_need_a_full_upload(self):
+        assert divergent_subtrees(_page().snapshot(), _client_hashes(_page())) is None
+
+    def test_uploaded_parts_are_merged_and_grafted(self):
+        tpl = _page()
+        main = tpl.querySelector('#main')
+        body = tpl.querySelector('body')
+
+        merge_client_parts(tpl.root, {
+            main.uuid: {'parent': body.uuid, 'html': f'<main uuid="{main.uuid}"><aside uuid="new-aside"></aside></main>'},
+            'widget': {'parent': body.uuid, 'html': '<div uuid="widget"><span uuid="w-1">chat</span></div>'},
+            'orphan': {'parent': 'nowhere', 'html': '<div uuid="orphan"></div>'},
+        })
+
+        assert tpl.getElement(by='uuid', value='new-aside').parent is main
+        assert tpl.getElement(by='uuid', value='widget').parent is body
+        assert tpl.getElement(by='uuid', value='w-1') is not None
+        assert tpl.getElement(by='uuid', value='orphan') is None
+
+    async def test_reconnect_asks_for_the_divergent_subtrees(self):
+        from pyweber.connection.session import sessions
+        from pyweber.connection.websocket import WebsocketManager
+        from pyweber.core.window import Window
+        from pyweber.models.ws_message import wsMessage
+
+        server = _page()
+        client = server.clone()
+        client.querySelector('#nav').add_child(Element('a', content='injected'))
+
+        manager = WebsocketManager(app=None)
+        sent = []
+
+        async def send_message(data, session_id, route=None):
+            sent.append(data)
+
+        manager.send_message = send_message
+        manager.add_session('hash-1', server, Window(), '/')
+        try:
+            message = wsMessage(
+                raw_message={'route': '/', 'sessionId': 'hash-1', 'template': None, 'dom_hash': _client_hashes(client)},
+                app=None,
+                ws=manager,
+            )
+            await manager._ensure_session_and_template(message, connection_id='hash-1', cookies={}, send_target=object())
+            assert sent == [{'domSync': {'parts': [server.querySelector('#nav').uuid]}}]
+        finally:
+            sessions.remove_session('hash-1')
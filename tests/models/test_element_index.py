@@ -0,0 +1,121 @@
+from pyweber.core.element import Element
+from pyweber.core.events import collect_element_uuids
+from pyweber.core.template import Template
+from pyweber.models.dom_merge import index_elements_by_uuid
+from pyweber.models.element_index import ElementIndex, get_element_index
+
+
+def _page() -> Template:
+    return Template(
+        template=(
+            '<body>'
+            '<ul id="list"><li class="item a">1</li><li class="item b">2</li></ul>'
+            '<p id="msg" class="note">hi</p>'
+            '</body>'
+        )
+    )
+
+
+class TestElementIndexLookups:
+    def test_template_builds_index(self):
+        tpl = _page()
+        assert isinstance(tpl.index, ElementIndex)
+        assert get_element_index(tpl.body) is tpl.index
+        assert len(tpl.index) == len(index_elements_by_uuid(tpl.root))
+
+    def test_lookup_by_uuid_id_class_tag(self):
+        tpl = _page()
+        msg = tpl.querySelector('#msg')
+        assert tpl.getElement(by='uuid', value=msg.uuid) is msg
+        assert [el.content for el in tpl.querySelectorAll('.item')] == ['1', '2']
+        assert [el.content for el in tpl.querySelectorAll('.item.b')] == ['2']
+        assert len(tpl.querySelectorAll('li')) == 2
+
+    def test_results_keep_document_order(self):
+        tpl = _page()
+        ul = tpl.querySelector('#list')
+        ul.childs.insert(0, Element('li', classes=['item'], content='0'))
+        assert [el.content for el in tpl.querySelectorAll('.item')] == ['0', '1', '2']
+
+    def test_scoped_lookup_stays_inside_subtree(self):
+        tpl = _page()
+        tpl.body.add_child(Element('li', classes=['item'], content='outside'))
+        ul = tpl.querySelector('#list')
+        assert [el.content for el in ul.querySelectorAll('.item')] == ['1', '2']
+        assert len(tpl.querySelectorAll('.item')) == 3
+
+
+class TestElementIndexMaintenance:
+    def test_append_and_remove_update_index(self):
+        tpl = _page()
+        new = Element('span', id='new', childs=[Element('b', classes=['deep'])])
+        tpl.body.add_child(new)
+        assert tpl.querySelector('#new') is new
+        assert tpl.querySelector('.deep') is new.childs[0]
+
+        tpl.body.remove_child(new)
+        assert tpl.querySelector('#new') is None
+        assert tpl.querySelector('.deep') is None
+        assert get_element_index(new) is None
+
+    def test_pop_setitem_clear_and_childs_setter(self):
+        tpl = _page()
+        ul = tpl.querySelector('#list')
+
+        popped = ul.pop_child()
+        assert popped not in tpl.index
+
+        replacement = Element('li', classes=['swap'])
+        ul.childs[0] = replacement
+        assert tpl.querySelector('.swap') is replacement
+        assert tpl.querySelector('.a') is None
+
+        ul.childs.clear()
+        assert tpl.querySelector('.swap') is None
+
+        ul.childs = [Element('li', classes=['fresh'])]
+        assert tpl.querySelector('.fresh') is not None
+
+    def test_attribute_setters_reindex(self):
+        tpl = _page()
+        msg = tpl.querySelector('#msg')
+
+        msg.id = 'renamed'
+        msg.add_class('extra')
+        msg.classes.remove('note')
+        msg.tag = 'div'
+
+        assert tpl.querySelector('#msg') is None
+        assert tpl.querySelector('#renamed') is msg
+        assert tpl.querySelector('.extra') is msg
+        assert tpl.querySelector('.note') is None
+        assert msg in tpl.querySelectorAll('div')
+        assert not tpl.querySelectorAll('p')
+
+    def test_in_place_class_list_mutation_is_tracked(self):
+        tpl = _page()
+        msg = tpl.querySelector('#msg')
+        msg.classes.append('live')
+        assert tpl.querySelector('.live') is msg
+
+    def test_moved_element_without_remove_stays_indexed(self):
+        tpl = _page()
+        li = tpl.querySelector('.a')
+        tpl.body.childs.append(li)
+        tpl.querySelector('#list').childs.remove(li)
+        assert tpl.getElement(by='uuid', value=li.uuid) is li
+
+    def test_clone_and_root_swap_get_their_own_index(self):
+        tpl = _page()
+        cloned = tpl.clone()
+        assert cloned.index is not tpl.index
+        assert cloned.querySelector('#msg') is not tpl.querySelector('#msg')
+
+        old_root = tpl.root
+        tpl.root = Element('html', childs=[Element('body', childs=[Element('i', id='only')])])
+        assert tpl.querySelector('#only') is not None
+        assert get_element_index(old_root) is None
+
+    def test_collect_element_uuids_uses_index(self):
+        tpl = _page()
+        assert collect_element_uuids(tpl.root) == set(tpl.index.uuids)
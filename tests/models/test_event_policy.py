@@ -0,0 +1,60 @@
+import pytest
+
+from pyweber.core.element import Element
+from pyweber.core.events import TemplateEvents
+from pyweber.models.event_policy import (
+    EventPolicy,
+    debounce,
+    event_policy,
+    format_policies,
+    latest_wins,
+    parse_policies,
+    throttle,
+)
+from pyweber.utils.types import EventType
+
+
+class TestEventPolicy:
+    def test_parse_and_format_round_trip(self):
+        policies = parse_policies('input:debounce:150 mousemove:throttle:50 scroll:latest bad:nope:1')
+        assert policies == {'input': debounce(150), 'mousemove': throttle(50), 'scroll': latest_wins()}
+        assert parse_policies(format_policies(policies)) == policies
+        assert EventPolicy.parse('latest-wins') == latest_wins()
+
+    def test_invalid_policies_raise(self):
+        with pytest.raises(ValueError):
+            EventPolicy('sometimes')
+        with pytest.raises(ValueError):
+            throttle(-1)
+
+    def test_defaults_cover_high_frequency_events_only(self):
+        element = Element('div')
+        assert event_policy(element, 'input') == latest_wins()
+        assert event_policy(element, EventType.MOUSEMOVE) == latest_wins()
+        assert event_policy(element, 'click') is None
+
+
+class TestDeclaringPolicies:
+    def test_template_events_policies_reach_every_owner(self):
+        events = TemplateEvents(onclick=lambda e: None, policies={'oninput': 'debounce:150'})
+        first, second = Element('input', events=events), Element('input')
+        second.events = events
+
+        events.set_policy(EventType.CLICK, throttle(500))
+        for element in (first, second):
+            assert element.attrs['_policy'] == 'click:throttle:500 input:debounce:150'
+        assert 'policies' not in events.events()
+
+        events.set_policy('input', None)
+        assert first.attrs['_policy'] == 'click:throttle:500'
+
+    def test_element_policy_is_rendered(self):
+        element = Element('input')
+        element.set_event_policy(EventType.INPUT, debounce(200))
+        assert event_policy(element, 'input') == debounce(200)
+        assert '_policy="input:debounce:200"' in element.to_html()
+
+        element.set_event_policy(EventType.INPUT, None)
+        assert '_policy' not in element.attrs
+        with pytest.raises(TypeError):
+            element.set_event_policy('input', 'latest')
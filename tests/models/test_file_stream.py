@@ -1,8 +1,18 @@
 import asyncio
+from types import SimpleNamespace
 
 import pytest
 
-from pyweber.models.file_stream import FileChunkManager, FileResult
+from pyweber.connection.websocket import WebsocketManager
+from pyweber.models.file_stream import (
+    FileChunkManager,
+    FileFrame,
+    FileResult,
+    decode_file_frame,
+    encode_file_frame,
+    file_chunk_manager,
+)
+from pyweber.pyweber.pyweber import Pyweber
 from pyweber.models.request import Request, ClientInfo
 
 
@@ -54,3 +64,130 @@ async def test_resolve_errors(manager):
     await manager.resolve(req)
     dup = await manager.resolve(req)
     assert dup.code in (404, 409)
+
+
+def test_file_frame_round_trip():
+    frame = encode_file_frame('fid', 70000, b'\x00\xffdata')
+    assert decode_file_frame(frame) == FileFrame(file_id='fid', offset=70000, data=b'\x00\xffdata')
+    assert decode_file_frame(encode_file_frame('fid', 0, b'gone', error=True)).error
+    assert decode_file_frame(b'\x1f\x8b gzip') is None
+
+
+@pytest.mark.asyncio
+async def test_deliver_checks_owner_and_offset(manager):
+    future = manager.expect('fid', 0, session_id='s1')
+
+    assert not manager.deliver(FileFrame('fid', 0, b'x'), session_id='s2')
+    assert not manager.deliver(FileFrame('fid', 8, b'x'), session_id='s1')
+    assert manager.deliver(FileFrame('fid', 0, b'x'), session_id='s1')
+    assert (await future).data == b'x'
+
+    manager.expect('fid', 1)
+    assert manager.discard('fid') == 1
+
+
+class Browser:
+    """Answers ``request_file`` messages with binary frames after ``delay``."""
+
+    def __init__(self, content: bytes, delay: float = 0.005):
+        self.content = content
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, data, session_id=None):
+        for start, end in data['ranges']:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            asyncio.get_running_loop().call_later(self.delay, self.answer, data['request_file'], start, end, session_id)
+
+    def answer(self, file_id, start, end, session_id):
+        self.in_flight -= 1
+        frame = encode_file_frame(file_id, start, self.content[start:end])
+        file_chunk_manager.deliver(decode_file_frame(frame), session_id=session_id)
+
+
+@pytest.mark.asyncio
+async def test_stream_keeps_a_window_of_chunks_in_flight():
+    app = Pyweber()
+    content = bytes(range(256)) * 1024
+    app.ws_server = WebsocketManager(app=app)
+    browser = Browser(content)
+    app.ws_server.send_message = browser.send_message
+
+    chunks = [chunk async for chunk in app.stream(
+        file=SimpleNamespace(file_id='big', size=len(content)),
+        session_id='s1',
+        max_size=16 * 1024,
+    )]
+
+    assert b''.join(chunks) == content
+    assert browser.max_in_flight > 1
+    assert not file_chunk_manager._chunks
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_on_error_frame():
+    app = Pyweber()
+    app.ws_server = WebsocketManager(app=app)
+
+    async def refuse(data, session_id=None):
+        for start, _ in data['ranges']:
+            frame = encode_file_frame(data['request_file'], start, b'File not found', error=True)
+            file_chunk_manager.deliver(decode_file_frame(frame), session_id=session_id)
+
+    app.ws_server.send_message = refuse
+    chunks = [chunk async for chunk in app.stream(file=SimpleNamespace(file_id='gone', size=10), session_id='s1')]
+    assert chunks == [] and not file_chunk_manager._chunks
+
+
+@pytest.mark.asyncio
+async def test_asgi_binary_frames_reach_the_stream():
+    ws = WebsocketManager(app=None)
+    future = file_chunk_manager.expect('up', 0)
+    messages = [
+        {'type': 'websocket.receive', 'bytes': encode_file_frame('up', 0, b'raw')},
+        {'type': 'websocket.disconnect'},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    await ws.ws_handler_asgi(receive=receive, send=send)
+    assert (await future).data == b'raw'
+    assert ws.receive_file_frame(b'not a frame', None) is False
+
+
+class BinaryConn:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, data, opcode=1):
+        self.frames.append((data, opcode))
+
+
+@pytest.mark.asyncio
+async def test_send_file_streams_raw_binary_frames():
+    from pyweber.connection.session import sessions
+    from pyweber.core.template import Template
+    from pyweber.core.window import Window
+
+    ws = WebsocketManager(app=None)
+    ws.add_session('dl', Template(template='<body></body>'), Window(), '/')
+    conn = ws.ws_connections['dl'] = BinaryConn()
+    payload = bytes(range(256)) * 40
+    try:
+        assert await ws.send_file(payload, 'data.bin', session_id='dl', chunk_size=4096, window=2)
+    finally:
+        sessions.remove_session('dl')
+
+    (announce, text), *chunks = conn.frames
+    assert text == 1 and b'"download"' in announce and b'data.bin' in announce
+    frames = [decode_file_frame(data) for data, opcode in chunks if opcode == 2]
+    assert len(frames) == len(chunks) == 3
+    assert [frame.offset for frame in frames] == [0, 4096, 8192]
+    assert b''.join(frame.data for frame in frames) == payload
+    assert await ws.send_file(b'x', 'x.bin', session_id='missing') is False
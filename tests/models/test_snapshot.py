@@ -0,0 +1,196 @@
+from pyweber.components.input import InputText
+from pyweber.core.element import Element
+from pyweber.core.template import Template
+from pyweber.models.snapshot import ElementSnapshot, TemplateSnapshot
+from pyweber.models.template_diff import TemplateDiff
+from pyweber.utils.types import EventType
+
+
+def _page() -> Template:
+    return Template(
+        template=(
+            '<body>'
+            '<ul id="list"><li class="item">1</li><li class="item">2</li></ul>'
+            '<section id="static"><p>a</p><p>b</p></section>'
+            '</body>'
+        )
+    )
+
+
+def _find(snapshot: TemplateSnapshot, uuid: str) -> ElementSnapshot:
+    return next(node for node in snapshot.root.iter() if node.uuid == uuid)
+
+
+class TestStructuralSharing:
+    def test_unchanged_tree_returns_the_same_snapshot(self):
+        tpl = _page()
+        first = tpl.snapshot()
+        assert isinstance(first, TemplateSnapshot)
+        assert tpl.snapshot().root is first.root
+
+    def test_only_the_changed_path_is_copied(self):
+        tpl = _page()
+        li = tpl.querySelector('li')
+        static = tpl.querySelector('#static')
+        before = tpl.snapshot()
+
+        li.content = 'changed'
+        after = tpl.snapshot()
+
+        assert after.root is not before.root
+        assert _find(after, static.uuid) is _find(before, static.uuid)
+        assert _find(after, li.uuid).content == 'changed'
+        assert _find(before, li.uuid).content == '1'
+
+        sibling = tpl.querySelectorAll('li')[1]
+        assert _find(after, sibling.uuid) is _find(before, sibling.uuid)
+
+    def test_unchanged_fields_are_shared_when_only_children_change(self):
+        tpl = _page()
+        ul = tpl.querySelector('#list')
+        before = tpl.snapshot()
+
+        ul.childs.pop()
+        after = tpl.snapshot()
+
+        assert _find(after, ul.uuid).fields is _find(before, ul.uuid).fields
+        assert len(_find(after, ul.uuid).childs) == 1
+
+
+class TestChangeTracking:
+    def test_in_place_mutations_invalidate_the_snapshot(self):
+        tpl = _page()
+        li = tpl.querySelector('li')
+
+        mutations = [
+            lambda: li.attrs.__setitem__('data-x', '1'),
+            lambda: li.set_attr('title', 't'),
+            lambda: li.style.update({'color': 'red'}),
+            lambda: li.classes.append('done'),
+            lambda: li.add_event(EventType.CLICK, lambda e: None),
+            lambda: setattr(li.events, 'onclick', None),
+            lambda: li.add_child(Element('b')),
+        ]
+
+        for mutate in mutations:
+            before = tpl.snapshot()
+            mutate()
+            assert tpl.snapshot().root is not before.root
+
+    def test_component_attribute_setters_are_tracked(self):
+        tpl = _page()
+        field = InputText(name='q')
+        tpl.body.add_child(field)
+        before = tpl.snapshot()
+
+        field.attrs['placeholder'] = 'Search'
+        after = tpl.snapshot()
+
+        assert _find(after, field.uuid).attrs.get('placeholder') == 'Search'
+        assert 'placeholder' not in _find(before, field.uuid).attrs
+
+    def test_option_change_refreshes_select_value(self):
+        select = Element('select', childs=[Element('option', value='a'), Element('option', value='b')])
+        tpl = _page()
+        tpl.body.add_child(select)
+        assert _find(tpl.snapshot(), select.uuid).value == 'a'
+
+        select.childs[1].set_attr('selected', '')
+        assert _find(tpl.snapshot(), select.uuid).value == 'b'
+
+
+class TestDiffAgainstSnapshot:
+    def test_changed_leaf_only(self):
+        tpl = _page()
+        old = tpl.snapshot()
+
+        first, second = tpl.querySelectorAll('li')
+        first.content = 'one'
+
+        diff = TemplateDiff()
+        diff.track_differences(tpl.body, old.body, old_parent=tpl.root.uuid)
+
+        assert list(diff.differences) == [first.uuid]
+        assert diff.differences[first.uuid]['status'] == 'Changed'
+        assert diff.differences[first.uuid]['parent'] == tpl.querySelector('#list').uuid
+
+    def test_appended_child_changes_parent(self):
+        tpl = _page()
+        old = tpl.snapshot()
+
+        tpl.body.childs.append(Element('footer'))
+        diff = TemplateDiff()
+        diff.track_differences(tpl.body, old.body, old_parent=tpl.root.uuid)
+
+        assert diff.differences[tpl.body.uuid]['status'] == 'Changed'
+        assert '<footer' in diff.differences[tpl.body.uuid]['element']
+
+    def test_removed_child_reports_parent_uuid(self):
+        tpl = _page()
+        section = tpl.querySelector('#static')
+        removed = section.childs[-1]
+        old = tpl.snapshot()
+
+        section.childs.pop()
+        diff = TemplateDiff()
+        diff.track_differences(tpl.body, old.body)
+
+        assert diff.differences[removed.uuid] == {
+            'parent': section.uuid,
+            'element': removed.uuid,
+            'status': 'Removed',
+        }
+
+
+class TestDirtyDiff:
+    class CountingDiff(TemplateDiff):
+        def __init__(self):
+            super().__init__()
+            self.visited = 0
+
+        def track_differences(self, *args, **kwargs):
+            self.visited += 1
+            return super().track_differences(*args, **kwargs)
+
+    def _rows(self, count: int) -> Template:
+        rows = ''.join(f'<div class="row"><span>{i}</span><b>x</b></div>' for i in range(count))
+        return Template(template=f'<body>{rows}</body>')
+
+    def test_visits_only_the_dirty_path(self):
+        small, large = self._rows(10), self._rows(500)
+        visits = []
+
+        for tpl in (small, large):
+            old = tpl.snapshot()
+            tpl.querySelectorAll('span')[-1].content = 'changed'
+            diff = self.CountingDiff()
+            diff.track_differences(tpl.body, old.body)
+            assert [entry['status'] for entry in diff.differences.values()] == ['Changed']
+            visits.append(diff.visited)
+
+        assert visits[0] == visits[1]
+
+    def test_marks_are_cleared_by_the_next_snapshot(self):
+        tpl = self._rows(3)
+        old = tpl.snapshot()
+        tpl.querySelector('b').content = 'y'
+        tpl.snapshot()
+
+        diff = self.CountingDiff()
+        diff.track_differences(tpl.body, tpl.snapshot().body)
+        assert diff.visited == 1 and not diff.differences
+
+        # An older baseline is still diffed correctly
+        stale = TemplateDiff()
+        stale.track_differences(tpl.body, old.body)
+        assert [entry['status'] for entry in stale.differences.values()] == ['Changed']
+
+    def test_snapshot_of_another_tree_is_never_treated_as_clean(self):
+        tpl = self._rows(2)
+        other = tpl.clone()
+        old = other.snapshot()
+
+        tpl.querySelector('span').content = 'changed'
+        diff = TemplateDiff()
+        diff.track_differences(tpl.body, old.body)
+        assert [entry['status'] for entry in diff.differences.values()] == ['Changed']
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from pyweber.core.template import Template
+from pyweber.models.handoff import handoff_registry
+from pyweber.models.request import ClientInfo, Request
+from pyweber.pyweber.pyweber import Pyweber
+from pyweber.services import ClientKind, ClientProfileService
+
+
+def _request(path: str = '/page', method: str = 'GET', **headers) -> Request:
+    lines = ''.join(f'{key.replace("_", "-")}: {value}\r\n' for key, value in headers.items())
+    return Request(
+        headers=f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n{lines}\r\n',
+        body=b'',
+        client_info=ClientInfo(host='127.0.0.1', port=1),
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_handoff_registry():
+    handoff_registry.clear()
+    yield
+    handoff_registry.clear()
+
+
+@pytest.fixture
+def app():
+    app = Pyweber()
+    app.renders = 0
+
+    def page(**kwargs):
+        app.renders += 1
+        return Template(template='<html><head></head><body><button>Go</button></body></html>')
+
+    app.add_route(route='/page', template=page, methods=['GET'])
+    return app
+
+
+class TestClientProfileService:
+    @pytest.mark.parametrize('headers, method, kind', [
+        ({}, 'GET', ClientKind.INTERACTIVE),
+        ({'Accept': 'text/html,application/xhtml+xml;q=0.9'}, 'GET', ClientKind.INTERACTIVE),
+        ({'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1)'}, 'GET', ClientKind.STATIC),
+        ({'User-Agent': 'curl/8.5.0'}, 'GET', ClientKind.STATIC),
+        ({'Accept': 'application/json'}, 'GET', ClientKind.STATIC),
+        ({}, 'HEAD', ClientKind.STATIC),
+        ({'Sec-Purpose': 'prefetch'}, 'GET', ClientKind.PREFETCH),
+        ({'User-Agent': 'Mozilla/5.0 HeadlessChrome/120.0'}, 'GET', ClientKind.INTERACTIVE),
+        ({'User-Agent': 'Mozilla/5.0 Chrome-Lighthouse'}, 'GET', ClientKind.INTERACTIVE),
+    ])
+    def test_classify(self, headers, method, kind):
+        assert ClientProfileService().classify(_request(method=method, **headers)) == kind
+
+    def test_extra_user_agents_and_disabling(self):
+        request = _request(User_Agent='InternalMonitor/1.0')
+        assert ClientProfileService(user_agents=['internalmonitor']).classify(request) == ClientKind.STATIC
+        assert ClientProfileService(enabled=False, user_agents=['internalmonitor']).classify(request) == ClientKind.INTERACTIVE
+
+    def test_cache_is_safe_across_threads(self):
+        clients = ClientProfileService(cache_size=4)
+
+        def worker(offset):
+            for step in range(500):
+                key = f'GET /{(offset + step) % 16}?'
+                clients.store(key, step)
+                clients.cached(key)
+
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(clients) <= 4
+
+    def test_cache_is_lru_and_skips_personalised_requests(self):
+        clients = ClientProfileService(cache_size=2)
+        for path in ('/a', '/b', '/c'):
+            clients.store(clients.cache_key(_request(path)), path)
+
+        assert len(clients) == 2 and clients.cached('GET /a?') is None
+        assert clients.cached(clients.cache_key(_request('/c'))) == '/c'
+        assert clients.cache_key(_request(Cookie='sid=1')) is None
+
+
+class TestStaticRender:
+    async def test_bot_gets_plain_html_without_handoff(self, app):
+        resp = await app.get_response(_request(User_Agent='Googlebot/2.1'))
+        html = resp.response_content.decode()
+
+        assert resp.status_code == 200 and '<button>Go</button>' in html
+        assert 'uuid=' not in html and '/_pyweber/static/' not in html.split('<body')[1]
+        assert '.js"' not in html and 'pyweber-handoff' not in html
+        assert len(handoff_registry._entries) == 0
+        assert 'User-Agent' in resp.headers['Vary']
+
+    async def test_static_renders_are_cached(self, app):
+        for _ in range(3):
+            resp = await app.get_response(_request(User_Agent='curl/8.5.0'))
+            assert resp.status_code == 200
+        assert app.renders == 1 and app._clients.stats.cache_hits == 2
+
+        await app.get_response(_request(User_Agent='curl/8.5.0', Cookie='sid=1'))
+        assert app.renders == 2
+
+    async def test_prefetch_is_interactive_without_handoff(self, app):
+        resp = await app.get_response(_request(Sec_Purpose='prefetch;prerender'))
+        html = resp.response_content.decode()
+
+        assert 'uuid=' in html and '/.js"' in html
+        assert 'pyweber-handoff' not in html and len(handoff_registry._entries) == 0
+
+    async def test_browser_still_gets_the_reactive_page(self, app):
+        resp = await app.get_response(_request(Accept='text/html', User_Agent='Mozilla/5.0 Firefox/130.0'))
+
+        assert b'pyweber-handoff' in resp.response_content
+        assert len(handoff_registry._entries) == 1
@@ -16,3 +16,18 @@ def test_adaptive_controller_update():
     assert ctrl.chunk_size >= ctrl._MIN_CHUNK
     assert ctrl.interval_ms >= ctrl._MIN_INTERVAL
     assert ctrl.stats.total_bytes == 4096
+
+
+def test_adaptive_controller_window_follows_bandwidth_delay_product():
+    ctrl = AdaptiveController(max_size=1024 * 64, window=1)
+    # 64 KB every 10 ms with a 40 ms round trip → about four chunks in flight
+    now = 0.0
+    for _ in range(5):
+        now += 10
+        ctrl.update(received_bytes=1024 * 64, elapsed_ms=40, now_ms=now)
+    assert 4 <= ctrl.window <= 6
+    assert ctrl.stats.elapsed_ms < 5 * 40
+
+    slow = AdaptiveController(max_size=1024 * 64)
+    slow.update(received_bytes=1024, elapsed_ms=400, now_ms=0)
+    assert slow.window == 2
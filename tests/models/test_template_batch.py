@@ -0,0 +1,69 @@
+import threading
+
+from pyweber.core.template import Template
+
+
+def _page() -> Template:
+    return Template(template='<body><p id="count">0</p><p id="total">0</p></body>')
+
+
+class TestTemplateBatch:
+    def test_nested_batches_close_with_the_outermost(self):
+        tpl = _page()
+
+        with tpl.batch() as batched:
+            assert batched is tpl and tpl.batching
+            tpl.querySelector('#count').content = '1'
+            with tpl.batch():
+                tpl.querySelector('#total').content = '2'
+            assert tpl.batching
+
+        assert not tpl.batching
+        texts = [node.content for node in tpl.snapshot().root.iter() if node.tag == 'p']
+        assert texts == ['1', '2']
+
+    async def test_async_with(self):
+        tpl = _page()
+        released = []
+
+        async with tpl.batch():
+            assert tpl.after_batch(lambda: released.append(True))
+            assert released == []
+        assert released == [True]
+        assert tpl.after_batch(lambda: None) is False
+
+    def test_exception_still_closes_the_batch(self):
+        tpl = _page()
+        try:
+            with tpl.batch():
+                raise RuntimeError('boom')
+        except RuntimeError:
+            pass
+        assert not tpl.batching
+
+    def test_concurrent_handlers_release_once_at_the_end(self):
+        tpl = _page()
+        released = []
+        inside = threading.Barrier(2)
+        leave = threading.Event()
+
+        def handler():
+            with tpl.batch():
+                tpl.after_batch(lambda: released.append(threading.current_thread().name))
+                inside.wait()
+                leave.wait()
+
+        threads = [threading.Thread(target=handler) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        leave.set()
+        for thread in threads:
+            thread.join()
+
+        assert not tpl.batching
+        assert len(released) == 2
+
+    def test_clone_does_not_share_the_batch(self):
+        tpl = _page()
+        with tpl.batch():
+            assert not tpl.clone().batching
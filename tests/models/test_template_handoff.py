@@ -43,6 +43,26 @@ class TestTemplateHandoffRegistry:
 
         assert registry.consume(token, '/other') is None
 
+    def test_capacity_evicts_oldest_and_counts(self):
+        registry = TemplateHandoffRegistry(capacity=2)
+        tokens = [registry.create(_html_page(str(i)), '/page') for i in range(3)]
+
+        assert len(registry) == 2
+        assert registry.consume(tokens[0], '/page') is None
+        assert registry.consume(tokens[2], '/page') is not None
+        assert (registry.stats.evicted, registry.stats.hits, registry.stats.misses) == (1, 1, 1)
+
+    def test_expiry_stops_at_first_live_entry(self):
+        registry = TemplateHandoffRegistry(ttl=10)
+        old = registry.create(_html_page(), '/page')
+        live = registry.create(_html_page(), '/page')
+        registry._entries[old].created_at -= 60
+
+        registry.create(_html_page(), '/page')
+
+        assert old not in registry._entries and live in registry._entries
+        assert registry.stats.expired == 1
+
     def test_inject_handoff_token_adds_meta_tag(self):
         template = _html_page()
         inject_handoff_token(template, 'token-123')
@@ -0,0 +1,286 @@
+import json
+import random
+
+import pytest
+
+from pyweber.connection.session import sessions
+from pyweber.connection.websocket import WebsocketManager
+from pyweber.core.element import Element
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.models.template_patch import TemplatePatch, longest_increasing_subsequence, render_order
+from pyweber.utils.types import EventType
+
+
+def _page() -> Template:
+    return Template(
+        template=(
+            '<body>'
+            '<table id="grid" class="striped"><tr><td>1</td></tr><tr><td>2</td></tr></table>'
+            '<ul id="list"><li>a</li><li>b</li><li>c</li></ul>'
+            '<p id="msg" style="color: red">hi</p>'
+            '</body>'
+        )
+    )
+
+
+def _apply(order: list[str], ops: list[dict]) -> list[str]:
+    """Replay child-list ops on a list of uuids, like applyPatch does on the DOM."""
+    order = list(order)
+    for op in ops:
+        if op['op'] in ('remove', 'move'):
+            order.remove(op['uuid'])
+        if op['op'] in ('insert', 'move'):
+            uuid = op.get('uuid') or op['html'].split('uuid="')[1].split('"')[0]
+            order.insert(order.index(op['before']) if op['before'] else len(order), uuid)
+    return order
+
+
+def _ops(tpl: Template, old) -> list[dict]:
+    patch = TemplatePatch()
+    patch.track_patches(tpl.body, old.body)
+    return patch.operations
+
+
+class TestFieldOps:
+    def test_class_toggle_on_a_table_is_a_single_small_op(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        grid = tpl.querySelector('#grid')
+
+        grid.add_class('active')
+        grid.remove_class('striped')
+
+        assert _ops(tpl, old) == [
+            {'op': 'add-class', 'uuid': grid.uuid, 'names': ['active']},
+            {'op': 'remove-class', 'uuid': grid.uuid, 'names': ['striped']},
+        ]
+
+    def test_text_attrs_style_and_value(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        msg = tpl.querySelector('#msg')
+
+        msg.content = 'bye'
+        msg.set_attr('title', 'greeting')
+        msg.style = {'font-weight': 'bold'}
+        msg.id = None
+        msg.value = '3'
+
+        ops = {(op['op'], op.get('name')): op for op in _ops(tpl, old)}
+        assert ops[('set-text', None)]['text'] == 'bye'
+        assert ops[('set-attr', 'title')]['value'] == 'greeting'
+        assert ops[('remove-attr', 'id')]['uuid'] == msg.uuid
+        assert ops[('set-style', None)]['props'] == {'font-weight': 'bold', 'color': None}
+        assert ops[('set-value', None)]['value'] == '3'
+
+    def test_event_handler_becomes_event_attribute(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        msg = tpl.querySelector('#msg')
+
+        msg.add_event(EventType.CLICK, lambda e: None)
+        [op] = _ops(tpl, old)
+        assert op['op'] == 'set-attr' and op['name'] == '_onclick'
+        assert op['value'].startswith('event_')
+
+    def test_methods_become_call_ops(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        msg = tpl.querySelector('#msg')
+
+        msg.blur()
+        assert _ops(tpl, old) == [{'op': 'call', 'uuid': msg.uuid, 'methods': {'blur': {}}}]
+        assert msg.get_element_methods() == {}
+
+    def test_inserted_subtree_keeps_its_call_ops(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        item = Element(tag='li', content='{{field}}')
+        field = Element(tag='input')
+        item.childs = [field]
+        tpl.querySelector('#list').add_child(item)
+
+        field.blur()
+        ops = _ops(tpl, old)
+        assert [op['op'] for op in ops] == ['insert', 'call']
+        assert ops[1] == {'op': 'call', 'uuid': field.uuid, 'methods': {'blur': {}}}
+        assert field.get_element_methods() == {}
+
+    def test_unrepresentable_changes_fall_back_to_replace(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        msg = tpl.querySelector('#msg')
+
+        msg.tag = 'div'
+        [op] = _ops(tpl, old)
+        assert op['op'] == 'replace' and op['uuid'] == msg.uuid
+        assert op['html'].startswith('<div')
+
+
+class TestChildOps:
+    def test_append_insert_and_remove(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        ul = tpl.querySelector('#list')
+        a, b, c = ul.childs
+
+        ul.childs.remove(b)
+        ul.childs.insert(0, Element('li', content='first'))
+        ul.add_child(Element('li', content='last'))
+
+        ops = _ops(tpl, old)
+        assert [op['op'] for op in ops] == ['remove', 'insert', 'insert']
+        assert ops[0]['uuid'] == b.uuid
+        assert ops[1]['before'] is None and 'last' in ops[1]['html']
+        assert ops[2]['before'] == a.uuid and 'first' in ops[2]['html']
+
+    def test_reorder_emits_moves(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        ul = tpl.querySelector('#list')
+        a, b, c = ul.childs
+
+        ul.content = '{{' + c.uuid + '}}{{' + a.uuid + '}}{{' + b.uuid + '}}'
+        assert render_order(ul.content, ul.childs) == [c.uuid, a.uuid, b.uuid]
+
+        assert _ops(tpl, old) == [{'op': 'move', 'uuid': c.uuid, 'parent': ul.uuid, 'before': a.uuid}]
+
+    def test_reassigning_childs_reorders_placeholder_content(self):
+        tpl = _page()
+        ul = tpl.querySelector('#list')
+        a, b, c = ul.childs
+
+        ul.childs = [c, b, a]
+        assert render_order(ul.content, ul.childs) == [c.uuid, b.uuid, a.uuid]
+        assert ul.to_html().index('>c<') < ul.to_html().index('>a<')
+
+    def test_nested_change_only_touches_the_leaf(self):
+        tpl = _page()
+        old = tpl.snapshot()
+        cell = tpl.querySelectorAll('td')[1]
+
+        cell.content = '20'
+        assert _ops(tpl, old) == [{'op': 'set-text', 'uuid': cell.uuid, 'text': '20'}]
+
+    def test_payload_is_smaller_than_legacy_diff(self):
+        rows = ''.join(f'<tr><td>{i}</td><td>row {i}</td></tr>' for i in range(200))
+        tpl = Template(template=f'<body><table id="t">{rows}</table></body>')
+        old = tpl.snapshot()
+        tpl.querySelector('#t').add_class('active')
+
+        assert len(json.dumps(_ops(tpl, old))) < 100
+        assert len(tpl.querySelector('#t').to_html()) > 5000
+
+
+class TestPatchNegotiation:
+    @pytest.fixture
+    def manager(self):
+        return WebsocketManager(app=None)
+
+    async def test_patch_sent_to_capable_clients(self, manager):
+        template = _page()
+        manager.add_session('s-patch', template, Window(), '/')
+        session = sessions.get_session('s-patch')
+        session.features = frozenset({'patch'})
+
+        template.querySelector('#msg').content = 'changed'
+        parsed = json.loads(await manager.data_to_json({'template': template}, session_id='s-patch'))
+
+        assert 'template' not in parsed
+        assert parsed['patch'] == [
+            {'op': 'set-text', 'uuid': template.querySelector('#msg').uuid, 'text': 'changed'}
+        ]
+        sessions.remove_session('s-patch')
+
+    async def test_legacy_clients_keep_template_diffs(self, manager):
+        template = _page()
+        manager.add_session('s-legacy', template, Window(), '/')
+
+        template.querySelector('#msg').content = 'changed'
+        parsed = json.loads(await manager.data_to_json({'template': template}, session_id='s-legacy'))
+
+        assert 'patch' not in parsed
+        assert parsed['template'][template.querySelector('#msg').uuid]['status'] == 'Changed'
+        sessions.remove_session('s-legacy')
+
+
+class TestKeyedReconciliation:
+    @staticmethod
+    def _list(count: int) -> Template:
+        items = ''.join(f'<li key="k{i}">{i}</li>' for i in range(count))
+        return Template(template=f'<body><ul id="list">{items}</ul></body>')
+
+    def test_lis_positions(self):
+        assert longest_increasing_subsequence([]) == set()
+        assert longest_increasing_subsequence([0, 1, 2]) == {0, 1, 2}
+        positions = longest_increasing_subsequence([3, 0, 1, 4, 2])
+        assert len(positions) == 3 and positions <= {1, 2, 3, 4}
+
+    @pytest.mark.parametrize('workload', ['shuffle', 'reverse', 'prepend', 'append', 'swap'])
+    def test_replayed_ops_reach_the_new_order(self, workload):
+        tpl = self._list(50)
+        ul = tpl.querySelector('#list')
+        old = tpl.snapshot()
+        before = [child.uuid for child in ul.childs]
+        childs = list(ul.childs)
+
+        if workload == 'shuffle':
+            random.Random(7).shuffle(childs)
+        elif workload == 'reverse':
+            childs.reverse()
+        elif workload == 'prepend':
+            childs.insert(0, Element('li', content='new'))
+        elif workload == 'append':
+            childs.append(Element('li', content='new'))
+        else:
+            childs[1], childs[-2] = childs[-2], childs[1]
+
+        ul.childs = childs
+        ops = _ops(tpl, old)
+
+        assert _apply(before, ops) == [child.uuid for child in ul.childs]
+        expected = {'prepend': 1, 'append': 1, 'swap': 2, 'reverse': 49}
+        if workload in expected:
+            assert len(ops) == expected[workload]
+
+    def test_sort_moves_only_out_of_order_rows(self):
+        tpl = self._list(500)
+        ul = tpl.querySelector('#list')
+        childs = list(ul.childs)
+        childs.insert(100, childs.pop(400))
+        ul.childs = childs
+        old = tpl.snapshot()
+
+        ul.childs = sorted(ul.childs, key=lambda child: int(child.content))
+        by_content = {child.content: child.uuid for child in ul.childs}
+        assert _ops(tpl, old) == [
+            {'op': 'move', 'uuid': by_content['400'], 'parent': ul.uuid, 'before': by_content['401']}
+        ]
+
+    def test_rebuilt_rows_with_same_key_are_renamed_not_resent(self):
+        tpl = self._list(3)
+        ul = tpl.querySelector('#list')
+        old_first = ul.childs[0]
+        old = tpl.snapshot()
+
+        ul.childs = [Element('li', content=str(i), attrs={'key': f'k{i}'}) for i in (0, 1, 2)]
+        ul.childs[0].content = 'zero'
+        ops = _ops(tpl, old)
+
+        assert {op['op'] for op in ops} == {'set-attr', 'set-text'}
+        renames = [op for op in ops if op['op'] == 'set-attr']
+        assert renames[0] == {'op': 'set-attr', 'uuid': old_first.uuid, 'name': 'uuid', 'value': ul.childs[0].uuid}
+        assert [op for op in ops if op['op'] == 'set-text'] == [
+            {'op': 'set-text', 'uuid': ul.childs[0].uuid, 'text': 'zero'}
+        ]
+
+    def test_duplicate_keys_fall_back_to_uuid(self):
+        tpl = Template(template='<body><ul><li key="x">1</li><li key="x">2</li></ul></body>')
+        ul = tpl.querySelector('ul')
+        first, second = ul.childs
+        old = tpl.snapshot()
+
+        ul.childs = [second, first]
+        ops = _ops(tpl, old)
+        assert ops == [{'op': 'move', 'uuid': second.uuid, 'parent': ul.uuid, 'before': first.uuid}]
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from pyweber.connection.session import sessions
+from pyweber.connection.websocket import WebsocketManager
+from pyweber.core.template import Template
+from pyweber.core.window import Window
+from pyweber.models.wire import (
+    BINARY_MAGIC,
+    compact_patch,
+    decode_binary,
+    decode_message,
+    encode_binary,
+    encode_message,
+    expand_patch,
+    negotiate,
+)
+
+OPS = [
+    {'op': 'set-text', 'uuid': 'a' * 36, 'text': 'hi'},
+    {'op': 'add-class', 'uuid': 'a' * 36, 'names': ['x']},
+    {'op': 'move', 'uuid': 'b' * 36, 'parent': 'c' * 36, 'before': None},
+    {'op': 'insert', 'parent': 'c' * 36, 'before': 'b' * 36, 'html': '<li>1</li>'},
+    {'op': 'set-style', 'uuid': 'b' * 36, 'props': {'color': None, 'top': '1px'}},
+]
+
+
+class TestCompactPatch:
+    def test_ids_are_interned_once(self):
+        ids, rows = compact_patch(OPS)
+        assert ids == ['a' * 36, 'b' * 36, 'c' * 36]
+        assert rows[0] == ['t', 0, 'hi']
+        assert rows[2] == ['m', 1, 2, None]
+        assert expand_patch(ids, rows) == OPS
+
+    def test_compact_json_is_smaller(self):
+        data = {'patch': OPS, 'setSessionId': 's'}
+        legacy = encode_message(data)
+        compact = encode_message(data, wire_format='compact')
+
+        assert len(compact) < len(legacy) / 2
+        assert '\n' not in compact and ', ' not in compact
+        assert decode_message(compact) == data
+        assert json.loads(legacy) == data
+
+
+class TestBinary:
+    @pytest.mark.parametrize('value', [
+        None, True, False, 0, 1, -1, 2 ** 40, -(2 ** 40), 1.5, '', 'olá 🎉',
+        [1, [2, None]], {'a': {'b': [True, 'x']}, 'ç': -3},
+    ])
+    def test_round_trip(self, value):
+        assert decode_binary(encode_binary(value)) == value
+
+    def test_frames_start_with_magic_and_decode(self):
+        data = {'patch': OPS, 'reload': False}
+        frame = encode_message(data, wire_format='binary')
+
+        assert isinstance(frame, bytes) and frame.startswith(BINARY_MAGIC)
+        assert len(frame) < len(encode_message(data, wire_format='compact'))
+        assert decode_message(frame) == data
+
+    def test_unknown_types_are_rejected(self):
+        with pytest.raises(TypeError):
+            encode_binary({'x': object()})
+
+
+class TestNegotiation:
+    def test_richest_shared_format_wins(self):
+        assert negotiate(()) == 'legacy'
+        assert negotiate(['patch']) == 'legacy'
+        assert negotiate(['patch', 'compact']) == 'compact'
+        assert negotiate(['compact', 'binary']) == 'binary'
+
+    async def test_send_message_uses_the_session_format(self):
+        class Connection:
+            def __init__(self):
+                self.frames = []
+
+            async def send(self, message: bytes, opcode: int = 1):
+                self.frames.append((opcode, message))
+
+        manager = WebsocketManager(app=None)
+        template = Template(template='<body><p id="msg">hi</p></body>')
+        manager.add_session('s-wire', template, Window(), '/')
+        session = sessions.get_session('s-wire')
+        connection = Connection()
+        manager.ws_connections['s-wire'] = connection
+
+        session.features = frozenset({'patch', 'compact', 'binary'})
+        template.querySelector('#msg').content = 'bye'
+        await manager.send_message({'template': template}, session_id='s-wire')
+
+        session.features = frozenset()
+        await manager.send_message({'reload': True}, session_id='s-wire')
+
+        (binary_opcode, frame), (text_opcode, text) = connection.frames
+        assert binary_opcode == 2 and text_opcode == 1
+        assert decode_message(frame)['patch'] == [
+            {'op': 'set-text', 'uuid': template.querySelector('#msg').uuid, 'text': 'bye'}
+        ]
+        assert json.loads(text) == {'reload': True}
+        sessions.remove_session('s-wire')
@@ -9,10 +9,12 @@ import pytest
 from pyweber.connection.session import Session, sessions
 from pyweber.core.element import Element
 from pyweber.core.events import (
+    ElementEvents,
     EventBook,
     cleanup_template_events,
     clear_event_book,
     collect_element_uuids,
+    unregister_events_for_uuids,
 )
 from pyweber.core.events import TemplateEvents
 from pyweber.core.template import Template
@@ -98,6 +100,25 @@ class TestEventBookLifecycle:
         assert collect_element_uuids(root).isdisjoint(remaining_uids)
 
 
+    def test_index_tracks_both_directions(self):
+        def handler(e=None):
+            pass
+
+        first = Element('button', events=TemplateEvents(onclick=handler, onfocus=handler))
+        second = Element('button', events=TemplateEvents(onclick=handler))
+        first.to_html()
+        second.to_html()
+        event_id = f'event_{id(handler)}'
+
+        assert ElementEvents[first.uuid] == {event_id}
+        assert set(EventBook[event_id]['elements']) == {first.uuid, second.uuid}
+
+        assert unregister_events_for_uuids({first.uuid}) == 0
+        assert first.uuid not in ElementEvents and list(EventBook[event_id]['elements']) == [second.uuid]
+        assert unregister_events_for_uuids({second.uuid, 'unknown'}) == 1
+        assert not EventBook and not ElementEvents
+
+
 class TestElementUpdateRemoved:
     def test_no_update_method_stub(self):
         el = Element('div')
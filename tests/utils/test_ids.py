@@ -0,0 +1,105 @@
+import pytest
+
+from pyweber.core.element import Element
+from pyweber.models.dom_merge import index_elements_by_uuid, merge_client_dom
+from pyweber.utils.ids import (
+    CompactIdGenerator,
+    default_id_generator,
+    get_id_generator,
+    new_element_id,
+    set_id_generator,
+    to_base62,
+    uuid4_id_generator,
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_generator():
+    yield
+    set_id_generator(None)
+
+
+class TestBase62:
+    def test_known_values(self):
+        assert to_base62(0) == '0'
+        assert to_base62(61) == 'Z'
+        assert to_base62(62) == '10'
+
+    def test_negative_rejected(self):
+        with pytest.raises(ValueError):
+            to_base62(-1)
+
+
+class TestCompactIdGenerator:
+    def test_ids_are_sequential_and_short(self):
+        gen = CompactIdGenerator(prefix='p')
+        assert [gen(), gen(), gen()] == ['p_1', 'p_2', 'p_3']
+
+    def test_default_ids_are_unique_and_compact(self):
+        ids = {new_element_id() for _ in range(1000)}
+        assert len(ids) == 1000
+        assert all(len(i) < 16 for i in ids)
+        assert all(i.startswith(default_id_generator.prefix + '_') for i in ids)
+
+    def test_reset_changes_prefix(self):
+        gen = CompactIdGenerator(prefix='a')
+        gen()
+        gen.reset(prefix='b')
+        assert gen() == 'b_1'
+
+
+class TestPluggableGenerator:
+    def test_element_uses_configured_generator(self):
+        set_id_generator(CompactIdGenerator(prefix='t'))
+        assert Element('div').uuid == 't_1'
+        assert get_id_generator() is not default_id_generator
+
+    def test_uuid_setter_fallback_uses_generator(self):
+        set_id_generator(lambda: 'fixed')
+        el = Element('div')
+        el.uuid = None
+        assert el.uuid == 'fixed'
+
+    def test_legacy_uuid4_generator(self):
+        set_id_generator(uuid4_id_generator)
+        assert len(Element('div').uuid) == 36
+
+    def test_invalid_generator(self):
+        with pytest.raises(TypeError):
+            set_id_generator('nope')
+
+        set_id_generator(lambda: '')
+        with pytest.raises(ValueError):
+            new_element_id()
+
+
+class TestRoundTrip:
+    def test_ids_survive_from_html(self):
+        root = Element('div', childs=[Element('span', content='a'), Element('b', content='c')])
+        parsed = Element.from_html(root.to_html())
+        assert [c.uuid for c in parsed.childs] == [c.uuid for c in root.childs]
+        assert parsed.uuid == root.uuid
+
+    def test_ids_survive_merge_client_dom(self):
+        server = Element('div', childs=[Element('input', attrs={'type': 'text'})])
+        child_uuid = server.childs[0].uuid
+        client_html = server.to_html().replace('<input', '<input value="typed"', 1)
+
+        merge_client_dom(server, client_html)
+
+        assert index_elements_by_uuid(server)[child_uuid].value == 'typed'
+
+
+class TestDefaultPrefix:
+    def test_full_pid_is_encoded(self, monkeypatch):
+        prefixes = set()
+        for pid in (7, 7 + 3844):
+            monkeypatch.setattr('os.getpid', lambda pid=pid: pid)
+            prefixes.add(CompactIdGenerator.default_prefix()[:-2])
+        assert len(prefixes) == 2
+
+    def test_random_salt(self, monkeypatch):
+        salts = iter((b'\x00\x01', b'\x00\x02'))
+        monkeypatch.setattr('os.urandom', lambda size: next(salts))
+        monkeypatch.setattr('time.time', lambda: 1_700_000_000)
+        assert CompactIdGenerator.default_prefix() != CompactIdGenerator.default_prefix()